@@ -1,61 +1,59 @@
 """Batch processing endpoints."""
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, Header
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db import get_db
+from app.db import get_db, get_sync_db
 from app.core.config import settings
-from app.services.extract import DocumentExtractor
-from app.services.analysis import AnalysisService
-from typing import List
+from app.models.job import AnalysisBatch, AnalysisJob
+from app.schemas.job import BatchStatus, BatchDocumentStatus
+from app.services.jobs import job_manager
+from app.services.uploads import UploadRejected, register_upload, store_upload
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-extractor = DocumentExtractor()
-analysis_service = AnalysisService()
-
 
 @router.post("/api/batch/upload")
 async def batch_upload(
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db)
+    x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
+    db: Session = Depends(get_sync_db)
 ):
-    """Upload multiple files for batch processing."""
-    if len(files) > 10:  # Limit batch size
+    """
+    Upload multiple files and queue them for analysis as one batch.
+    
+    Files that fail validation are reported in results and skipped; the rest
+    are analyzed in the background. Poll /api/batch/{batch_id} for progress.
+    """
+    if len(files) > settings.batch_max_files:  # Limit batch size
         raise HTTPException(
             status_code=400,
-            detail="Maximum 10 files allowed per batch"
+            detail=f"Maximum {settings.batch_max_files} files allowed per batch"
         )
     
     results = []
+    stored = []
     for file in files:
         try:
-            # Validate file
-            file_ext = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
-            if file_ext not in settings.allowed_extensions_list:
-                results.append({
-                    "filename": file.filename,
-                    "status": "error",
-                    "message": f"File type .{file_ext} not allowed"
-                })
-                continue
-            
-            # Read and save file
-            content = await file.read()
-            if len(content) > settings.max_upload_size_bytes:
-                results.append({
-                    "filename": file.filename,
-                    "status": "error",
-                    "message": f"File size exceeds {settings.max_upload_size_mb}MB"
-                })
-                continue
-            
-            # Save file (simplified - in production, use proper file handling)
+            upload = await store_upload(file)
+            await run_in_threadpool(register_upload, db, upload, session_id=x_session_id)
+            stored.append(upload)
             results.append({
                 "filename": file.filename,
+                "file_id": upload.file_id,
                 "status": "success",
                 "message": "File uploaded successfully"
             })
+        except UploadRejected as e:
+            results.append({
+                "filename": file.filename,
+                "status": "error",
+                "message": str(e)
+            })
         except Exception as e:
             logger.error(f"Error processing {file.filename}: {e}")
             results.append({
@@ -64,5 +62,75 @@ async def batch_upload(
                 "message": str(e)
             })
     
-    return {"results": results, "total": len(files), "successful": sum(1 for r in results if r["status"] == "success")}
+    batch_id = None
+    if stored:
+        batch = await run_in_threadpool(job_manager.submit_batch, db, stored, session_id=x_session_id)
+        batch_id = batch.id
+    
+    return {
+        "batch_id": batch_id,
+        "results": results,
+        "total": len(files),
+        "successful": len(stored),
+    }
 
+
+@router.get("/api/batch/{batch_id}", response_model=BatchStatus)
+async def get_batch(
+    batch_id: str,
+    x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
+    db: AsyncSession = Depends(get_db)
+):
+    """Get batch progress and the status of each document."""
+    query = select(AnalysisBatch).where(AnalysisBatch.id == batch_id)
+    
+    # Filter by session_id if provided (user isolation)
+    if x_session_id:
+        query = query.where(AnalysisBatch.session_id == x_session_id)
+    else:
+        # If no session_id, only return batches without session_id
+        query = query.where(AnalysisBatch.session_id == None)
+    
+    batch = (await db.scalars(query)).first()
+    
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+    
+    jobs = (await db.scalars(
+        select(AnalysisJob).where(AnalysisJob.batch_id == batch_id).order_by(AnalysisJob.created_at)
+    )).all()
+    documents = [
+        BatchDocumentStatus(
+            job_id=job.id,
+            filename=job.original_filename,
+            status=job.status,
+            stage=job.stage,
+            total_clauses=job.total_clauses or 0,
+            processed_clauses=job.processed_clauses or 0,
+            analysis_id=job.analysis_id,
+            error=job.error,
+        )
+        for job in jobs
+    ]
+    
+    completed = sum(1 for doc in documents if doc.status == "completed")
+    failed = sum(1 for doc in documents if doc.status == "failed")
+    if completed + failed == len(documents):
+        batch_status = "completed"
+    elif any(doc.status == "running" for doc in documents) or completed + failed:
+        batch_status = "running"
+    else:
+        batch_status = "queued"
+    
+    return BatchStatus(
+        batch_id=batch.id,
+        status=batch_status,
+        total_documents=batch.total_documents,
+        completed_documents=completed,
+        failed_documents=failed,
+        documents=documents,
+        created_at=batch.created_at,
+    )
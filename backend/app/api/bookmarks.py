@@ -1,10 +1,12 @@
 """Bookmarks API endpoints."""
 from fastapi import APIRouter, HTTPException, Depends, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.db import get_db
 from app.models.bookmark import Bookmark
 from app.models.analysis import Clause, Analysis
+from app.db.queries import get_analysis, list_bookmarks
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -13,7 +15,7 @@ router = APIRouter()
 class BookmarkCreate(BaseModel):
     clause_id: int
     analysis_id: int
-    note: str = None
+    note: Optional[str] = None
 
 
 class BookmarkResponse(BaseModel):
@@ -25,7 +27,7 @@ class BookmarkResponse(BaseModel):
     clause_index: int
     risk_label: str
     risk_score: float
-    note: str = None
+    note: Optional[str] = None
     created_at: str
 
 
@@ -33,17 +35,11 @@ class BookmarkResponse(BaseModel):
 async def create_bookmark(
     bookmark: BookmarkCreate,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new bookmark (only for analyses in current session)."""
     # Check if analysis exists and belongs to current session
-    analysis_query = db.query(Analysis).filter(Analysis.id == bookmark.analysis_id)
-    if x_session_id:
-        analysis_query = analysis_query.filter(Analysis.session_id == x_session_id)
-    else:
-        analysis_query = analysis_query.filter(Analysis.session_id == None)
-    
-    analysis = analysis_query.first()
+    analysis = await get_analysis(db, bookmark.analysis_id, x_session_id)
     if not analysis:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -51,10 +47,10 @@ async def create_bookmark(
         )
     
     # Check if clause exists and belongs to this analysis
-    clause = db.query(Clause).filter(
+    clause = (await db.scalars(select(Clause).where(
         Clause.id == bookmark.clause_id,
         Clause.analysis_id == bookmark.analysis_id
-    ).first()
+    ))).first()
     if not clause:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -62,9 +58,9 @@ async def create_bookmark(
         )
     
     # Check if already bookmarked
-    existing = db.query(Bookmark).filter(
+    existing = (await db.scalars(select(Bookmark).where(
         Bookmark.clause_id == bookmark.clause_id
-    ).first()
+    ))).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -78,8 +74,8 @@ async def create_bookmark(
         note=bookmark.note
     )
     db.add(db_bookmark)
-    db.commit()
-    db.refresh(db_bookmark)
+    await db.commit()
+    await db.refresh(db_bookmark)
     
     return BookmarkResponse(
         id=db_bookmark.id,
@@ -98,39 +94,24 @@ async def create_bookmark(
 @router.get("/api/bookmarks", response_model=List[BookmarkResponse])
 async def get_bookmarks(
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all bookmarks for current session."""
-    # Join with Analysis to filter by session_id
-    bookmark_query = db.query(Bookmark).join(Analysis)
-    
-    # Filter by session_id if provided (user isolation)
-    if x_session_id:
-        bookmark_query = bookmark_query.filter(Analysis.session_id == x_session_id)
-    else:
-        # If no session_id, only return bookmarks for analyses without session_id
-        bookmark_query = bookmark_query.filter(Analysis.session_id == None)
-    
-    bookmarks = bookmark_query.order_by(Bookmark.created_at.desc()).all()
-    
+    # Bookmarks with their clause and analysis filename, filtered by session, in one query
     results = []
-    for bookmark in bookmarks:
-        clause = db.query(Clause).filter(Clause.id == bookmark.clause_id).first()
-        analysis = db.query(Analysis).filter(Analysis.id == bookmark.analysis_id).first()
-        
-        if clause and analysis:
-            results.append(BookmarkResponse(
-                id=bookmark.id,
-                clause_id=bookmark.clause_id,
-                analysis_id=bookmark.analysis_id,
-                analysis_filename=analysis.original_filename,
-                clause_text=clause.clause_text,
-                clause_index=clause.clause_index,
-                risk_label=clause.risk_label,
-                risk_score=clause.risk_score,
-                note=bookmark.note,
-                created_at=bookmark.created_at.isoformat()
-            ))
+    for bookmark, clause, analysis_filename in await list_bookmarks(db, x_session_id):
+        results.append(BookmarkResponse(
+            id=bookmark.id,
+            clause_id=bookmark.clause_id,
+            analysis_id=bookmark.analysis_id,
+            analysis_filename=analysis_filename,
+            clause_text=clause.clause_text,
+            clause_index=clause.clause_index,
+            risk_label=clause.risk_label,
+            risk_score=clause.risk_score,
+            note=bookmark.note,
+            created_at=bookmark.created_at.isoformat()
+        ))
     
     return results
 
@@ -139,27 +120,27 @@ async def get_bookmarks(
 async def delete_bookmark(
     bookmark_id: int,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a bookmark (only if belongs to current session)."""
     # Join with Analysis to check session_id
-    bookmark_query = db.query(Bookmark).join(Analysis).filter(Bookmark.id == bookmark_id)
+    bookmark_query = select(Bookmark).join(Analysis).where(Bookmark.id == bookmark_id)
     
     # Filter by session_id if provided (user isolation)
     if x_session_id:
-        bookmark_query = bookmark_query.filter(Analysis.session_id == x_session_id)
+        bookmark_query = bookmark_query.where(Analysis.session_id == x_session_id)
     else:
-        bookmark_query = bookmark_query.filter(Analysis.session_id == None)
+        bookmark_query = bookmark_query.where(Analysis.session_id == None)
     
-    bookmark = bookmark_query.first()
+    bookmark = (await db.scalars(bookmark_query)).first()
     if not bookmark:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bookmark not found or does not belong to your session"
         )
     
-    db.delete(bookmark)
-    db.commit()
+    await db.delete(bookmark)
+    await db.commit()
     
     return {"message": "Bookmark deleted successfully"}
 
@@ -1,9 +1,9 @@
 """Export functionality for analysis reports."""
 from fastapi import APIRouter, HTTPException, Depends, Header
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
-from app.models.analysis import Analysis
+from app.db.queries import get_analysis_with_clauses
 import json
 from typing import Optional
 
@@ -14,18 +14,11 @@ router = APIRouter()
 async def export_json(
     analysis_id: int,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Export analysis as JSON (only if belongs to current session)."""
-    query = db.query(Analysis).filter(Analysis.id == analysis_id)
-    
-    # Filter by session_id if provided (user isolation)
-    if x_session_id:
-        query = query.filter(Analysis.session_id == x_session_id)
-    else:
-        query = query.filter(Analysis.session_id == None)
-    
-    analysis = query.first()
+    # Only if it belongs to the current session; clauses are loaded up front
+    analysis = await get_analysis_with_clauses(db, analysis_id, x_session_id)
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found or does not belong to your session")
     
@@ -65,18 +58,11 @@ async def export_json(
 async def export_txt(
     analysis_id: int,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Export analysis as plain text (only if belongs to current session)."""
-    query = db.query(Analysis).filter(Analysis.id == analysis_id)
-    
-    # Filter by session_id if provided (user isolation)
-    if x_session_id:
-        query = query.filter(Analysis.session_id == x_session_id)
-    else:
-        query = query.filter(Analysis.session_id == None)
-    
-    analysis = query.first()
+    # Only if it belongs to the current session; clauses are loaded up front
+    analysis = await get_analysis_with_clauses(db, analysis_id, x_session_id)
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found or does not belong to your session")
     
@@ -0,0 +1,115 @@
+"""Background analysis job endpoints."""
+import json
+from fastapi import APIRouter, HTTPException, Depends, status, Header
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.db import get_db, get_sync_db
+from app.models.analysis import Clause
+from app.models.job import AnalysisJob, AnalysisJobChunk
+from app.schemas.job import JobResponse, JobStatus
+from app.services.jobs import job_manager
+from app.services.uploads import find_upload
+
+router = APIRouter()
+
+
+@router.post("/api/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    file_id: str,
+    x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
+    db: Session = Depends(get_sync_db)
+):
+    """Queue an uploaded file for background analysis."""
+    upload = find_upload(db, file_id)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    job = job_manager.submit(
+        db,
+        file_id=file_id,
+        filename=upload.filename,
+        original_filename=upload.original_filename,
+        file_path=upload.file_path,
+        session_id=x_session_id,
+    )
+    
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        message="Analysis queued",
+    )
+
+
+@router.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: str,
+    offset: int = 0,
+    x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get job progress and the clause results available so far.
+    
+    Pass offset (the number of clauses already received) to fetch only new results.
+    """
+    query = select(AnalysisJob).where(AnalysisJob.id == job_id)
+    
+    # Filter by session_id if provided (user isolation)
+    if x_session_id:
+        query = query.where(AnalysisJob.session_id == x_session_id)
+    else:
+        # If no session_id, only return jobs without session_id
+        query = query.where(AnalysisJob.session_id == None)
+    
+    job = (await db.scalars(query)).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    offset = max(0, offset)
+    if job.analysis_id:
+        clauses = (await db.scalars(select(Clause).where(
+            Clause.analysis_id == job.analysis_id
+        ).order_by(Clause.clause_index).offset(offset))).all()
+        clause_analyses = [
+            {
+                "clause_id": c.id,
+                "clause_text": c.clause_text,
+                "clause_index": c.clause_index,
+                "risk_label": c.risk_label,
+                "risk_score": c.risk_score,
+                "explanation": c.explanation or "",
+                "suggested_mitigation": c.suggested_mitigation or "",
+            }
+            for c in clauses
+        ]
+    else:
+        # Only the chunks holding clauses past offset are read
+        chunks = (await db.scalars(select(AnalysisJobChunk).where(
+            AnalysisJobChunk.job_id == job.id,
+            AnalysisJobChunk.first_clause + AnalysisJobChunk.clause_count > offset,
+        ).order_by(AnalysisJobChunk.first_clause))).all()
+        clause_analyses = []
+        for chunk in chunks:
+            clause_analyses.extend(json.loads(chunk.results)[max(0, offset - chunk.first_clause):])
+    
+    return JobStatus(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        total_clauses=job.total_clauses or 0,
+        processed_clauses=job.processed_clauses or 0,
+        analysis_id=job.analysis_id,
+        error=job.error,
+        clauses=clause_analyses,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
@@ -1,90 +1,101 @@
 """API routes."""
-import os
-import uuid
+import json
 import logging
-from pathlib import Path
-from typing import List, Optional
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, Header
-from fastapi.responses import JSONResponse
+from typing import List, Literal, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status, Header, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db import get_db
-from app.models.analysis import Analysis, Clause
+from app.db import get_db, get_sync_db
+from app.db.queries import encode_cursor, get_analysis as find_analysis, list_clauses, list_history
+from app.ml.registry import model_registry
 from app.schemas.analysis import (
     AnalysisResponse,
     AnalysisHistoryItem,
     UploadResponse,
     DocumentAnalysis,
 )
-from app.services.extract import DocumentExtractor
-from app.services.analysis import AnalysisService
+from app.services import pipeline
+from app.services import search as clause_search
+from app.services.artifacts import extract_document
+from app.services.extract import DocumentExtractor, SegmentationError
+from app.services.jobs import job_manager
+from app.services.uploads import UploadRejected, find_upload, mark_extraction, register_upload, store_upload
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
-extractor = DocumentExtractor()
-analysis_service = AnalysisService()
-
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "ml_mode": settings.ml_mode}
+    """
+    Health check endpoint.
+    
+    ready is false while the ML model is being loaded or warmed up at startup;
+    model reports its state (see ModelRegistry.status).
+    """
+    model = model_registry.status()
+    return {
+        "status": "healthy",
+        "ml_mode": settings.ml_mode,
+        "ready": model["state"] != "loading" and not model["warming_up"],
+        "model": model,
+    }
 
 
 @router.post("/api/upload", response_model=UploadResponse)
 async def upload_file(
     file: UploadFile = File(...),
+    analyze: bool = False,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ):
     """
     Upload a document for analysis.
     
     Validates file type and size, saves to uploads directory.
+    With analyze=true, also queues a background analysis job and returns its job_id.
     """
-    # Validate file extension
-    file_ext = Path(file.filename).suffix.lower().lstrip(".")
-    if file_ext not in settings.allowed_extensions_list:
+    # Stream to disk, validating type and size as it is copied
+    try:
+        stored = await store_upload(file)
+    except UploadRejected as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type .{file_ext} not allowed. Allowed: {settings.allowed_extensions}"
+            detail=str(e)
         )
+    upload = await run_in_threadpool(register_upload, db, stored, session_id=x_session_id)
     
-    # Validate file size
-    file_content = await file.read()
-    if len(file_content) > settings.max_upload_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds maximum of {settings.max_upload_size_mb}MB"
+    job_id = None
+    if analyze:
+        job = await run_in_threadpool(
+            job_manager.submit,
+            db,
+            file_id=upload.id,
+            filename=upload.filename,
+            original_filename=upload.original_filename,
+            file_path=upload.file_path,
+            session_id=x_session_id,
         )
-    
-    # Generate unique file ID
-    file_id = str(uuid.uuid4())
-    safe_filename = f"{file_id}_{file.filename}"
-    file_path = os.path.join(settings.uploads_dir, safe_filename)
-    
-    # Save file
-    os.makedirs(settings.uploads_dir, exist_ok=True)
-    with open(file_path, "wb") as f:
-        f.write(file_content)
-    
-    logger.info(f"File uploaded: {safe_filename}")
+        job_id = job.id
     
     return UploadResponse(
-        file_id=file_id,
-        filename=safe_filename,
-        message="File uploaded successfully"
+        file_id=upload.id,
+        filename=upload.filename,
+        message="File uploaded successfully",
+        content_hash=upload.content_hash,
+        job_id=job_id,
     )
 
 
 @router.post("/api/extract")
-async def extract_text(
+def extract_text(
     file_id: str,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ):
     """
     Extract text and segment into clauses from uploaded file.
@@ -93,60 +104,46 @@ async def extract_text(
     """
     try:
         # Find file by ID
-        uploads_dir = Path(settings.uploads_dir)
-        matching_files = list(uploads_dir.glob(f"{file_id}_*"))
+        upload = find_upload(db, file_id)
         
-        if not matching_files:
-            logger.error(f"File not found for file_id: {file_id} in {uploads_dir}")
+        if not upload:
+            logger.error(f"File not found for file_id: {file_id} in {settings.uploads_dir}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"File not found for file_id: {file_id}"
             )
         
-        file_path = str(matching_files[0])
+        file_path = upload.file_path
         logger.info(f"Extracting text from: {file_path}")
         
-        # Extract text
-        text = extractor.extract_text(file_path)
-        logger.info(f"Extracted {len(text)} characters")
-        
-        # Segment into clauses
-        clauses = extractor.segment_clauses(text)
-        logger.info(f"Segmented into {len(clauses)} clauses")
-        
-        # Validate clauses
-        if not clauses:
-            logger.warning("No clauses found after segmentation. Text might be empty or format not recognized.")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not segment document into clauses. Please ensure the document contains numbered clauses (1., 2., etc.) or clear paragraph breaks."
-            )
+        # Extract text and segment into clauses (reusing a stored artifact if present)
+        try:
+            extraction = extract_document(file_path, upload.content_hash, include_text=True)
+        except ValueError:
+            mark_extraction(db, file_id, "failed")
+            raise
+        text, clauses = extraction
+        logger.info(f"Extracted {len(text)} characters, segmented into {len(clauses)} clauses")
         
         if len(clauses) == 1 and len(clauses[0]) > 5000:
             logger.warning(f"Only one very long clause found ({len(clauses[0])} chars). Segmentation might have failed.")
             # Log warning but don't fail - user might have a single long clause
         
         # Validate clause quality
-        valid_clauses = []
-        for idx, clause in enumerate(clauses):
-            clause = clause.strip()
-            if len(clause) < 10:
-                logger.warning(f"Skipping clause {idx+1}: too short ({len(clause)} chars)")
-                continue
-            if len(clause) > 10000:
-                logger.warning(f"Clause {idx+1} is very long ({len(clause)} chars), truncating to 10000 chars")
-                clause = clause[:10000] + "..."
-            valid_clauses.append(clause)
-        
-        if not valid_clauses:
+        try:
+            valid_clauses = DocumentExtractor.validate_clauses(clauses)
+        except SegmentationError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No valid clauses found after segmentation. Please check your document format."
+                detail=str(e)
             )
         
+        if upload.extraction_status != "extracted":
+            mark_extraction(db, file_id, "extracted")
+        
         return {
             "file_id": file_id,
-            "filename": matching_files[0].name,
+            "filename": upload.filename,
             "text": text,
             "clauses": valid_clauses,
             "clause_count": len(valid_clauses),
@@ -175,10 +172,10 @@ async def extract_text(
 
 
 @router.post("/api/analyze", response_model=AnalysisResponse)
-async def analyze_document(
+def analyze_document(
     file_id: str,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ):
     """
     Analyze document for risks.
@@ -186,85 +183,29 @@ async def analyze_document(
     Extracts text, segments clauses, runs risk analysis, and stores results.
     """
     # Find file
-    uploads_dir = Path(settings.uploads_dir)
-    matching_files = list(uploads_dir.glob(f"{file_id}_*"))
+    upload = find_upload(db, file_id)
     
-    if not matching_files:
+    if not upload:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    file_path = str(matching_files[0])
-    original_filename = matching_files[0].name.replace(f"{file_id}_", "", 1)
+    file_path = upload.file_path
+    original_filename = upload.original_filename
     
     try:
-        # Extract and segment
-        text = extractor.extract_text(file_path)
-        clauses = extractor.segment_clauses(text)
-        
-        # Validate clauses
-        if not clauses:
-            logger.warning("No clauses found after segmentation in analyze endpoint")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not segment document into clauses. Please ensure the document contains numbered clauses (1., 2., etc.) or clear paragraph breaks."
-            )
-        
-        # Validate clause quality
-        valid_clauses = []
-        for idx, clause in enumerate(clauses):
-            clause = clause.strip()
-            if len(clause) < 10:
-                logger.warning(f"Skipping clause {idx+1} in analysis: too short ({len(clause)} chars)")
-                continue
-            if len(clause) > 10000:
-                logger.warning(f"Clause {idx+1} is very long ({len(clause)} chars), truncating to 10000 chars")
-                clause = clause[:10000] + "..."
-            valid_clauses.append(clause)
-        
-        if not valid_clauses:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No valid clauses found after segmentation. Please check your document format."
-            )
-        
-        clauses = valid_clauses  # Use validated clauses
-        
-        # Analyze - use the analysis service
-        # Note: If mode is changed via settings API, it will use the updated service
-        analysis_result = analysis_service.analyze_document(clauses)
-        
-        # Store in database
-        db_analysis = Analysis(
-            session_id=x_session_id,  # Store session_id for user isolation
-            filename=matching_files[0].name,
+        analysis_result = pipeline.analyze_file(file_path, content_hash=upload.content_hash)
+        if upload.extraction_status != "extracted":
+            mark_extraction(db, file_id, "extracted")
+        db_analysis = pipeline.save_analysis(
+            db,
+            analysis_result,
+            session_id=x_session_id,
+            filename=upload.filename,
             original_filename=original_filename,
             file_path=file_path,
-            global_risk_score=analysis_result["global_risk_score"],
-            total_clauses=analysis_result["total_clauses"],
-            high_risk_count=analysis_result["high_risk_count"],
-            medium_risk_count=analysis_result["medium_risk_count"],
-            low_risk_count=analysis_result["low_risk_count"],
         )
-        db.add(db_analysis)
-        db.flush()
-        
-        # Store clauses
-        for clause_data in analysis_result["clauses"]:
-            db_clause = Clause(
-                analysis_id=db_analysis.id,
-                clause_text=clause_data["clause_text"],
-                clause_index=clause_data["clause_index"],
-                risk_label=clause_data["risk_label"],
-                risk_score=clause_data["risk_score"],
-                explanation=clause_data["explanation"],
-                suggested_mitigation=clause_data["suggested_mitigation"],
-            )
-            db.add(db_clause)
-        
-        db.commit()
-        db.refresh(db_analysis)
         
         # Build response
         clause_analyses = [
@@ -294,6 +235,12 @@ async def analyze_document(
             analysis=document_analysis,
             created_at=db_analysis.created_at,
         )
+    except SegmentationError as e:
+        mark_extraction(db, file_id, "failed")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -305,43 +252,139 @@ async def analyze_document(
         )
 
 
+def _format_event(event: str, data: dict, fmt: str) -> str:
+    """Encode one stream event as SSE or NDJSON."""
+    if fmt == "ndjson":
+        return json.dumps({"event": event, **data}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/api/analyze/stream")
+def analyze_document_stream(
+    file_id: str,
+    format: Literal["sse", "ndjson"] = "sse",
+    x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
+    db: Session = Depends(get_sync_db)
+):
+    """
+    Analyze document for risks, streaming clause results as they are scored.
+    
+    Emits a "progress" event per batch of clauses (with the global risk score
+    over the clauses scored so far), then a "complete" event with the stored
+    analysis_id and the final document summary, or an "error" event.
+    """
+    upload = find_upload(db, file_id)
+    
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    file_path = upload.file_path
+    original_filename = upload.original_filename
+    
+    def events():
+        try:
+            for progress in pipeline.iter_analysis(
+                file_path,
+                chunk_size=settings.inference_batch_size,
+                content_hash=upload.content_hash,
+            ):
+                if progress.result is None:
+                    yield _format_event("progress", {
+                        "processed": progress.processed,
+                        "total": progress.total,
+                        "global_risk_score": progress.global_risk_score,
+                        "clauses": progress.clauses,
+                    }, format)
+                    continue
+                
+                analysis_result = progress.result
+                db_analysis = pipeline.save_analysis(
+                    db,
+                    analysis_result,
+                    session_id=x_session_id,
+                    filename=upload.filename,
+                    original_filename=original_filename,
+                    file_path=file_path,
+                )
+                yield _format_event("complete", {
+                    "analysis_id": db_analysis.id,
+                    "filename": original_filename,
+                    "global_risk_score": analysis_result["global_risk_score"],
+                    "total_clauses": analysis_result["total_clauses"],
+                    "high_risk_count": analysis_result["high_risk_count"],
+                    "medium_risk_count": analysis_result["medium_risk_count"],
+                    "low_risk_count": analysis_result["low_risk_count"],
+                    "created_at": db_analysis.created_at.isoformat(),
+                }, format)
+        except SegmentationError as e:
+            yield _format_event("error", {"detail": str(e)}, format)
+        except Exception as e:
+            logger.error(f"Error streaming analysis: {e}")
+            db.rollback()
+            yield _format_event("error", {"detail": f"Error analyzing document: {str(e)}"}, format)
+        finally:
+            # The response outlives the request dependency, so release the session here
+            db.close()
+    
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/api/history", response_model=List[AnalysisHistoryItem])
 async def get_history(
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get analysis history for current session."""
-    query = db.query(Analysis)
+    """
+    Get analysis history for current session, newest first.
     
-    # Filter by session_id if provided (user isolation)
-    if x_session_id:
-        query = query.filter(Analysis.session_id == x_session_id)
-    else:
-        # If no session_id, return empty (user isolation)
-        query = query.filter(Analysis.session_id == None)
+    When more analyses follow, the X-Next-Cursor header holds the cursor
+    to pass to fetch the next page.
+    """
+    try:
+        # Filtered by session_id (user isolation)
+        rows = await list_history(db, x_session_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    analyses = query.order_by(Analysis.created_at.desc()).limit(limit).all()
-    return [AnalysisHistoryItem.model_validate(a) for a in analyses]
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [AnalysisHistoryItem.model_validate(row) for row in rows]
 
 
 @router.get("/api/history/{analysis_id}", response_model=AnalysisResponse)
 async def get_analysis(
     analysis_id: int,
+    response: Response,
+    clause_after: Optional[int] = None,
+    clause_limit: Optional[int] = Query(None, ge=1, le=1000),
+    risk_label: Optional[List[Literal["LOW", "MEDIUM", "HIGH"]]] = Query(None),
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get specific analysis by ID (only if belongs to current session)."""
-    query = db.query(Analysis).filter(Analysis.id == analysis_id)
-    
-    # Filter by session_id if provided (user isolation)
-    if x_session_id:
-        query = query.filter(Analysis.session_id == x_session_id)
-    else:
-        # If no session_id, only return analyses without session_id
-        query = query.filter(Analysis.session_id == None)
+    """
+    Get specific analysis by ID (only if belongs to current session).
     
-    analysis = query.first()
+    Returns all clauses by default. For paged retrieval pass clause_limit,
+    and clause_after set to the last clause_index received (also returned in
+    the X-Next-Cursor header while more clauses follow); risk_label (repeatable)
+    keeps only clauses with those labels. Summary counts cover the whole document.
+    """
+    # Only if it belongs to the current session
+    analysis = await find_analysis(db, analysis_id, x_session_id)
     
     if not analysis:
         raise HTTPException(
@@ -349,8 +392,15 @@ async def get_analysis(
             detail="Analysis not found"
         )
     
-    # Load clauses
-    clauses = db.query(Clause).filter(Clause.analysis_id == analysis_id).order_by(Clause.clause_index).all()
+    clauses = await list_clauses(
+        db,
+        analysis_id,
+        after_index=clause_after,
+        limit=clause_limit,
+        risk_labels=risk_label,
+    )
+    if clause_limit and len(clauses) == clause_limit:
+        response.headers["X-Next-Cursor"] = str(clauses[-1].clause_index)
     
     clause_analyses = [
         {
@@ -388,54 +438,25 @@ async def search_clauses(
     analysis_id: int = None,
     limit: int = 50,
     x_session_id: Optional[str] = Header(None, alias="X-Session-ID"),  # Session ID from header
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Search clauses across all analyses or within a specific analysis (filtered by session)."""
-    from sqlalchemy import or_
+    """
+    Search clauses across all analyses or within a specific analysis (filtered by session).
     
+    Uses the full-text index: every word of the query must match, as a word
+    prefix ("indemn" finds "indemnify"), rather than the query as one
+    substring. Results are ranked by relevance and include a snippet of
+    HTML-escaped clause text with matched terms wrapped in <mark> tags.
+    """
     if not query or len(query.strip()) < 2:
         return {"query": query, "results": [], "count": 0}
     
-    clause_query = db.query(Clause).join(Analysis)
-    
-    # Filter by session_id if provided (user isolation)
-    if x_session_id:
-        clause_query = clause_query.filter(Analysis.session_id == x_session_id)
-    else:
-        # If no session_id, only search in analyses without session_id
-        clause_query = clause_query.filter(Analysis.session_id == None)
-    
-    # Filter by analysis_id if provided
-    if analysis_id:
-        clause_query = clause_query.filter(Clause.analysis_id == analysis_id)
-    
-    # Search in clause text, explanation, and mitigation
-    search_term = f"%{query.strip()}%"
-    clause_query = clause_query.filter(
-        or_(
-            Clause.clause_text.ilike(search_term),
-            Clause.explanation.ilike(search_term),
-            Clause.suggested_mitigation.ilike(search_term)
-        )
+    results = await clause_search.search_clauses(
+        db,
+        query,
+        session_id=x_session_id,
+        analysis_id=analysis_id,
+        limit=limit,
     )
     
-    clauses = clause_query.limit(limit).all()
-    
-    # Format response with analysis info
-    results = []
-    for clause in clauses:
-        analysis = db.query(Analysis).filter(Analysis.id == clause.analysis_id).first()
-        results.append({
-            "clause_id": clause.id,
-            "analysis_id": clause.analysis_id,
-            "analysis_filename": analysis.original_filename if analysis else "",
-            "clause_text": clause.clause_text,
-            "clause_index": clause.clause_index,
-            "risk_label": clause.risk_label,
-            "risk_score": clause.risk_score,
-            "explanation": clause.explanation,
-            "suggested_mitigation": clause.suggested_mitigation,
-        })
-    
     return {"query": query, "results": results, "count": len(results)}
-
@@ -3,15 +3,13 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Literal
 from app.services.analysis import AnalysisService
+from app.ml.registry import model_registry
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Global analysis service instance (will be updated when mode changes)
-analysis_service = AnalysisService()
-
 
 class SettingsUpdate(BaseModel):
     """Settings update request."""
@@ -44,10 +42,14 @@ async def update_settings(settings_update: SettingsUpdate):
         # Update settings object
         settings.ml_mode = new_mode
         
-        # Reinitialize analysis service with new mode
-        # Update the global service in routes module
-        import app.api.routes as routes_module
-        routes_module.analysis_service = AnalysisService()
+        # A model installed since the last failed load is picked up on next use;
+        # a loaded model is shared, so switching modes never reloads it
+        if new_mode == "ml" and model_registry.state == "unavailable":
+            model_registry.reset()
+        
+        # Update the global service used by the analysis pipeline
+        from app.services import pipeline
+        pipeline.analysis_service = AnalysisService()
         
         logger.info(f"ML mode changed from {old_mode} to {new_mode}")
         
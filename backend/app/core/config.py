@@ -14,11 +14,25 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./contract_analyzer.db")
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Replace connections older than this (seconds)
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000  # PostgreSQL only; 0 disables
     
     # ML Configuration
     ml_mode: Literal["ml", "rules"] = "ml"
     model_path: str = "./models/risk_classifier"
     use_gpu: bool = False
+    inference_batch_size: int = 16
+    inference_max_batch_tokens: int = 8192
+    inference_window_stride: int = 128  # Tokens shared by the overlapping windows of clauses over 512 tokens
+    inference_window_aggregation: Literal["max_risk", "mean"] = "max_risk"  # How window results combine into one
+    inference_token_cache_size: int = 50000  # Tokenized clauses kept for re-scoring; 0 disables
+    model_warmup: bool = True  # Load the model and run a dummy batch at startup (ML mode)
+    inference_backend: Literal["torch", "onnx", "onnx-int8"] = "torch"  # onnx needs python -m app.ml.export_onnx, onnx-int8 python -m app.ml.quantize
+    onnx_intra_op_threads: int = 0  # ONNX Runtime threads per inference; 0 uses all cores
     
     # Security
     api_key: str = "your_api_key_here"
@@ -31,9 +45,33 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     
+    # Analysis cache
+    analysis_cache_enabled: bool = True
+    analysis_cache_size: int = 128
+    analysis_cache_disk_entries: int = 1000
+    clause_cache_size: int = 20000
+    extraction_artifacts_enabled: bool = True
+    extraction_artifacts_max_entries: int = 1000  # Artifact files kept on disk; least recently written pruned
+    
+    # Background jobs
+    job_workers: int = 2
+    job_chunk_size: int = 64
+    job_stale_seconds: int = 600
+    
+    # Document extraction
+    pdf_extract_workers: int = 4  # Processes for page-parallel PDF extraction; 0 or 1 disables
+    pdf_parallel_min_pages: int = 64  # Smaller PDFs are extracted sequentially
+    
+    # Batch analysis
+    batch_max_files: int = 500
+    batch_extract_workers: int = 4  # Extraction processes; 0 extracts on the job thread
+    batch_inference_chunk_size: int = 256  # Clauses scored together across documents
+    
     # Paths
     uploads_dir: str = "./uploads"
     models_dir: str = "./models"
+    cache_dir: str = "./cache"
+    upload_retention_days: int = 0  # Delete uploads older than this on startup; 0 keeps them
     
     @property
     def max_upload_size_bytes(self) -> int:
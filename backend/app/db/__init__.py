@@ -1,21 +1,84 @@
 """Database initialization."""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+# Async drivers used for each database's async engine
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(database_url: str) -> str:
+    """Return database_url with its driver swapped for the async one (aiosqlite/asyncpg)."""
+    url = make_url(database_url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver and url.drivername != driver:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+
+def engine_options(database_url: str, is_async: bool = False) -> dict:
+    """
+    Pool and connection options for an engine on database_url.
+    
+    SQLite keeps SQLAlchemy's default pool; other databases get the pool
+    sizing, pre-ping and recycle from settings, and PostgreSQL a server-side
+    statement timeout.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {"connect_args": {} if is_async else {"check_same_thread": False}}
+    
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if url.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms > 0:
+        timeout = str(settings.db_statement_timeout_ms)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+# Sync engine: startup, migrations and the background analysis workers
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    **engine_options(settings.database_url, is_async=True)
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for getting database session."""
+async def get_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db():
+    """
+    Dependency for getting a sync database session.
+    
+    For routes that hand the session to the sync analysis pipeline or job
+    manager; those routes are plain functions so they run in the threadpool.
+    """
     db = SessionLocal()
     try:
         yield db
@@ -26,4 +89,12 @@ def get_db():
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
-
+    
+    # create_all skips existing tables, so add indexes introduced since they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    # Full-text index for clause search
+    from app.services.search import ensure_search_index
+    ensure_search_index(engine)
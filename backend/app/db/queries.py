@@ -0,0 +1,115 @@
+"""Read queries for the API, each loading what it needs in a fixed number of round-trips."""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import Row, Select, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.analysis import Analysis, Clause
+from app.models.bookmark import Bookmark
+
+
+def scope_to_session(query: Select, session_id: Optional[str]) -> Select:
+    """Restrict a query joined to Analysis to one browser session (user isolation)."""
+    if session_id:
+        return query.where(Analysis.session_id == session_id)
+    # If no session_id, only analyses without session_id
+    return query.where(Analysis.session_id == None)
+
+
+# Columns of Analysis listed in history (see AnalysisHistoryItem)
+HISTORY_COLUMNS = (
+    Analysis.id,
+    Analysis.filename,
+    Analysis.original_filename,
+    Analysis.global_risk_score,
+    Analysis.total_clauses,
+    Analysis.high_risk_count,
+    Analysis.medium_risk_count,
+    Analysis.low_risk_count,
+    Analysis.created_at,
+)
+
+
+def encode_cursor(created_at: datetime, analysis_id: int) -> str:
+    """Opaque history cursor pointing just past (created_at, analysis_id)."""
+    payload = json.dumps([created_at.isoformat(), analysis_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return the (created_at, id) in a history cursor; raises ValueError if malformed."""
+    try:
+        created_at, analysis_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+async def list_history(
+    db: AsyncSession, session_id: Optional[str], limit: int, cursor: Optional[str] = None
+) -> List[Row]:
+    """
+    Return one page of the session's analyses, newest first, as HISTORY_COLUMNS rows.
+    
+    Keyset pagination over (created_at, id): each page is an index range scan
+    starting after the cursor, so its cost does not grow with the page number.
+    """
+    query = scope_to_session(select(*HISTORY_COLUMNS), session_id)
+    if cursor:
+        created_at, analysis_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Analysis.created_at < created_at,
+            and_(Analysis.created_at == created_at, Analysis.id < analysis_id),
+        ))
+    query = query.order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(limit)
+    return (await db.execute(query)).all()
+
+
+async def list_clauses(
+    db: AsyncSession,
+    analysis_id: int,
+    after_index: Optional[int] = None,
+    limit: Optional[int] = None,
+    risk_labels: Optional[Sequence[str]] = None,
+) -> List[Clause]:
+    """Return an analysis's clauses in document order, after clause_index after_index and filtered by label."""
+    query = select(Clause).where(Clause.analysis_id == analysis_id)
+    if after_index is not None:
+        query = query.where(Clause.clause_index > after_index)
+    if risk_labels:
+        query = query.where(Clause.risk_label.in_(risk_labels))
+    query = query.order_by(Clause.clause_index)
+    if limit is not None:
+        query = query.limit(limit)
+    return (await db.scalars(query)).all()
+
+
+async def get_analysis(db: AsyncSession, analysis_id: int, session_id: Optional[str]) -> Optional[Analysis]:
+    """Return an analysis in the session, or None."""
+    query = select(Analysis).where(Analysis.id == analysis_id)
+    return (await db.scalars(scope_to_session(query, session_id))).first()
+
+
+async def get_analysis_with_clauses(
+    db: AsyncSession, analysis_id: int, session_id: Optional[str]
+) -> Optional[Analysis]:
+    """Return an analysis in the session with its clauses loaded (two queries in total), or None."""
+    query = select(Analysis).options(selectinload(Analysis.clauses)).where(Analysis.id == analysis_id)
+    return (await db.scalars(scope_to_session(query, session_id))).first()
+
+
+async def list_bookmarks(db: AsyncSession, session_id: Optional[str]) -> List[Tuple[Bookmark, Clause, str]]:
+    """
+    Return (bookmark, clause, analysis filename) for the session's bookmarks, newest first.
+    
+    One joined query; bookmarks whose clause no longer exists are skipped.
+    """
+    query = (
+        select(Bookmark, Clause, Analysis.original_filename)
+        .join(Analysis, Analysis.id == Bookmark.analysis_id)
+        .join(Clause, Clause.id == Bookmark.clause_id)
+    )
+    result = await db.execute(scope_to_session(query, session_id).order_by(Bookmark.created_at.desc()))
+    return result.all()
@@ -23,6 +23,8 @@ from app.api.routes import router
 from app.api.export import router as export_router
 from app.api.settings import router as settings_router
 from app.api import bookmarks
+from app.api.jobs import router as jobs_router
+from app.api.batch import router as batch_router
 from app.core.config import settings
 
 # Configure logging
@@ -53,6 +55,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor of /api/history
 )
 
 # Include routers
@@ -60,6 +63,8 @@ app.include_router(router)
 app.include_router(export_router)
 app.include_router(settings_router)
 app.include_router(bookmarks.router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
 
 
 @app.on_event("startup")
@@ -76,11 +81,45 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Migration check failed (this is OK if column already exists): {e}")
     
+    # Apply the upload retention policy
+    if settings.upload_retention_days > 0:
+        from app.db import SessionLocal
+        from app.services.uploads import collect_expired_uploads
+        db = SessionLocal()
+        try:
+            collect_expired_uploads(db, settings.upload_retention_days)
+        except Exception as e:
+            logger.warning(f"Upload cleanup failed: {e}")
+        finally:
+            db.close()
+    
+    # Load the shared model and score a dummy batch in the background, so the
+    # first request does not pay for it; /health is not ready until it is done
+    if settings.ml_mode == "ml" and settings.model_warmup:
+        from app.ml.registry import model_registry
+        model_registry.start_warm_up()
+    
+    # Resume analysis jobs left queued or interrupted by a previous run
+    from app.services.jobs import job_manager
+    recovered = job_manager.recover()
+    if recovered:
+        logger.info(f"Resumed {recovered} background analysis jobs")
+    
     logger.info(f"Starting application in {settings.environment} mode")
     logger.info(f"ML Mode: {settings.ml_mode}")
     logger.info(f"Upload directory: {settings.uploads_dir}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers on shutdown."""
+    from app.services.jobs import job_manager
+    job_manager.shutdown()
+    
+    from app.db import async_engine
+    await async_engine.dispose()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -0,0 +1,111 @@
+"""Inference backends: the classifier's forward pass in PyTorch or ONNX Runtime."""
+import logging
+import os
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Where python -m app.ml.export_onnx writes the ONNX graph, relative to the model directory
+ONNX_MODEL_FILE = os.path.join("onnx", "model.onnx")
+# Where python -m app.ml.quantize publishes the int8 graph once it passes the accuracy gate
+QUANTIZED_MODEL_FILE = os.path.join("onnx", "model.int8.onnx")
+
+
+def onnx_model_path(model_path: str) -> str:
+    """Path of the exported ONNX graph for the model in model_path."""
+    return os.path.join(model_path, ONNX_MODEL_FILE)
+
+
+def quantized_model_path(model_path: str) -> str:
+    """Path of the published int8 ONNX graph for the model in model_path."""
+    return os.path.join(model_path, QUANTIZED_MODEL_FILE)
+
+
+class TorchBackend:
+    """Runs the Hugging Face PyTorch model."""
+    
+    name = "torch"
+    
+    def __init__(self, model_path: str):
+        """Load the model weights onto the configured device."""
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        
+        self._torch = torch
+        self.device = "cuda" if settings.use_gpu and torch.cuda.is_available() else "cpu"
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.model.to(self.device)
+        self.model.eval()
+    
+    def logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Return float32 logits of shape (batch, num_labels) for padded int64 inputs."""
+        torch = self._torch
+        with torch.inference_mode():
+            logits = self.model(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=torch.from_numpy(attention_mask).to(self.device),
+            ).logits
+        return logits.float().cpu().numpy()
+
+
+class OnnxBackend:
+    """Runs the exported ONNX graph with ONNX Runtime on the CPU (no PyTorch needed)."""
+    
+    def __init__(self, model_file: str, name: str = "onnx"):
+        """Create an inference session for model_file; name is "onnx", or "onnx-int8" for the quantized graph."""
+        import onnxruntime as ort
+        
+        self.name = name
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.onnx_intra_op_threads > 0:
+            options.intra_op_num_threads = settings.onnx_intra_op_threads
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self._input_names = {graph_input.name for graph_input in self.session.get_inputs()}
+    
+    def logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Return float32 logits of shape (batch, num_labels) for padded int64 inputs."""
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        logits = self.session.run(["logits"], feeds)[0]
+        return logits.astype(np.float32, copy=False)
+
+
+def load_backend(model_path: str, name: str):
+    """
+    Load the named backend ("torch", "onnx" or "onnx-int8") for the model in model_path.
+    
+    The ONNX backends need onnxruntime and an exported graph; without either
+    they fall back to PyTorch with a warning. onnx-int8 falls back to the
+    fp32 graph when no quantized graph has been published.
+    """
+    if name == "onnx-int8":
+        model_file = quantized_model_path(model_path)
+        if not os.path.exists(model_file):
+            logger.warning(
+                f"Quantized model not found at {model_file} (create it with python -m app.ml.quantize). "
+                "Using the onnx backend."
+            )
+        else:
+            try:
+                return OnnxBackend(model_file, name="onnx-int8")
+            except ImportError as e:
+                logger.warning(f"ONNX Runtime not available ({e}). Using the torch backend.")
+                return TorchBackend(model_path)
+        name = "onnx"
+    
+    if name == "onnx":
+        model_file = onnx_model_path(model_path)
+        if not os.path.exists(model_file):
+            logger.warning(
+                f"ONNX model not found at {model_file} (export it with python -m app.ml.export_onnx). "
+                "Using the torch backend."
+            )
+        else:
+            try:
+                return OnnxBackend(model_file)
+            except ImportError as e:
+                logger.warning(f"ONNX Runtime not available ({e}). Using the torch backend.")
+    return TorchBackend(model_path)
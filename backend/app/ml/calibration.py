@@ -0,0 +1,248 @@
+"""Risk score mapping and probability calibration for the risk classifier."""
+import json
+import logging
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Written by python -m app.ml.calibration next to the model weights
+CALIBRATION_FILE = "calibration.json"
+METHODS = ("temperature", "isotonic")
+
+
+def score_probabilities(probs: np.ndarray, risk_labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Map an (N, num_labels) probability matrix to risk labels and 0-100 risk scores.
+    
+    risk_labels names the risk label ("LOW", "MEDIUM" or "HIGH") of each
+    column. A HIGH prediction scores 70-100, MEDIUM 30-70 and LOW 0-30, by
+    the confidence of the prediction; HIGH is dampened when MEDIUM is
+    likely, and MEDIUM raised when HIGH is.
+    
+    Returns:
+        Tuple of (label array, confidence array, risk score array)
+    """
+    best = probs.argmax(axis=1)
+    confidences = probs[np.arange(len(probs)), best]
+    labels = risk_labels[best]
+    
+    # Per-label probability (used for uncertainty adjustment)
+    medium_prob = probs[:, risk_labels == "MEDIUM"].max(axis=1, initial=0.0)
+    high_prob = probs[:, risk_labels == "HIGH"].max(axis=1, initial=0.0)
+    
+    is_high = labels == "HIGH"
+    is_medium = labels == "MEDIUM"
+    
+    # High risk: 70-100, medium risk: 30-70, low risk: 0-30 based on confidence
+    risk_scores = np.where(
+        is_high,
+        70 + confidences * 30,
+        np.where(is_medium, 30 + confidences * 40, confidences * 30),
+    )
+    
+    # Adjust based on other class probabilities (uncertainty)
+    risk_scores = np.where(is_high & (medium_prob > 0.3), risk_scores * 0.9, risk_scores)
+    risk_scores = np.where(
+        is_medium & (high_prob > 0.25),
+        np.minimum(100, risk_scores + 10),
+        risk_scores,
+    )
+    
+    # Ensure score is in 0-100 range
+    return labels, confidences, np.clip(risk_scores, 0, 100)
+
+
+class Calibration:
+    """
+    A fitted map from model probabilities to calibrated probabilities.
+    
+    "temperature" divides the logits by one fitted temperature. "isotonic"
+    maps each class probability through a fitted monotone piecewise-linear
+    curve (one-vs-rest) and renormalizes the rows.
+    """
+    
+    def __init__(self, method: str, temperature: float = 1.0, curves: Optional[List[Dict]] = None, samples: int = 0):
+        """Initialize the calibration; curves holds an {"x": [...], "y": [...]} curve per class for isotonic."""
+        if method not in METHODS:
+            raise ValueError(f"Unknown calibration method: {method}")
+        self.method = method
+        self.temperature = temperature
+        self.curves = curves or []
+        self.samples = samples
+    
+    def apply(self, probs: np.ndarray) -> np.ndarray:
+        """Return the calibrated (N, num_labels) probability matrix."""
+        if self.method == "temperature":
+            # softmax(log(p) / T) equals softmax(logits / T)
+            scaled = np.log(np.clip(probs, 1e-12, 1.0)) / self.temperature
+            exp = np.exp(scaled - scaled.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        
+        calibrated = np.column_stack([
+            np.interp(probs[:, k], curve["x"], curve["y"])
+            for k, curve in enumerate(self.curves)
+        ])
+        totals = calibrated.sum(axis=1, keepdims=True)
+        # Rows every curve maps to 0 keep their uncalibrated probabilities
+        return np.where(totals > 0, calibrated / np.where(totals > 0, totals, 1.0), probs)
+    
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, as stored in calibration.json."""
+        data = {"method": self.method, "samples": self.samples}
+        if self.method == "temperature":
+            data["temperature"] = self.temperature
+        else:
+            data["curves"] = self.curves
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Calibration":
+        """Rebuild a calibration from to_dict() output."""
+        return cls(
+            data["method"],
+            temperature=float(data.get("temperature", 1.0)),
+            curves=data.get("curves"),
+            samples=int(data.get("samples", 0)),
+        )
+
+
+def load_calibration(model_path: str) -> Optional[Calibration]:
+    """Load the calibration saved with the model in model_path, or None if there is none (or it is invalid)."""
+    path = os.path.join(model_path, CALIBRATION_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            calibration = Calibration.from_dict(json.load(f))
+    except Exception as e:
+        logger.warning(f"Ignoring invalid calibration file {path}: {e}")
+        return None
+    logger.info(f"Loaded {calibration.method} calibration from {path}")
+    return calibration
+
+
+def negative_log_likelihood(probs: np.ndarray, labels: np.ndarray) -> float:
+    """Mean negative log probability of the true labels."""
+    return float(-np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-12, 1.0)).mean())
+
+
+def expected_calibration_error(probs: np.ndarray, labels: np.ndarray, bins: int = 10) -> float:
+    """Gap between confidence and accuracy in equal-width confidence bins, weighted by bin size."""
+    confidences = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    bin_index = np.minimum((confidences * bins).astype(int), bins - 1)
+    confidence_sums = np.bincount(bin_index, weights=confidences, minlength=bins)
+    correct_sums = np.bincount(bin_index, weights=correct, minlength=bins)
+    return float(np.abs(confidence_sums - correct_sums).sum() / max(len(labels), 1))
+
+
+def fit_temperature(probs: np.ndarray, labels: np.ndarray) -> Calibration:
+    """Fit the temperature that minimizes the negative log likelihood of labels."""
+    def nll(temperature: float) -> float:
+        return negative_log_likelihood(Calibration("temperature", temperature).apply(probs), labels)
+    
+    # Coarse log-spaced search, then a finer one around the best temperature
+    candidates = np.exp(np.linspace(np.log(0.05), np.log(20.0), 61))
+    best = min(candidates, key=nll)
+    candidates = np.exp(np.linspace(np.log(best) - 0.1, np.log(best) + 0.1, 41))
+    best = min(candidates, key=nll)
+    return Calibration("temperature", temperature=float(best), samples=len(labels))
+
+
+def fit_isotonic(probs: np.ndarray, labels: np.ndarray) -> Calibration:
+    """Fit one-vs-rest isotonic curves from each class probability to that class's observed frequency."""
+    from sklearn.isotonic import IsotonicRegression
+    
+    curves = []
+    for k in range(probs.shape[1]):
+        regression = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip")
+        regression.fit(probs[:, k], (labels == k).astype(np.float64))
+        curves.append({
+            "x": regression.X_thresholds_.tolist(),
+            "y": regression.y_thresholds_.tolist(),
+        })
+    return Calibration("isotonic", curves=curves, samples=len(labels))
+
+
+def calibrate_model(
+    model_path: str,
+    data_path: Optional[str] = None,
+    method: str = "temperature",
+    test_split: float = 0.2,
+    max_samples: int = 2000,
+) -> Dict:
+    """
+    Fit a calibration for the model in model_path and save it beside the model.
+    
+    The model's uncalibrated probabilities on the validation split saved with
+    it are fitted with method; NLL and ECE are measured on the test split,
+    which the calibration never sees (see app.ml.quantize.load_held_out_split;
+    data_path rebuilds both for older models). The result is written to
+    <model>/calibration.json, where RiskClassifier picks it up. Any previous
+    calibration is replaced.
+    
+    Returns:
+        The saved calibration dict, with test NLL and ECE before and after
+    """
+    from app.ml.infer import RiskClassifier
+    from app.ml.quantize import load_held_out_split
+    from app.ml.train import RiskClassificationTrainer
+    
+    classifier = RiskClassifier(model_path)
+    if not classifier.classifier:
+        raise ValueError(f"No model could be loaded from {model_path}")
+    
+    trainer = RiskClassificationTrainer(model_name=model_path, output_dir=model_path)
+    column = {label: k for k, label in enumerate(classifier.risk_labels.tolist())}
+    
+    def probabilities(name: str) -> Tuple[np.ndarray, np.ndarray]:
+        split_df = load_held_out_split(trainer, name, data_path, test_split=test_split, max_samples=max_samples)
+        return classifier.engine.predict_proba(split_df["clause_text"].tolist()), split_df["label"].map(column).to_numpy()
+    
+    fit_probs, fit_labels = probabilities("validation")
+    calibration = fit_temperature(fit_probs, fit_labels) if method == "temperature" else fit_isotonic(fit_probs, fit_labels)
+    
+    probs, labels = probabilities("test")
+    calibrated = calibration.apply(probs)
+    data = calibration.to_dict()
+    data["metrics"] = {
+        "samples": len(labels),
+        "nll": {"before": negative_log_likelihood(probs, labels), "after": negative_log_likelihood(calibrated, labels)},
+        "ece": {"before": expected_calibration_error(probs, labels), "after": expected_calibration_error(calibrated, labels)},
+    }
+    
+    with open(os.path.join(model_path, CALIBRATION_FILE), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    logger.info(
+        f"Saved {method} calibration fitted on {len(fit_labels)} clauses: "
+        f"test ECE {data['metrics']['ece']['before']:.4f} -> {data['metrics']['ece']['after']:.4f}"
+    )
+    return data
+
+
+def main():
+    """Calibration command."""
+    import argparse
+    from app.core.config import settings
+    
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Fit a probability calibration for the risk classifier")
+    parser.add_argument("--model", type=str, default=settings.model_path, help="Trained model directory")
+    parser.add_argument("--data", type=str, default=None, help="Training CSV, to rebuild the held-out splits of older models")
+    parser.add_argument("--method", choices=METHODS, default="temperature", help="Calibration method")
+    parser.add_argument("--test-split", type=float, default=0.2, help="Test split ratio the model was trained with")
+    parser.add_argument("--max-samples", type=int, default=2000, help="Clauses per split at most")
+    
+    args = parser.parse_args()
+    try:
+        calibrate_model(args.model, args.data, args.method, args.test_split, args.max_samples)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Batched inference engine for the risk classifier."""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def plan_batches(lengths: List[int], max_batch_size: int, max_batch_tokens: int) -> List[List[int]]:
+    """
+    Group item indices into length-bucketed batches.
+    
+    Items are sorted by token length so each batch holds similarly sized
+    clauses and is padded only to its own longest item. A batch is closed
+    when it reaches max_batch_size items or when padding it to its longest
+    item would exceed max_batch_tokens.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current = []
+    current_max = 0
+    
+    for idx in order:
+        item_len = lengths[idx]
+        longest = max(current_max, item_len)
+        if current and (len(current) >= max_batch_size or longest * (len(current) + 1) > max_batch_tokens):
+            batches.append(current)
+            current = []
+            longest = item_len
+        current.append(idx)
+        current_max = longest
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax of a (batch, num_labels) logit matrix."""
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def aggregate_windows(
+    window_logits: np.ndarray,
+    text_index: np.ndarray,
+    num_texts: int,
+    method: str = "max_risk",
+    risk_weights: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Combine per-window logits into one probability row per text.
+    
+    text_index maps each window to its text. "mean" averages a text's window
+    logits; "max_risk" keeps the window with the highest expected risk,
+    i.e. its probabilities weighted by risk_weights (default: the label
+    index, for labels ordered from least to most risky).
+    
+    Returns:
+        Array of shape (num_texts, num_labels)
+    """
+    window_probs = softmax(window_logits)
+    if len(window_logits) == num_texts:
+        # One window per text, in text order
+        return window_probs
+    
+    if method == "mean":
+        sums = np.zeros((num_texts, window_logits.shape[1]), dtype=np.float64)
+        np.add.at(sums, text_index, window_logits)
+        counts = np.bincount(text_index, minlength=num_texts)
+        return softmax(sums / counts[:, None]).astype(np.float32)
+    
+    if risk_weights is None:
+        risk_weights = np.arange(window_logits.shape[1], dtype=np.float32)
+    risk = window_probs @ risk_weights
+    # Sort windows by text, then by risk; each text's last window is its riskiest
+    order = np.lexsort((risk, text_index))
+    sorted_texts = text_index[order]
+    riskiest = order[np.append(sorted_texts[1:] != sorted_texts[:-1], True)]
+    probs = np.empty((num_texts, window_logits.shape[1]), dtype=np.float32)
+    probs[text_index[riskiest]] = window_probs[riskiest]
+    return probs
+
+
+class TokenCache:
+    """
+    Bounded LRU of tokenized texts.
+    
+    Entries are keyed on a hash of the text and hold the token ids of each
+    of its windows as int32 arrays, so a clause scored again (a retried
+    request, a re-analysis, the same clause in another variant of a
+    document) is not tokenized again.
+    """
+    
+    def __init__(self, max_entries: int = 50000):
+        """Initialize the cache; max_entries of 0 disables it."""
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, Tuple[np.ndarray, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(text: str) -> bytes:
+        """Hash text to its cache key."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    
+    def get(self, key: bytes) -> Optional[Tuple[np.ndarray, ...]]:
+        """Return the windows cached for key, or None on a miss."""
+        with self._lock:
+            windows = self._entries.get(key)
+            if windows is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return windows
+    
+    def set(self, key: bytes, windows: Tuple[np.ndarray, ...]) -> None:
+        """Cache the windows of a text."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = windows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every cached text."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class BatchInferenceEngine:
+    """
+    Run sequence classification over many texts in padded batches.
+    
+    The forward pass is delegated to an inference backend (see
+    app.ml.backends), so batching and post-processing are the same for
+    every backend. Texts longer than max_length tokens are split into
+    overlapping windows that are batched with everything else, and their
+    window results are aggregated back to one row per text.
+    """
+    
+    def __init__(
+        self,
+        backend,
+        tokenizer,
+        num_labels: int,
+        max_batch_size: int = 16,
+        max_batch_tokens: int = 8192,
+        max_length: int = 512,
+        window_stride: int = 128,
+        window_aggregation: str = "max_risk",
+        risk_weights: np.ndarray | None = None,
+        token_cache_size: int = 50000,
+    ):
+        """
+        Initialize the engine.
+        
+        window_stride is the number of tokens consecutive windows share;
+        window_aggregation ("max_risk" or "mean") and risk_weights are
+        passed to aggregate_windows. token_cache_size bounds the cache of
+        tokenized texts (0 disables it).
+        """
+        self.backend = backend
+        self.tokenizer = tokenizer
+        self.num_labels = num_labels
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max(max_length, max_batch_tokens)
+        self.max_length = max_length
+        # The tokenizer needs room for new tokens in every window
+        self.window_stride = max(0, min(window_stride, max_length // 2))
+        self.window_aggregation = window_aggregation
+        self.risk_weights = risk_weights
+        self.token_cache = TokenCache(token_cache_size)
+    
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        Return class probabilities for each text.
+        
+        Returns:
+            Array of shape (len(texts), num_labels), in input order
+        """
+        if not texts:
+            return np.zeros((0, self.num_labels), dtype=np.float32)
+        
+        input_ids, text_index = self._tokenize(texts)
+        lengths = [len(ids) for ids in input_ids]
+        
+        batches = plan_batches(lengths, self.max_batch_size, self.max_batch_tokens)
+        logger.debug(f"Running {len(texts)} texts ({len(input_ids)} windows) in {len(batches)} batches")
+        
+        logits = np.zeros((len(input_ids), self.num_labels), dtype=np.float32)
+        for batch in batches:
+            ids, mask = self._pad_batch([input_ids[i] for i in batch])
+            logits[batch] = self.backend.logits(ids, mask)
+        
+        return aggregate_windows(logits, text_index, len(texts), self.window_aggregation, self.risk_weights)
+    
+    def _tokenize(self, texts: List[str]):
+        """
+        Return the token ids of every window of texts and the index of each window's text.
+        
+        Texts in the token cache are not tokenized again; the others are
+        tokenized together in one call.
+        """
+        keys = [TokenCache.make_key(text) for text in texts]
+        text_windows = [self.token_cache.get(key) for key in keys]
+        missing = [i for i, windows in enumerate(text_windows) if windows is None]
+        if missing:
+            encoded = self._encode([texts[i] for i in missing])
+            for i, windows in zip(missing, encoded):
+                text_windows[i] = windows
+                self.token_cache.set(keys[i], windows)
+        
+        input_ids = [window for windows in text_windows for window in windows]
+        text_index = np.repeat(np.arange(len(texts)), [len(windows) for windows in text_windows])
+        return input_ids, text_index
+    
+    def _encode(self, texts: List[str]) -> List[Tuple[np.ndarray, ...]]:
+        """
+        Tokenize texts without padding; batches are padded individually.
+        
+        Returns the windows of each text as int32 token id arrays. Fast (Rust)
+        tokenizers cut long texts into overlapping windows in the same batched
+        call; other tokenizers truncate them to max_length.
+        """
+        if not getattr(self.tokenizer, "is_fast", False):
+            encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length, padding=False)
+            return [(np.array(ids, dtype=np.int32),) for ids in encodings["input_ids"]]
+        
+        encodings = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            stride=self.window_stride,
+            return_overflowing_tokens=True,
+            padding=False,
+        )
+        text_windows = [[] for _ in texts]
+        for ids, text in zip(encodings["input_ids"], encodings["overflow_to_sample_mapping"]):
+            text_windows[text].append(np.array(ids, dtype=np.int32))
+        return [tuple(windows) for windows in text_windows]
+    
+    def _pad_batch(self, sequences: List[np.ndarray]):
+        """Right-pad token id sequences to the longest one in the batch."""
+        longest = max(len(seq) for seq in sequences)
+        pad_id = self.tokenizer.pad_token_id or 0
+        ids = np.full((len(sequences), longest), pad_id, dtype=np.int64)
+        mask = np.zeros((len(sequences), longest), dtype=np.int64)
+        for row, seq in enumerate(sequences):
+            ids[row, :len(seq)] = seq
+            mask[row, :len(seq)] = 1
+        return ids, mask
@@ -0,0 +1,92 @@
+"""Export the risk classifier to ONNX for the onnx inference backend."""
+import inspect
+import logging
+import os
+import numpy as np
+from app.core.config import settings
+from app.ml.backends import OnnxBackend, onnx_model_path
+
+logger = logging.getLogger(__name__)
+
+# Tokenized to trace the graph and to check the export against PyTorch
+SAMPLE_CLAUSES = [
+    "Either party may terminate this Agreement upon thirty days prior written notice.",
+    "The Customer shall indemnify and hold harmless the Supplier from any and all claims without limitation.",
+]
+
+
+def export_onnx(model_path: str, output_path: str | None = None, optimize: bool = False, opset: int = 14) -> str:
+    """
+    Export the model in model_path to an ONNX graph and return the graph's path.
+    
+    The graph takes input_ids and attention_mask, with dynamic batch and
+    sequence axes, and returns logits. With optimize, ONNX Runtime's
+    transformer optimizer also fuses layer norm, GELU and attention
+    subgraphs. The exported graph is checked against the PyTorch model.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    
+    output_path = output_path or onnx_model_path(model_path)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    sample = tokenizer(SAMPLE_CLAUSES, padding=True, return_tensors="pt")
+    
+    # Newer PyTorch defaults to the dynamo exporter, which needs onnxscript; the
+    # TorchScript exporter handles these models and is available in every version
+    exporter_options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    dynamic_axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        output_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={"input_ids": dynamic_axes, "attention_mask": dynamic_axes, "logits": {0: "batch"}},
+        opset_version=opset,
+        **exporter_options,
+    )
+    
+    if optimize:
+        from onnxruntime.transformers import optimizer
+        
+        # num_heads and hidden_size of 0 are read from the graph
+        optimized = optimizer.optimize_model(output_path, model_type="bert", num_heads=0, hidden_size=0)
+        optimized.save_model_to_file(output_path)
+        logger.info(f"Fused operators: {optimized.get_fused_operator_statistics()}")
+    
+    # Check the graph reproduces the PyTorch logits
+    with torch.inference_mode():
+        expected = model(**sample).logits.numpy()
+    actual = OnnxBackend(output_path).logits(
+        sample["input_ids"].numpy().astype(np.int64),
+        sample["attention_mask"].numpy().astype(np.int64),
+    )
+    max_diff = float(np.abs(actual - expected).max())
+    if max_diff > 1e-3:
+        logger.warning(f"ONNX logits differ from PyTorch by up to {max_diff:.2e}")
+    
+    logger.info(f"Exported {model_path} to {output_path} (max logit difference {max_diff:.2e})")
+    return output_path
+
+
+def main():
+    """Export command."""
+    import argparse
+    
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export the risk classifier to ONNX")
+    parser.add_argument("--model", type=str, default=settings.model_path, help="Trained model directory")
+    parser.add_argument("--output", type=str, default=None, help="ONNX file (default: <model>/onnx/model.onnx)")
+    parser.add_argument("--optimize", action="store_true", help="Fuse transformer subgraphs with ONNX Runtime's optimizer")
+    parser.add_argument("--opset", type=int, default=14, help="ONNX opset version")
+    
+    args = parser.parse_args()
+    output_path = export_onnx(args.model, args.output, optimize=args.optimize, opset=args.opset)
+    if os.path.abspath(output_path) != os.path.abspath(onnx_model_path(args.model)):
+        logger.info(f"The onnx backend loads {onnx_model_path(args.model)}; move the file there to use it")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,122 @@
 """ML inference wrapper for clause risk analysis."""
+import hashlib
 import logging
+import re
 from typing import List, Dict
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+import numpy as np
+from transformers import AutoConfig, AutoTokenizer
 import os
 from app.core.config import settings
+from app.ml.backends import load_backend
+from app.ml.calibration import load_calibration, score_probabilities
+from app.ml.engine import BatchInferenceEngine
 
 logger = logging.getLogger(__name__)
 
 
+def preprocess_clause(text: str) -> str:
+    """Preprocess clause text for inference (same as training)."""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'([.,;:!?])\1+', r'\1', text)
+    text = re.sub(r'["""]', '"', text)
+    text = re.sub(r"[''']", "'", text)
+    text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+    return text.strip()
+
+
 class RiskClassifier:
     """Risk classifier for contract clauses."""
     
-    def __init__(self, model_path: str | None = None):
-        """Initialize the classifier."""
+    def __init__(self, model_path: str | None = None, backend: str | None = None):
+        """
+        Initialize the classifier.
+        
+        backend selects the inference backend, "torch", "onnx" or "onnx-int8"
+        (default: settings.inference_backend); all give the same result dicts.
+        """
         self.model_path = model_path or settings.model_path
-        self.device = "cuda" if settings.use_gpu and torch.cuda.is_available() else "cpu"
-        self.classifier = None
+        self.backend_name = backend or settings.inference_backend
+        self.classifier = None  # The loaded inference backend, None when no model is available
         self.tokenizer = None
-        self.model = None
+        self.config = None
+        self.engine = None
+        self.risk_labels = None  # Risk label of each model output
+        self.calibration = None  # Fitted calibration from <model>/calibration.json, if any
+        self.fingerprint = None
         self.label_map = {"LABEL_0": "LOW", "LABEL_1": "MEDIUM", "LABEL_2": "HIGH"}
         self._load_model()
     
     def _load_model(self):
-        """Load the trained model."""
+        """Load the tokenizer, model config and inference backend."""
         if not os.path.exists(self.model_path):
             logger.warning(f"Model not found at {self.model_path}. Using fallback.")
             return
         
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                self.model_path
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_path, use_fast=True)
+            if not self.tokenizer.is_fast:
+                logger.warning(f"No fast tokenizer for {self.model_path}; long clauses will be truncated")
+            self.config = AutoConfig.from_pretrained(self.model_path)
+            self.risk_labels = np.array([
+                self.label_map.get(self.config.id2label[i], "MEDIUM")
+                for i in range(self.config.num_labels)
+            ])
+            self.calibration = load_calibration(self.model_path)
+            backend = load_backend(self.model_path, self.backend_name)
+            self.engine = BatchInferenceEngine(
+                backend,
+                self.tokenizer,
+                num_labels=self.config.num_labels,
+                max_batch_size=settings.inference_batch_size,
+                max_batch_tokens=settings.inference_max_batch_tokens,
+                max_length=min(512, getattr(self.config, "max_position_embeddings", 512)),
+                window_stride=settings.inference_window_stride,
+                window_aggregation=settings.inference_window_aggregation,
+                risk_weights=self._risk_weights(),
+                token_cache_size=settings.inference_token_cache_size,
             )
-            self.model.to(self.device)
-            self.model.eval()
-            self.classifier = pipeline(
-                "text-classification",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device == "cuda" else -1,
+            self.classifier = backend
+            self.fingerprint = self._compute_fingerprint()
+            logger.info(
+                f"Model loaded from {self.model_path} with the {backend.name} backend "
+                f"(fingerprint {self.fingerprint})"
             )
-            logger.info(f"Model loaded from {self.model_path}")
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             self.classifier = None
     
+    def _risk_weights(self) -> np.ndarray:
+        """Severity of each model output (LOW 0, MEDIUM 1, HIGH 2), for picking the riskiest window of a long clause."""
+        severity = {"LOW": 0.0, "MEDIUM": 1.0, "HIGH": 2.0}
+        return np.array([severity[label] for label in self.risk_labels], dtype=np.float32)
+    
+    def _compute_fingerprint(self) -> str:
+        """
+        Identify the loaded model by its backend, its long-clause windowing
+        and the names, sizes and mtimes of its files.
+        """
+        digest = hashlib.sha256(
+            f"{self.classifier.name};{self.engine.window_stride};{self.engine.window_aggregation};".encode("utf-8")
+        )
+        for root, _, files in sorted(os.walk(self.model_path)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                rel_path = os.path.relpath(os.path.join(root, name), self.model_path)
+                digest.update(f"{rel_path}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+        return digest.hexdigest()[:16]
+    
     def analyze_clauses(self, clauses: List[str]) -> List[Dict]:
         """
         Analyze clauses and return risk assessments with improved real-world handling.
         
+        Clauses are scored in length-bucketed batches by the inference engine.
+        Clauses longer than the model's 512-token limit are scored on their
+        full text in overlapping windows (see BatchInferenceEngine). Clauses
+        already scored by this model (in any document) are served from the
+        clause memo and never reach the model.
+        
         Returns:
             List of dicts with keys: clause_text, clause_index, risk_label,
             risk_score, explanation, suggested_mitigation
@@ -58,94 +125,81 @@ class RiskClassifier:
             logger.warning("ML model not available, using rule-based fallback")
             return self._rule_based_analysis(clauses)
         
-        import re
-        
-        # Preprocess clauses (same as training)
-        def preprocess_clause(text: str) -> str:
-            """Preprocess clause text for inference."""
-            if not isinstance(text, str):
-                return ""
-            text = re.sub(r'\s+', ' ', text)
-            text = re.sub(r'([.,;:!?])\1+', r'\1', text)
-            text = re.sub(r'["""]', '"', text)
-            text = re.sub(r'[''']', "'", text)
-            text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-            return text.strip()
+        from app.services.cache import clause_cache
+        fingerprint = f"ml-{self.fingerprint}"
         
-        results = []
+        results: List[Dict | None] = [None] * len(clauses)
+        # Unique model inputs that missed the memo, and the clause indices for each
+        pending: Dict[str, List[int]] = {}
         for idx, clause in enumerate(clauses):
+            # Preprocess clause
+            processed_clause = preprocess_clause(clause)
+            
+            # Skip if too short
+            if len(processed_clause) < 10:
+                logger.warning(f"Clause {idx} too short, using rule-based")
+                results[idx] = self._rule_based_clause(clause, idx)
+                continue
+            
+            if processed_clause in pending:
+                pending[processed_clause].append(idx)
+                continue
+            
+            cached = clause_cache.get(clause_cache.make_key(fingerprint, processed_clause), clause, idx)
+            if cached is not None:
+                results[idx] = cached
+            else:
+                pending[processed_clause] = [idx]
+        
+        if pending:
+            model_inputs = list(pending.keys())
+            logger.info(f"Scoring {len(model_inputs)} of {len(clauses)} clauses with the model")
             try:
-                # Preprocess clause
-                processed_clause = preprocess_clause(clause)
-                
-                # Skip if too short
-                if len(processed_clause) < 10:
-                    logger.warning(f"Clause {idx} too short, using rule-based")
-                    rule_result = self._rule_based_analysis([clause])[0]
-                    rule_result["clause_index"] = idx
-                    results.append(rule_result)
-                    continue
-                
-                # Truncate if too long (model max is 512 tokens)
-                if len(processed_clause) > 2000:
-                    processed_clause = processed_clause[:2000] + "..."
-                
-                prediction = self.classifier(processed_clause, return_all_scores=True)[0]
-                
-                # Get highest probability label
-                best_pred = max(prediction, key=lambda x: x['score'])
-                label_str = best_pred['label']
-                score = best_pred['score']
-                
-                # Map to risk label
-                risk_label = self.label_map.get(label_str, "MEDIUM")
-                
-                # Improved risk score calculation based on confidence
-                # Use all scores for better calibration
-                all_scores = {self.label_map.get(p['label'], "MEDIUM"): p['score'] for p in prediction}
-                
-                # Calculate risk score with confidence weighting
-                if risk_label == "HIGH":
-                    # High risk: 70-100 based on confidence
-                    risk_score = 70 + (score * 30)
-                elif risk_label == "MEDIUM":
-                    # Medium risk: 30-70 based on confidence
-                    risk_score = 30 + (score * 40)
-                else:
-                    # Low risk: 0-30 based on confidence
-                    risk_score = score * 30
-                
-                # Adjust based on other class probabilities (uncertainty)
-                if risk_label == "HIGH" and all_scores.get("MEDIUM", 0) > 0.3:
-                    # If medium is also high, reduce confidence
-                    risk_score = risk_score * 0.9
-                elif risk_label == "MEDIUM" and all_scores.get("HIGH", 0) > 0.25:
-                    # If high is also significant, increase risk
-                    risk_score = min(100, risk_score + 10)
-                
-                # Ensure score is in 0-100 range
-                risk_score = min(100, max(0, risk_score))
-                
-                explanation = self._generate_explanation(clause, risk_label, score)
-                mitigation = self._generate_mitigation(clause, risk_label)
-                
-                results.append({
-                    "clause_text": clause,  # Keep original clause text
-                    "clause_index": idx,
-                    "risk_label": risk_label,
-                    "risk_score": round(risk_score, 2),
-                    "explanation": explanation,
-                    "suggested_mitigation": mitigation,
-                })
+                probs = self.engine.predict_proba(model_inputs)
             except Exception as e:
-                logger.error(f"Error analyzing clause {idx}: {e}", exc_info=True)
-                # Fallback to rule-based for this clause
-                rule_result = self._rule_based_analysis([clause])[0]
-                rule_result["clause_index"] = idx
-                results.append(rule_result)
+                logger.error(f"Error running batched inference: {e}", exc_info=True)
+                probs = None
+            
+            if probs is None:
+                for indices in pending.values():
+                    for idx in indices:
+                        results[idx] = self._rule_based_clause(clauses[idx], idx)
+            else:
+                labels, confidences, risk_scores = self._score_probabilities(probs)
+                for row, (processed_clause, indices) in enumerate(pending.items()):
+                    risk_label = str(labels[row])
+                    for idx in indices:
+                        clause = clauses[idx]
+                        results[idx] = {
+                            "clause_text": clause,  # Keep original clause text
+                            "clause_index": idx,
+                            "risk_label": risk_label,
+                            "risk_score": round(float(risk_scores[row]), 2),
+                            "explanation": self._generate_explanation(clause, risk_label, float(confidences[row])),
+                            "suggested_mitigation": self._generate_mitigation(clause, risk_label),
+                        }
+                    clause_cache.set(clause_cache.make_key(fingerprint, processed_clause), results[indices[0]])
         
         return results
     
+    def _score_probabilities(self, probs: np.ndarray):
+        """
+        Map an (N, num_labels) probability matrix to risk labels and scores,
+        after the model's calibration if it has one.
+        
+        Returns:
+            Tuple of (label array, confidence array, risk score array)
+        """
+        if self.calibration is not None:
+            probs = self.calibration.apply(probs)
+        return score_probabilities(probs, self.risk_labels)
+    
+    def _rule_based_clause(self, clause: str, idx: int) -> Dict:
+        """Rule-based fallback for a single clause."""
+        rule_result = self._rule_based_analysis([clause])[0]
+        rule_result["clause_index"] = idx
+        return rule_result
+    
     def _rule_based_analysis(self, clauses: List[str]) -> List[Dict]:
         """Rule-based fallback analysis."""
         from app.services.analysis import RuleBasedAnalyzer
@@ -0,0 +1,172 @@
+"""Quantize the risk classifier to int8 and publish it if it stays accurate enough."""
+import json
+import logging
+import os
+import sys
+from typing import Dict, Optional
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from app.core.config import settings
+from app.ml.backends import OnnxBackend, TorchBackend, onnx_model_path, quantized_model_path
+from app.ml.engine import BatchInferenceEngine
+
+logger = logging.getLogger(__name__)
+
+
+class QuantizationRejected(Exception):
+    """Raised when the int8 model loses more macro F1 than allowed."""
+
+
+def quantize_onnx(model_file: str, output_file: str) -> str:
+    """Write a dynamic int8 copy of an ONNX graph: int8 weights, activations quantized at run time."""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    # Shape inference cannot type every tensor of a graph fused by the
+    # transformer optimizer; those tensors are float32
+    quantize_dynamic(
+        model_file,
+        output_file,
+        weight_type=QuantType.QInt8,
+        extra_options={"DefaultTensorType": onnx.TensorProto.FLOAT},
+    )
+    return output_file
+
+
+def load_held_out_split(
+    trainer,
+    name: str = "test",
+    data_path: Optional[str] = None,
+    test_split: float = 0.2,
+    max_samples: int = 2000,
+) -> pd.DataFrame:
+    """
+    Load the held-out "validation" or "test" clauses of the trainer's model.
+    
+    These are the rows python -m app.ml.train saved with the model, none of
+    which it trained on (see RiskClassificationTrainer.load_split; data_path
+    rebuilds them for older models). At most max_samples clauses are kept, in
+    the same label proportions.
+    """
+    split_df = trainer.load_split(name, data_path=data_path, test_split=test_split)
+    if max_samples and len(split_df) > max_samples:
+        split_df, _ = train_test_split(split_df, train_size=max_samples, stratify=split_df["label"], random_state=42)
+    return split_df.reset_index(drop=True)
+
+
+def quantize_model(
+    model_path: str,
+    data_path: Optional[str] = None,
+    max_f1_drop: float = 0.01,
+    test_split: float = 0.2,
+    max_samples: int = 2000,
+) -> Dict:
+    """
+    Quantize the model in model_path to int8 and publish it for the onnx-int8 backend.
+    
+    The exported ONNX graph (exported first if missing) is quantized to a
+    candidate file. The full-precision PyTorch model and the candidate are
+    scored with RiskClassificationTrainer.evaluate on the test split saved
+    with the model at training time (or rebuilt from data_path, the training
+    CSV, for models trained before splits were saved). If the candidate's macro F1 is more
+    than max_f1_drop below the full-precision model's, the candidate is
+    deleted and QuantizationRejected is raised; otherwise it is published to
+    <model>/onnx/model.int8.onnx with a JSON report beside it.
+    
+    Returns:
+        The report dict (metrics of both models, sizes, sample count)
+    """
+    from app.ml.export_onnx import export_onnx
+    from app.ml.train import RiskClassificationTrainer
+    
+    model_file = onnx_model_path(model_path)
+    if not os.path.exists(model_file):
+        logger.info(f"No ONNX graph at {model_file}; exporting one")
+        export_onnx(model_path, optimize=True)
+    
+    output_file = quantized_model_path(model_path)
+    candidate_file = output_file + ".candidate"
+    quantize_onnx(model_file, candidate_file)
+    
+    try:
+        trainer = RiskClassificationTrainer(model_name=model_path, output_dir=model_path)
+        test_df = load_held_out_split(trainer, "test", data_path, test_split=test_split, max_samples=max_samples)
+        test_dataset = trainer.prepare_dataset(test_df)
+        logger.info(f"Evaluating on {len(test_dataset)} held-out clauses")
+        
+        backends = {
+            "fp32": TorchBackend(model_path),
+            "int8": OnnxBackend(candidate_file, name="onnx-int8"),
+        }
+        metrics = {}
+        for variant, backend in backends.items():
+            engine = BatchInferenceEngine(
+                backend,
+                trainer.tokenizer,
+                num_labels=trainer.num_labels,
+                max_batch_size=settings.inference_batch_size,
+                max_batch_tokens=settings.inference_max_batch_tokens,
+            )
+            result = trainer.evaluate(test_dataset, predict_proba=engine.predict_proba)
+            metrics[variant] = {key: float(result[key]) for key in ("accuracy", "precision", "recall", "f1", "f1_macro")}
+        
+        f1_drop = metrics["fp32"]["f1_macro"] - metrics["int8"]["f1_macro"]
+        report = {
+            "model_path": model_path,
+            "source_graph": model_file,
+            "samples": len(test_dataset),
+            "max_f1_drop": max_f1_drop,
+            "f1_macro_drop": f1_drop,
+            "metrics": metrics,
+            "size_mb": {
+                "fp32": os.path.getsize(model_file) / 1e6,
+                "int8": os.path.getsize(candidate_file) / 1e6,
+            },
+        }
+        if f1_drop > max_f1_drop:
+            raise QuantizationRejected(
+                f"Macro F1 drops from {metrics['fp32']['f1_macro']:.4f} to {metrics['int8']['f1_macro']:.4f} "
+                f"({f1_drop:.4f} > {max_f1_drop:.4f}); the int8 model was not published"
+            )
+    except BaseException:
+        os.remove(candidate_file)
+        raise
+    
+    os.replace(candidate_file, output_file)
+    with open(os.path.splitext(output_file)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(
+        f"Published {output_file} ({report['size_mb']['int8']:.1f} MB, was {report['size_mb']['fp32']:.1f} MB); "
+        f"macro F1 {metrics['fp32']['f1_macro']:.4f} -> {metrics['int8']['f1_macro']:.4f}"
+    )
+    return report
+
+
+def main():
+    """Quantization command."""
+    import argparse
+    
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Quantize the risk classifier to int8 behind a macro F1 gate")
+    parser.add_argument("--model", type=str, default=settings.model_path, help="Trained model directory")
+    parser.add_argument("--data", type=str, default=None, help="Training CSV, to rebuild the test split of older models")
+    parser.add_argument("--max-f1-drop", type=float, default=0.01, help="Largest allowed macro F1 loss")
+    parser.add_argument("--test-split", type=float, default=0.2, help="Test split ratio the model was trained with")
+    parser.add_argument("--max-samples", type=int, default=2000, help="Clauses to evaluate at most")
+    
+    args = parser.parse_args()
+    try:
+        quantize_model(
+            args.model,
+            args.data,
+            max_f1_drop=args.max_f1_drop,
+            test_split=args.test_split,
+            max_samples=args.max_samples,
+        )
+    except (QuantizationRejected, ValueError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Process-wide registry of the loaded risk classifier."""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Scored once at warm-up so the first real request does not pay for lazy initialization
+WARMUP_CLAUSES = [
+    "The Supplier shall deliver the goods within thirty days of receiving the order.",
+    "Either party may terminate this Agreement upon thirty days prior written notice.",
+    "The Customer shall indemnify and hold harmless the Supplier from any and all claims without limitation.",
+]
+
+
+def _load_risk_classifier():
+    """Construct a RiskClassifier from settings.model_path (imports torch on first use)."""
+    from app.ml.infer import RiskClassifier
+    return RiskClassifier()
+
+
+class ModelRegistry:
+    """
+    Loads the risk classifier once per process and shares it.
+    
+    Every AnalysisService uses the classifier held here, so the model weights
+    are in memory once however many services are created (e.g. on ML mode
+    changes). The model is loaded on first use, or up front by warm_up().
+    
+    state is one of not_loaded, loading, ready (a model is loaded) or
+    unavailable (ML dependencies or model files missing, or loading failed).
+    """
+    
+    def __init__(self, loader: Callable[[], object] = _load_risk_classifier):
+        """Initialize the registry; loader constructs the classifier."""
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._classifier = None
+        self.state = "not_loaded"
+        self.warmed_up = False
+        self.warming_up = False
+        self.error: Optional[str] = None
+    
+    def get_classifier(self):
+        """Return the shared RiskClassifier with its model loaded, or None if no model can be used."""
+        if self.state in ("ready", "unavailable"):
+            return self._classifier
+        with self._lock:
+            if self.state == "not_loaded":
+                self._load()
+        return self._classifier
+    
+    def _load(self) -> None:
+        """Load the classifier; called with the lock held."""
+        self.state = "loading"
+        start = time.perf_counter()
+        try:
+            classifier = self._loader()
+        except ImportError as e:
+            self._unavailable(f"ML module not available: {e}")
+            return
+        except Exception as e:
+            self._unavailable(f"Failed to load ML model: {e}")
+            return
+        
+        if not classifier.classifier:
+            self._unavailable(f"No model loaded from {classifier.model_path}")
+            return
+        self._classifier = classifier
+        self.state = "ready"
+        logger.info(f"Model {classifier.fingerprint} loaded in {time.perf_counter() - start:.2f}s")
+    
+    def _unavailable(self, error: str) -> None:
+        logger.warning(f"{error}. Falling back to rules.")
+        self.error = error
+        self.state = "unavailable"
+    
+    def warm_up(self) -> bool:
+        """
+        Load the model and score a dummy batch, so the first request runs at full speed.
+        
+        Returns whether a model is ready. The dummy batch goes straight to the
+        inference engine, so it is not added to the clause memo.
+        """
+        classifier = self.get_classifier()
+        if classifier is None:
+            return False
+        if not self.warmed_up:
+            start = time.perf_counter()
+            try:
+                classifier.engine.predict_proba(WARMUP_CLAUSES)
+            except Exception as e:
+                logger.warning(f"Model warm-up failed: {e}")
+                return True
+            self.warmed_up = True
+            logger.info(f"Model warmed up in {time.perf_counter() - start:.2f}s")
+        return True
+    
+    def start_warm_up(self) -> threading.Thread:
+        """
+        Run warm_up() on a background thread, so startup does not wait for the model.
+        
+        warming_up is true until it finishes; requests arriving meanwhile wait
+        for the model load in get_classifier().
+        """
+        self.warming_up = True
+        
+        def run():
+            try:
+                self.warm_up()
+            finally:
+                self.warming_up = False
+        
+        thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    def reset(self) -> None:
+        """Drop the loaded model (or a failed load) so the next use loads it again."""
+        with self._lock:
+            self._classifier = None
+            self.state = "not_loaded"
+            self.warmed_up = False
+            self.error = None
+    
+    def status(self) -> Dict:
+        """Model state for the health endpoint."""
+        classifier = self._classifier
+        return {
+            "state": self.state,
+            "warmed_up": self.warmed_up,
+            "warming_up": self.warming_up,
+            "fingerprint": classifier.fingerprint if classifier else None,
+            "error": self.error,
+        }
+
+
+model_registry = ModelRegistry()
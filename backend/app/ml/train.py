@@ -15,10 +15,48 @@ from datasets import Dataset
 import torch
 import logging
 from pathlib import Path
+from typing import Dict, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Held-out rows saved with the trained model, for evaluation and calibration
+SPLITS_DIR = "data_splits"
+
+
+def split_data(df: pd.DataFrame, test_split: float = 0.2):
+    """
+    Split loaded data the way main() trains on it.
+    
+    Returns:
+        Tuple of (train_df, validation_df, test_df): a stratified test split,
+        then the last 20% of the rest for validation during training
+    """
+    train_df, test_df = train_test_split(
+        df,
+        test_size=test_split,
+        stratify=df["label"],
+        random_state=42,
+    )
+    train_size = int(0.8 * len(train_df))
+    return train_df.iloc[:train_size], train_df.iloc[train_size:], test_df
+
+
+def held_out_splits(train_df: pd.DataFrame, validation_df: pd.DataFrame, test_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Drop clauses the model trained on from the validation and test rows.
+    
+    load_data oversamples with replacement, so one clause can land in several
+    splits; each clause is kept once, in the first split it appears in.
+    """
+    seen = set(train_df["clause_text"])
+    splits = {}
+    for name, split_df in (("validation", validation_df), ("test", test_df)):
+        held_out = split_df[~split_df["clause_text"].isin(seen)].drop_duplicates(subset=["clause_text"])
+        splits[name] = held_out[["clause_text", "label"]].reset_index(drop=True)
+        seen.update(held_out["clause_text"])
+    return splits
+
 
 class RiskClassificationTrainer:
     """Trainer for contract clause risk classification."""
@@ -159,6 +197,30 @@ class RiskClassificationTrainer:
         
         return df
     
+    def save_splits(self, train_df: pd.DataFrame, validation_df: pd.DataFrame, test_df: pd.DataFrame) -> None:
+        """Save the held-out validation and test rows as CSVs under <output_dir>/data_splits."""
+        split_dir = os.path.join(self.output_dir, SPLITS_DIR)
+        os.makedirs(split_dir, exist_ok=True)
+        for name, split_df in held_out_splits(train_df, validation_df, test_df).items():
+            split_df.to_csv(os.path.join(split_dir, f"{name}.csv"), index=False)
+            logger.info(f"Saved {len(split_df)} held-out {name} clauses to {split_dir}")
+    
+    def load_split(self, name: str, data_path: Optional[str] = None, test_split: float = 0.2) -> pd.DataFrame:
+        """
+        Load the held-out "validation" or "test" rows of the model in output_dir.
+        
+        The rows main() saved at training time are used. For a model trained
+        before splits were saved, pass the training CSV as data_path to rebuild
+        them the way main() split it (same loading, test_split and seed).
+        """
+        path = os.path.join(self.output_dir, SPLITS_DIR, f"{name}.csv")
+        if os.path.exists(path):
+            return pd.read_csv(path)
+        if data_path is None:
+            raise ValueError(f"No held-out {name} split at {path}; retrain the model or pass its training CSV")
+        
+        return held_out_splits(*split_data(self.load_data(data_path), test_split))[name]
+    
     def prepare_dataset(self, df: pd.DataFrame):
         """Prepare dataset for training."""
         # Map labels to integers
@@ -259,28 +321,44 @@ class RiskClassificationTrainer:
         
         return train_result
     
-    def evaluate(self, test_dataset):
-        """Evaluate the model."""
-        trainer = Trainer(
-            model=self.model,
-            data_collator=self.data_collator,
-        )
+    def evaluate(self, test_dataset, predict_proba=None):
+        """
+        Evaluate the model.
         
-        predictions = trainer.predict(test_dataset)
-        pred_labels = np.argmax(predictions.predictions, axis=1)
-        true_labels = predictions.label_ids
+        predict_proba, if given, scores the clause texts instead of this
+        trainer's model: it takes a list of texts and returns an (N, num_labels)
+        probability array (e.g. BatchInferenceEngine.predict_proba), so other
+        variants of the model can be measured on the same test set.
+        """
+        if predict_proba is None:
+            trainer = Trainer(
+                model=self.model,
+                data_collator=self.data_collator,
+            )
+            
+            predictions = trainer.predict(test_dataset)
+            pred_labels = np.argmax(predictions.predictions, axis=1)
+            true_labels = predictions.label_ids
+        else:
+            pred_labels = np.argmax(predict_proba(list(test_dataset["clause_text"])), axis=1)
+            true_labels = np.asarray(test_dataset["labels"])
         
         # Calculate metrics
         accuracy = accuracy_score(true_labels, pred_labels)
         precision, recall, f1, _ = precision_recall_fscore_support(
             true_labels, pred_labels, average="weighted", zero_division=0
         )
+        _, _, f1_macro, _ = precision_recall_fscore_support(
+            true_labels, pred_labels, average="macro", zero_division=0
+        )
         
         # Classification report
         report = classification_report(
             true_labels,
             pred_labels,
+            labels=list(range(self.num_labels)),
             target_names=[self.reverse_label_map[i] for i in range(self.num_labels)],
+            zero_division=0,
         )
         
         logger.info(f"\nEvaluation Results:")
@@ -288,6 +366,7 @@ class RiskClassificationTrainer:
         logger.info(f"Precision: {precision:.4f}")
         logger.info(f"Recall: {recall:.4f}")
         logger.info(f"F1-Score: {f1:.4f}")
+        logger.info(f"Macro F1-Score: {f1_macro:.4f}")
         logger.info(f"\nClassification Report:\n{report}")
         
         return {
@@ -295,6 +374,7 @@ class RiskClassificationTrainer:
             "precision": precision,
             "recall": recall,
             "f1": f1,
+            "f1_macro": f1_macro,
             "report": report,
         }
 
@@ -323,22 +403,13 @@ def main():
     # Load data
     df = trainer.load_data(args.data)
     
-    # Split data
-    train_df, test_df = train_test_split(
-        df,
-        test_size=args.test_split,
-        stratify=df["label"],
-        random_state=42,
-    )
+    # Split data into train/eval/test
+    train_df, eval_df, test_df = split_data(df, args.test_split)
     
     # Prepare datasets
-    train_dataset = trainer.prepare_dataset(train_df)
-    test_dataset = trainer.prepare_dataset(test_df)
-    
-    # Split train into train/eval
-    train_size = int(0.8 * len(train_dataset))
-    train_subset = train_dataset.select(range(train_size))
-    eval_subset = train_dataset.select(range(train_size, len(train_dataset)))
+    train_subset = trainer.prepare_dataset(train_df.copy())
+    eval_subset = trainer.prepare_dataset(eval_df.copy())
+    test_dataset = trainer.prepare_dataset(test_df.copy())
     
     # Train
     trainer.train(
@@ -352,6 +423,9 @@ def main():
     # Evaluate on test set
     trainer.evaluate(test_dataset)
     
+    # Keep the held-out rows with the model for quantization and calibration
+    trainer.save_splits(train_df, eval_df, test_df)
+    
     logger.info("Training completed!")
 
 
@@ -1,6 +1,6 @@
 """Database models."""
 # Lazy imports to avoid circular dependency issues
-__all__ = ["Analysis", "Clause"]
+__all__ = ["Analysis", "Clause", "AnalysisJob", "AnalysisJobChunk", "AnalysisBatch", "Upload"]
 
 def __getattr__(name):
     if name == "Analysis":
@@ -9,5 +9,17 @@ def __getattr__(name):
     elif name == "Clause":
         from app.models.analysis import Clause
         return Clause
+    elif name == "AnalysisJob":
+        from app.models.job import AnalysisJob
+        return AnalysisJob
+    elif name == "AnalysisJobChunk":
+        from app.models.job import AnalysisJobChunk
+        return AnalysisJobChunk
+    elif name == "AnalysisBatch":
+        from app.models.job import AnalysisBatch
+        return AnalysisBatch
+    elif name == "Upload":
+        from app.models.upload import Upload
+        return Upload
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -1,5 +1,5 @@
 """Analysis database models."""
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db import Base
@@ -8,6 +8,10 @@ from app.db import Base
 class Analysis(Base):
     """Analysis record model."""
     __tablename__ = "analyses"
+    __table_args__ = (
+        # Keyset pagination of a session's history, newest first
+        Index("ix_analyses_session_created", "session_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, nullable=True, index=True)  # Browser session for user isolation
@@ -21,12 +25,21 @@ class Analysis(Base):
     low_risk_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    clauses = relationship("Clause", back_populates="analysis", cascade="all, delete-orphan")
+    clauses = relationship(
+        "Clause",
+        back_populates="analysis",
+        cascade="all, delete-orphan",
+        order_by="Clause.clause_index",
+    )
 
 
 class Clause(Base):
     """Clause model for storing individual clause analysis."""
     __tablename__ = "clauses"
+    __table_args__ = (
+        # Clauses of an analysis in document order
+        Index("ix_clauses_analysis_clause_index", "analysis_id", "clause_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     analysis_id = Column(Integer, ForeignKey("analyses.id"), nullable=False)
@@ -0,0 +1,46 @@
+"""Background analysis job models."""
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from datetime import datetime
+from app.db import Base
+
+
+class AnalysisJob(Base):
+    """Queued or running document analysis (the table doubles as the job queue)."""
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(String, primary_key=True, index=True)  # UUID
+    session_id = Column(String, nullable=True, index=True)  # Browser session for user isolation
+    batch_id = Column(String, ForeignKey("analysis_batches.id"), nullable=True, index=True)
+    file_id = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    original_filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    stage = Column(String, nullable=False, default="queued")  # queued, extract, classify, persist, done
+    total_clauses = Column(Integer, default=0)
+    processed_clauses = Column(Integer, default=0)
+    analysis_id = Column(Integer, ForeignKey("analyses.id"), nullable=True)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AnalysisBatch(Base):
+    """A group of documents uploaded together; per-document progress lives in analysis_jobs."""
+    __tablename__ = "analysis_batches"
+    
+    id = Column(String, primary_key=True, index=True)  # UUID
+    session_id = Column(String, nullable=True, index=True)  # Browser session for user isolation
+    total_documents = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AnalysisJobChunk(Base):
+    """Clause analyses scored by a running job, one row per chunk so progress writes stay small."""
+    __tablename__ = "analysis_job_chunks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("analysis_jobs.id"), nullable=False, index=True)
+    first_clause = Column(Integer, nullable=False)  # Number of clauses scored before this chunk
+    clause_count = Column(Integer, nullable=False)
+    results = Column(Text, nullable=False)  # JSON list of the chunk's clause analyses
@@ -0,0 +1,20 @@
+"""Upload registry models."""
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.db import Base
+
+
+class Upload(Base):
+    """Stored upload, keyed by file_id so lookups don't scan the uploads directory."""
+    __tablename__ = "uploads"
+    
+    id = Column(String, primary_key=True, index=True)  # file_id (UUID)
+    session_id = Column(String, nullable=True, index=True)  # Browser session for user isolation
+    filename = Column(String, nullable=False)  # Stored name, "{file_id}_{original_filename}"
+    original_filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    content_hash = Column(String, nullable=False, index=True)  # SHA-256 hex digest
+    mime_type = Column(String)
+    extraction_status = Column(String, nullable=False, default="pending")  # pending, extracted, failed
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
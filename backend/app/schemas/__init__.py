@@ -6,6 +6,7 @@ from app.schemas.analysis import (
     AnalysisHistoryItem,
     UploadResponse,
 )
+from app.schemas.job import JobResponse, JobStatus, BatchDocumentStatus, BatchStatus
 
 __all__ = [
     "ClauseAnalysis",
@@ -13,5 +14,9 @@ __all__ = [
     "AnalysisResponse",
     "AnalysisHistoryItem",
     "UploadResponse",
+    "JobResponse",
+    "JobStatus",
+    "BatchDocumentStatus",
+    "BatchStatus",
 ]
 
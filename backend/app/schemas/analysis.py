@@ -53,4 +53,6 @@ class UploadResponse(BaseModel):
     file_id: str
     filename: str
     message: str
+    content_hash: Optional[str] = None  # SHA-256 of the stored content
+    job_id: Optional[str] = None
 
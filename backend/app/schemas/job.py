@@ -0,0 +1,49 @@
+"""Background job schemas."""
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from app.schemas.analysis import ClauseAnalysis
+
+
+class JobResponse(BaseModel):
+    """Job submission response."""
+    job_id: str
+    status: str
+    message: str
+
+
+class JobStatus(BaseModel):
+    """Job progress and results scored so far."""
+    job_id: str
+    status: str
+    stage: str
+    total_clauses: int
+    processed_clauses: int
+    analysis_id: Optional[int] = None
+    error: Optional[str] = None
+    clauses: List[ClauseAnalysis]
+    created_at: datetime
+    updated_at: datetime
+
+
+class BatchDocumentStatus(BaseModel):
+    """Progress of one document in a batch."""
+    job_id: str
+    filename: str
+    status: str
+    stage: str
+    total_clauses: int
+    processed_clauses: int
+    analysis_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchStatus(BaseModel):
+    """Batch progress with per-document status."""
+    batch_id: str
+    status: str
+    total_documents: int
+    completed_documents: int
+    failed_documents: int
+    documents: List[BatchDocumentStatus]
+    created_at: datetime
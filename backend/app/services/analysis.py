@@ -1,23 +1,15 @@
 """Analysis service for document risk assessment."""
+import hashlib
+import inspect
 import logging
-from typing import List, Dict
+import sys
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
 from app.core.config import settings
+from app.ml.registry import model_registry
+from app.services.rules import RuleEngine
 
 logger = logging.getLogger(__name__)
 
-# Lazy import for ML - only import when needed
-RiskClassifier = None
-def _get_risk_classifier():
-    global RiskClassifier
-    if RiskClassifier is None:
-        try:
-            from app.ml.infer import RiskClassifier as RC
-            RiskClassifier = RC
-        except ImportError as e:
-            logger.warning(f"ML module not available: {e}")
-            RiskClassifier = None
-    return RiskClassifier
-
 
 class RuleBasedAnalyzer:
     """Rule-based risk analyzer as fallback."""
@@ -145,165 +137,177 @@ class RuleBasedAnalyzer:
         r'remove.*fixtures',
     ]
     
+    # LOW RISK boilerplate patterns (ALL document types + Rental specific)
+    LOW_RISK_PATTERNS = [
+        # Rental/Lease Agreement LOW RISK patterns
+        r'^rent\s+amount\s+and\s+payment\s+terms',
+        r'tenant\s+shall\s+pay\s+monthly\s+rent',
+        r'pay.*rent.*on\s+or\s+before',
+        r'bank\s+transfer.*landlord',
+        
+        r'maintenance\s+and\s+repairs',
+        r'tenant.*responsible.*routine\s+upkeep',
+        r'landlord.*responsible.*major.*repairs',
+        
+        r'utilities\s+and\s+service\s+charges',
+        r'tenant.*responsible.*payment.*electricity',
+        r'utilities.*unless\s+otherwise\s+stated',
+        
+        r'insurance\s+requirement',
+        r'tenant.*maintain.*renter.*insurance',
+        r'liability\s+coverage',
+        
+        r'guarantor',
+        r'provide\s+a\s+guarantor',
+        
+        r'force\s+majeure',
+        r'events\s+beyond.*reasonable\s+control',
+        r'natural\s+disasters.*government\s+actions',
+        
+        r'confidentiality',
+        r'keep.*terms.*confidential',
+        r'not\s+disclose.*third\s+parties',
+        
+        # General agreements
+        r'^this\s+agreement\s+has\s+been\s+made',
+        r'^this\s+agreement.*between',
+        r'^this\s+agreement\s+is\s+entered\s+into',
+        r'^this\s+agreement\s+has\s+been\s+executed',
+        r'^this\s+contract\s+is\s+entered\s+into',
+        r'^between\s+.*\s+and\s+.*hereinafter',
+        r'^between\s+.*\s+and\s+.*incorporated',
+        r'^between\s+.*\s+and\s+.*registered',
+        # Employment
+        r'^this\s+employment\s+agreement',
+        r'^the\s+employee.*employment.*shall\s+commence',
+        r'^the\s+employee\s+shall\s+be\s+employed',
+        # NDAs
+        r'^this\s+non-disclosure\s+agreement',
+        r'^confidential\s+information.*shall\s+mean',
+        # Service agreements
+        r'^this\s+service\s+agreement',
+        r'^the\s+service\s+provider\s+agrees\s+to\s+provide',
+        # Purchase agreements
+        r'^this\s+purchase\s+agreement',
+        r'^the\s+buyer\s+agrees\s+to\s+purchase',
+        # Lease agreements
+        r'^this\s+lease\s+agreement',
+        r'^the\s+lessor\s+hereby\s+leases',
+        # Licensing
+        r'^this\s+license\s+agreement',
+        r'^the\s+licensor\s+hereby\s+grants.*license',
+        # Software licenses
+        r'^this\s+software\s+license\s+agreement',
+        # Terms/Privacy
+        r'^these\s+terms\s+of\s+service',
+        r'^this\s+privacy\s+policy',
+        # Recitals
+        r'^whereas\s+',
+        r'^and\s+whereas',
+        r'^now\s+therefore',
+        r'^now,\s+therefore',
+        r'^in\s+witness\s+whereof',
+        # Definitions
+        r'^definitions?\s*:',
+        r'^article\s+\d+',
+        r'^section\s+\d+',
+        r'^for\s+purposes\s+of\s+this\s+agreement',
+        # Party identification
+        r'hereinafter\s+referred\s+to\s+as',
+        r'incorporated\s+as\s+a\s+body',
+        r'represented\s+by',
+        # Payment/execution
+        r'^in\s+consideration\s+of\s+the\s+payments',
+        r'^in\s+consideration\s+of\s+the\s+mutual',
+        r'^the\s+.*\s+shall\s+pay\s+the\s+.*\s+such\s+sums',
+        r'^the\s+.*\s+shall\s+pay.*fees\s+as\s+set\s+forth',
+        # Structure
+        r'^this\s+agreement\s+shall\s+commence\s+on',
+        r'^this\s+agreement\s+may\s+be\s+executed\s+in\s+counterparts',
+        r'^the\s+headings\s+in\s+this\s+agreement',
+        r'^this\s+agreement\s+constitutes\s+the\s+entire\s+agreement',
+    ]
+    
+    # Compiled once for all instances
+    RULES = RuleEngine(
+        HIGH_RISK_KEYWORDS,
+        MEDIUM_RISK_KEYWORDS,
+        HIGH_RISK_PATTERNS,
+        MEDIUM_RISK_PATTERNS,
+        LOW_RISK_PATTERNS,
+    )
+    
     def analyze_clauses(self, clauses: List[str]) -> List[Dict]:
         """Analyze clauses using rule-based approach."""
-        import re
+        from app.services.cache import clause_cache
+        fingerprint = f"rules-{_rules_fingerprint()}"
         results = []
         
         for idx, clause in enumerate(clauses):
-            clause_lower = clause.lower()
-            clause_clean = re.sub(r'\s+', ' ', clause_lower).strip()
-            
-            # FIRST: Check for LOW RISK boilerplate patterns (ALL document types + Rental specific)
-            low_risk_patterns = [
-                # Rental/Lease Agreement LOW RISK patterns
-                r'^rent\s+amount\s+and\s+payment\s+terms',
-                r'tenant\s+shall\s+pay\s+monthly\s+rent',
-                r'pay.*rent.*on\s+or\s+before',
-                r'bank\s+transfer.*landlord',
-                
-                r'maintenance\s+and\s+repairs',
-                r'tenant.*responsible.*routine\s+upkeep',
-                r'landlord.*responsible.*major.*repairs',
-                
-                r'utilities\s+and\s+service\s+charges',
-                r'tenant.*responsible.*payment.*electricity',
-                r'utilities.*unless\s+otherwise\s+stated',
-                
-                r'insurance\s+requirement',
-                r'tenant.*maintain.*renter.*insurance',
-                r'liability\s+coverage',
-                
-                r'guarantor',
-                r'provide\s+a\s+guarantor',
-                
-                r'force\s+majeure',
-                r'events\s+beyond.*reasonable\s+control',
-                r'natural\s+disasters.*government\s+actions',
-                
-                r'confidentiality',
-                r'keep.*terms.*confidential',
-                r'not\s+disclose.*third\s+parties',
-                
-                # General agreements
-                r'^this\s+agreement\s+has\s+been\s+made',
-                r'^this\s+agreement.*between',
-                r'^this\s+agreement\s+is\s+entered\s+into',
-                r'^this\s+agreement\s+has\s+been\s+executed',
-                r'^this\s+contract\s+is\s+entered\s+into',
-                r'^between\s+.*\s+and\s+.*hereinafter',
-                r'^between\s+.*\s+and\s+.*incorporated',
-                r'^between\s+.*\s+and\s+.*registered',
-                # Employment
-                r'^this\s+employment\s+agreement',
-                r'^the\s+employee.*employment.*shall\s+commence',
-                r'^the\s+employee\s+shall\s+be\s+employed',
-                # NDAs
-                r'^this\s+non-disclosure\s+agreement',
-                r'^confidential\s+information.*shall\s+mean',
-                # Service agreements
-                r'^this\s+service\s+agreement',
-                r'^the\s+service\s+provider\s+agrees\s+to\s+provide',
-                # Purchase agreements
-                r'^this\s+purchase\s+agreement',
-                r'^the\s+buyer\s+agrees\s+to\s+purchase',
-                # Lease agreements
-                r'^this\s+lease\s+agreement',
-                r'^the\s+lessor\s+hereby\s+leases',
-                # Licensing
-                r'^this\s+license\s+agreement',
-                r'^the\s+licensor\s+hereby\s+grants.*license',
-                # Software licenses
-                r'^this\s+software\s+license\s+agreement',
-                # Terms/Privacy
-                r'^these\s+terms\s+of\s+service',
-                r'^this\s+privacy\s+policy',
-                # Recitals
-                r'^whereas\s+',
-                r'^and\s+whereas',
-                r'^now\s+therefore',
-                r'^now,\s+therefore',
-                r'^in\s+witness\s+whereof',
-                # Definitions
-                r'^definitions?\s*:',
-                r'^article\s+\d+',
-                r'^section\s+\d+',
-                r'^for\s+purposes\s+of\s+this\s+agreement',
-                # Party identification
-                r'hereinafter\s+referred\s+to\s+as',
-                r'incorporated\s+as\s+a\s+body',
-                r'represented\s+by',
-                # Payment/execution
-                r'^in\s+consideration\s+of\s+the\s+payments',
-                r'^in\s+consideration\s+of\s+the\s+mutual',
-                r'^the\s+.*\s+shall\s+pay\s+the\s+.*\s+such\s+sums',
-                r'^the\s+.*\s+shall\s+pay.*fees\s+as\s+set\s+forth',
-                # Structure
-                r'^this\s+agreement\s+shall\s+commence\s+on',
-                r'^this\s+agreement\s+may\s+be\s+executed\s+in\s+counterparts',
-                r'^the\s+headings\s+in\s+this\s+agreement',
-                r'^this\s+agreement\s+constitutes\s+the\s+entire\s+agreement',
-            ]
-            
-            is_boilerplate = False
-            for pattern in low_risk_patterns:
-                if re.search(pattern, clause_clean, re.IGNORECASE):
-                    is_boilerplate = True
-                    break
-            
-            # Count keyword matches
-            high_count = sum(1 for kw in self.HIGH_RISK_KEYWORDS if kw in clause_lower)
-            medium_count = sum(1 for kw in self.MEDIUM_RISK_KEYWORDS if kw in clause_lower)
-            
-            # Check HIGH RISK patterns (rental/lease specific)
-            high_pattern_matches = sum(1 for pattern in self.HIGH_RISK_PATTERNS 
-                                      if re.search(pattern, clause_clean, re.IGNORECASE))
-            
-            # Check MEDIUM RISK patterns (rental/lease specific)
-            medium_pattern_matches = sum(1 for pattern in self.MEDIUM_RISK_PATTERNS 
-                                        if re.search(pattern, clause_clean, re.IGNORECASE))
-            
-            # Combine keyword and pattern matches
-            total_high_indicators = high_count + high_pattern_matches
-            total_medium_indicators = medium_count + medium_pattern_matches
-            
-            # Determine risk label (check boilerplate FIRST, but HIGH patterns override)
-            if is_boilerplate and total_high_indicators == 0 and high_pattern_matches == 0:
-                risk_label = "LOW"
-                risk_score = 5 + min(15, len(clause) // 100)
-            elif total_high_indicators >= 2 or high_pattern_matches >= 1 or (total_high_indicators >= 1 and len(clause) > 200):
-                # HIGH RISK: Multiple high-risk indicators OR any high-risk pattern match
-                risk_label = "HIGH"
-                risk_score = 80 + min(20, (total_high_indicators + high_pattern_matches * 2) * 3)
-            elif total_high_indicators >= 1 or total_medium_indicators >= 3 or medium_pattern_matches >= 2:
-                # MEDIUM RISK: Some high-risk indicators OR multiple medium-risk indicators
-                risk_label = "MEDIUM"
-                risk_score = 45 + min(25, (total_high_indicators + total_medium_indicators) * 4)
-            elif total_medium_indicators >= 1 or medium_pattern_matches >= 1:
-                # MEDIUM RISK: At least one medium-risk indicator
-                risk_label = "MEDIUM"
-                risk_score = 35 + min(15, total_medium_indicators * 5)
-            else:
-                # LOW RISK: No significant risk indicators
-                risk_label = "LOW"
-                risk_score = 10 + min(10, len(clause) // 50)
-            
-            risk_score = min(100, max(0, risk_score))
-            
-            explanation = self._generate_explanation(clause, risk_label, high_count, medium_count)
-            mitigation = self._generate_mitigation(clause, risk_label)
-            
-            results.append({
-                "clause_text": clause,
-                "clause_index": idx,
-                "risk_label": risk_label,
-                "risk_score": round(risk_score, 2),
-                "explanation": explanation,
-                "suggested_mitigation": mitigation,
-            })
+            # Rules read the raw clause (length, case), so memoize on the exact text
+            key = clause_cache.make_key(fingerprint, clause)
+            result = clause_cache.get(key, clause, idx)
+            if result is None:
+                result = self._analyze_clause(clause, idx)
+                clause_cache.set(key, result)
+            results.append(result)
         
         return results
     
+    def _analyze_clause(self, clause: str, idx: int) -> Dict:
+        """Analyze a single clause using rule-based approach."""
+        import re
+        
+        clause_lower = clause.lower()
+        clause_clean = re.sub(r'\s+', ' ', clause_lower).strip()
+        
+        # Evaluate keyword and pattern rules in one pass
+        matches = self.RULES.scan(clause_lower, clause_clean)
+        high_count = matches.high_count
+        medium_count = matches.medium_count
+        high_pattern_matches = matches.high_pattern_matches
+        medium_pattern_matches = matches.medium_pattern_matches
+        is_boilerplate = matches.is_boilerplate
+        
+        # Combine keyword and pattern matches
+        total_high_indicators = high_count + high_pattern_matches
+        total_medium_indicators = medium_count + medium_pattern_matches
+        
+        # Determine risk label (check boilerplate FIRST, but HIGH patterns override)
+        if is_boilerplate and total_high_indicators == 0 and high_pattern_matches == 0:
+            risk_label = "LOW"
+            risk_score = 5 + min(15, len(clause) // 100)
+        elif total_high_indicators >= 2 or high_pattern_matches >= 1 or (total_high_indicators >= 1 and len(clause) > 200):
+            # HIGH RISK: Multiple high-risk indicators OR any high-risk pattern match
+            risk_label = "HIGH"
+            risk_score = 80 + min(20, (total_high_indicators + high_pattern_matches * 2) * 3)
+        elif total_high_indicators >= 1 or total_medium_indicators >= 3 or medium_pattern_matches >= 2:
+            # MEDIUM RISK: Some high-risk indicators OR multiple medium-risk indicators
+            risk_label = "MEDIUM"
+            risk_score = 45 + min(25, (total_high_indicators + total_medium_indicators) * 4)
+        elif total_medium_indicators >= 1 or medium_pattern_matches >= 1:
+            # MEDIUM RISK: At least one medium-risk indicator
+            risk_label = "MEDIUM"
+            risk_score = 35 + min(15, total_medium_indicators * 5)
+        else:
+            # LOW RISK: No significant risk indicators
+            risk_label = "LOW"
+            risk_score = 10 + min(10, len(clause) // 50)
+        
+        risk_score = min(100, max(0, risk_score))
+        
+        explanation = self._generate_explanation(clause, risk_label, high_count, medium_count)
+        mitigation = self._generate_mitigation(clause, risk_label)
+        
+        return {
+            "clause_text": clause,
+            "clause_index": idx,
+            "risk_label": risk_label,
+            "risk_score": round(risk_score, 2),
+            "explanation": explanation,
+            "suggested_mitigation": mitigation,
+        }
+    
     def _generate_explanation(self, clause: str, label: str, high_count: int, medium_count: int) -> str:
         """Generate explanation for the risk assessment."""
         import re
@@ -375,75 +379,167 @@ class RuleBasedAnalyzer:
             return "This clause appears acceptable, but always review with legal counsel for your specific context and jurisdiction."
 
 
+_RULES_FINGERPRINT = None
+def _rules_fingerprint() -> str:
+    """
+    Hash the rule-based analyzer source so rule edits change the version.
+    
+    The rules module is hashed too: RuleEngine and required_literals there do
+    the pattern matching behind RuleBasedAnalyzer.
+    """
+    global _RULES_FINGERPRINT
+    if _RULES_FINGERPRINT is None:
+        source = inspect.getsource(RuleBasedAnalyzer) + inspect.getsource(sys.modules[RuleEngine.__module__])
+        _RULES_FINGERPRINT = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return _RULES_FINGERPRINT
+
+
 class AnalysisService:
     """Main analysis service."""
     
     def __init__(self):
         """Initialize analysis service."""
         self.ml_mode = settings.ml_mode
-        self.classifier = None
-        if self.ml_mode == "ml":
-            try:
-                RC = _get_risk_classifier()
-                if RC:
-                    self.classifier = RC()
-                else:
-                    logger.warning("ML module not available. Falling back to rules.")
-                    self.ml_mode = "rules"
-            except Exception as e:
-                logger.warning(f"Failed to load ML model: {e}. Falling back to rules.")
-                self.ml_mode = "rules"
     
-    def analyze_document(self, clauses: List[str]) -> Dict:
+    @property
+    def classifier(self):
         """
-        Analyze a document and return risk assessment.
+        The process-wide RiskClassifier (see ModelRegistry), loaded on first use.
         
-        Returns:
-            Dict with global_risk_score, total_clauses, counts, and clause analyses
+        None in rules mode or when no model can be loaded; analysis then falls
+        back to the rule-based analyzer.
         """
-        # Analyze individual clauses
-        if self.ml_mode == "ml" and self.classifier and self.classifier.classifier:
-            clause_analyses = self.classifier.analyze_clauses(clauses)
-        else:
-            rule_analyzer = RuleBasedAnalyzer()
-            clause_analyses = rule_analyzer.analyze_clauses(clauses)
+        if self.ml_mode != "ml":
+            return None
+        return model_registry.get_classifier()
+    
+    @property
+    def model_version(self) -> str:
+        """
+        Identify the model and rule set that produce this service's results.
         
-        # Calculate global risk score
-        global_score = self._calculate_global_score(clause_analyses)
+        Changes whenever the loaded model files or the rule-based analyzer change,
+        so cached results from an older version are not reused.
+        """
+        rules_version = _rules_fingerprint()
+        classifier = self.classifier
+        if classifier:
+            return f"ml-{classifier.fingerprint}-rules-{rules_version}"
+        return f"rules-{rules_version}"
+    
+    def analyze_clauses(self, clauses: List[str]) -> List[Dict]:
+        """
+        Analyze clauses with the ML model, or the rule-based analyzer as fallback.
         
-        # Count risk levels
-        counts = {
-            "high": sum(1 for c in clause_analyses if c["risk_label"] == "HIGH"),
-            "medium": sum(1 for c in clause_analyses if c["risk_label"] == "MEDIUM"),
-            "low": sum(1 for c in clause_analyses if c["risk_label"] == "LOW"),
-        }
+        clause_index values are positions in the given list, so clauses from
+        several documents can be scored together.
+        """
+        classifier = self.classifier
+        if classifier:
+            return classifier.analyze_clauses(clauses)
+        return RuleBasedAnalyzer().analyze_clauses(clauses)
+    
+    def iter_clause_analyses(self, clauses: List[str], chunk_size: int | None = None):
+        """
+        Analyze clauses in chunks, yielding each chunk's results in document order.
         
-        return {
-            "global_risk_score": round(global_score, 2),
-            "total_clauses": len(clauses),
-            "high_risk_count": counts["high"],
-            "medium_risk_count": counts["medium"],
-            "low_risk_count": counts["low"],
-            "clauses": clause_analyses,
-        }
+        clause_index values are positions in the full clause list.
+        """
+        chunk_size = chunk_size or max(1, len(clauses))
+        for start in range(0, len(clauses), chunk_size):
+            chunk_analyses = self.analyze_clauses(clauses[start:start + chunk_size])
+            for clause in chunk_analyses:
+                clause["clause_index"] += start
+            yield chunk_analyses
     
-    def _calculate_global_score(self, clause_analyses: List[Dict]) -> float:
+    def iter_document(self, clauses: List[str], chunk_size: int | None = None) -> Iterator["DocumentProgress"]:
         """
-        Calculate global document risk score.
-        
-        Formula:
-        - Weight clauses by importance (presence of high-severity keywords)
-        - High-risk clauses get 2x weight
-        - Medium-risk clauses get 1.5x weight
-        - Low-risk clauses get 1x weight
-        - Weighted average of clause scores
+        Analyze a document chunk by chunk.
+        
+        Yields a DocumentProgress per chunk with that chunk's clause analyses and
+        the global risk score over everything analyzed so far, then a final
+        DocumentProgress (with no clauses) whose result is the full analysis.
         """
-        if not clause_analyses:
-            return 0.0
+        clause_analyses = []
+        summary = RiskSummary()
+        for chunk_analyses in self.iter_clause_analyses(clauses, chunk_size):
+            clause_analyses.extend(chunk_analyses)
+            summary.add(chunk_analyses)
+            yield DocumentProgress(len(clause_analyses), len(clauses), chunk_analyses, summary.global_score)
         
-        total_weighted_score = 0.0
-        total_weight = 0.0
+        yield DocumentProgress(
+            len(clause_analyses),
+            len(clauses),
+            [],
+            summary.global_score,
+            summary.to_result(clause_analyses, total_clauses=len(clauses)),
+        )
+    
+    def analyze_document(
+        self,
+        clauses: List[str],
+        on_progress: Callable[[int, int, List[Dict]], None] | None = None,
+        chunk_size: int | None = None,
+    ) -> Dict:
+        """
+        Analyze a document and return risk assessment.
         
+        Args:
+            clauses: Clause texts in document order
+            on_progress: Optional callback(processed, total, chunk_results) called
+                after each chunk of clauses is analyzed
+            chunk_size: Clauses per chunk (default: the whole document)
+        
+        Returns:
+            Dict with global_risk_score, total_clauses, counts, and clause analyses
+        """
+        for progress in self.iter_document(clauses, chunk_size):
+            if progress.result is not None:
+                return progress.result
+            if on_progress:
+                on_progress(progress.processed, progress.total, progress.clauses)
+    
+    def _calculate_global_score(self, clause_analyses: List[Dict]) -> float:
+        """Calculate global document risk score (see RiskSummary)."""
+        summary = RiskSummary()
+        summary.add(clause_analyses)
+        return summary.raw_global_score
+
+
+class DocumentProgress(NamedTuple):
+    """One step of a chunked document analysis."""
+    processed: int
+    total: int
+    clauses: List[Dict]  # Clause analyses from this chunk
+    global_risk_score: float  # Over all clauses analyzed so far
+    result: Optional[Dict] = None  # Full analysis, set on the final step only
+
+
+class RiskSummary:
+    """
+    Running global risk score and risk level counts.
+    
+    Formula:
+    - Weight clauses by importance (presence of high-severity keywords)
+    - High-risk clauses get 2x weight
+    - Medium-risk clauses get 1.5x weight
+    - Low-risk clauses get 1x weight
+    - Weighted average of clause scores
+    
+    Clauses can be added in chunks as they are analyzed; the score after the
+    last chunk equals the score over the whole document.
+    """
+    
+    SEVERITY_KEYWORDS = ["liability", "penalty", "indemnify", "damages", "breach"]
+    
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.total_weighted_score = 0.0
+        self.total_weight = 0.0
+        self.counts = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
+    
+    def add(self, clause_analyses: List[Dict]) -> None:
+        """Fold clause analyses into the running totals."""
         for clause in clause_analyses:
             score = clause["risk_score"]
             label = clause["risk_label"]
@@ -458,16 +554,36 @@ class AnalysisService:
             
             # Additional weight for clauses with high-severity keywords
             clause_text = clause["clause_text"].lower()
-            severity_keywords = ["liability", "penalty", "indemnify", "damages", "breach"]
-            if any(kw in clause_text for kw in severity_keywords):
+            if any(kw in clause_text for kw in self.SEVERITY_KEYWORDS):
                 weight *= 1.3
             
-            total_weighted_score += score * weight
-            total_weight += weight
-        
-        if total_weight == 0:
+            self.total_weighted_score += score * weight
+            self.total_weight += weight
+            if label in self.counts:
+                self.counts[label] += 1
+    
+    @property
+    def raw_global_score(self) -> float:
+        """Weighted average clause score, clamped to 0-100."""
+        if self.total_weight == 0:
             return 0.0
         
-        global_score = total_weighted_score / total_weight
+        global_score = self.total_weighted_score / self.total_weight
         return min(100, max(0, global_score))
+    
+    @property
+    def global_score(self) -> float:
+        """Global risk score rounded for display."""
+        return round(self.raw_global_score, 2)
+    
+    def to_result(self, clause_analyses: List[Dict], total_clauses: int) -> Dict:
+        """Build the document analysis dict."""
+        return {
+            "global_risk_score": self.global_score,
+            "total_clauses": total_clauses,
+            "high_risk_count": self.counts["HIGH"],
+            "medium_risk_count": self.counts["MEDIUM"],
+            "low_risk_count": self.counts["LOW"],
+            "clauses": clause_analyses,
+        }
 
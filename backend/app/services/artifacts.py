@@ -0,0 +1,245 @@
+"""Persisted extraction artifacts (extracted text and clause segments)."""
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from app.core.config import settings
+from app.services.cache import hash_file
+from app.services.extract import ClauseSegmenter, DocumentExtractor
+
+logger = logging.getLogger(__name__)
+
+_EXTRACTOR_VERSION = None
+
+
+def extractor_version() -> str:
+    """
+    Hash the extraction module's source so extraction or segmentation edits change the version.
+    
+    The whole module is hashed, not just DocumentExtractor: segmentation
+    also lives in ClauseSegmenter, the marker index, the module-level
+    patterns and the PDF page pool.
+    """
+    global _EXTRACTOR_VERSION
+    if _EXTRACTOR_VERSION is None:
+        source = inspect.getsource(sys.modules[DocumentExtractor.__module__])
+        _EXTRACTOR_VERSION = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return _EXTRACTOR_VERSION
+
+
+class Extraction(NamedTuple):
+    """Extracted document text (None unless requested) and its clause segments (before validation)."""
+    text: Optional[str]
+    clauses: List[str]
+
+
+class ExtractionStore:
+    """
+    Gzipped JSON lines artifacts keyed by document content hash and extractor version.
+    
+    Each line is one record, {"text": piece} or {"clause": clause}, in the
+    order extraction produced them, so artifacts are written and read
+    without holding the whole document in memory. Content addressing means re-uploads of the same file share one artifact,
+    and an extractor change simply misses and re-extracts. Artifacts of older
+    extractor versions, and the least recently written beyond max_entries,
+    are pruned periodically.
+    """
+    
+    def __init__(self, store_dir: Optional[str], max_entries: int = 1000):
+        """Initialize the store."""
+        self.store_dir = Path(store_dir) if store_dir else None
+        self.max_entries = max_entries
+        self._writes = 0
+        if self.store_dir:
+            try:
+                self.store_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                logger.warning(f"Could not create extraction artifact directory: {e}")
+                self.store_dir = None
+    
+    def get(self, content_hash: str, include_text: bool = True) -> Optional[Extraction]:
+        """Return the stored extraction for content_hash (text only if include_text), or None."""
+        if not self.store_dir:
+            return None
+        path = self._path(content_hash)
+        try:
+            pieces = []
+            clauses = []
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if "clause" in record:
+                        clauses.append(record["clause"])
+                    elif include_text:
+                        pieces.append(record["text"])
+            return Extraction("".join(pieces) if include_text else None, clauses)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable extraction artifact {path.name}: {e}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+    
+    def set(self, content_hash: str, extraction: Extraction) -> None:
+        """Store an extraction atomically."""
+        records = [{"text": extraction.text or ""}] + [{"clause": clause} for clause in extraction.clauses]
+        for _ in self.saving(content_hash, records):
+            pass
+    
+    def saving(self, content_hash: str, records: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+        """
+        Yield records while writing them to the artifact for content_hash.
+        
+        The artifact replaces any previous one atomically once records is
+        exhausted; if iteration fails or stops early, nothing is stored.
+        A failed write is logged and the records are still yielded.
+        """
+        if not self.store_dir:
+            yield from records
+            return
+        path = self._path(content_hash)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            f = gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6)
+        except Exception as e:
+            logger.warning(f"Could not write extraction artifact: {e}")
+            f = None
+        try:
+            for record in records:
+                if f is not None:
+                    try:
+                        f.write(json.dumps(record) + "\n")
+                    except Exception as e:
+                        logger.warning(f"Could not write extraction artifact: {e}")
+                        f = self._discard(f)
+                yield record
+            if f is not None:
+                try:
+                    f.close()
+                    os.replace(tmp_path, path)
+                    self._writes += 1
+                    # Pruning scans the directory, so only do it periodically
+                    if self._writes % 50 == 0:
+                        self.prune()
+                except Exception as e:
+                    logger.warning(f"Could not write extraction artifact: {e}")
+        finally:
+            if f is not None:
+                self._discard(f)
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+    
+    def delete(self, content_hash: str) -> None:
+        """Remove the artifacts of content_hash, for every extractor version."""
+        if not self.store_dir:
+            return
+        for path in self.store_dir.glob(f"{content_hash}-*.gz"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def prune(self) -> None:
+        """Remove artifacts of older extractor versions, then the least recently written beyond max_entries."""
+        if not self.store_dir:
+            return
+        suffix = f"-{extractor_version()}.jsonl.gz"
+        entries = []
+        for path in self.store_dir.glob("*.gz"):
+            if path.name.endswith(suffix):
+                entries.append(path)
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        if len(entries) <= self.max_entries:
+            return
+        
+        def mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+        
+        entries.sort(key=mtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _discard(f) -> None:
+        try:
+            f.close()
+        except Exception:
+            pass
+    
+    def _path(self, content_hash: str) -> Path:
+        return self.store_dir / f"{content_hash}-{extractor_version()}.jsonl.gz"
+
+
+extraction_store = ExtractionStore(
+    os.path.join(settings.cache_dir, "extractions") if settings.extraction_artifacts_enabled else None,
+    max_entries=settings.extraction_artifacts_max_entries,
+)
+
+
+def extract_document(file_path: str, content_hash: Optional[str] = None, include_text: bool = False) -> Extraction:
+    """
+    Extract and segment clauses, reusing a stored artifact for the same content.
+    
+    Text is segmented and written to the artifact piece by piece as it is
+    extracted, so only the clauses are held in memory unless include_text.
+    
+    Args:
+        file_path: Path of the stored upload
+        content_hash: SHA-256 of the file, if already known
+        include_text: Also return the full extracted text
+    """
+    content_hash = content_hash or hash_file(file_path)
+    extraction = extraction_store.get(content_hash, include_text)
+    if extraction is not None:
+        logger.info(f"Loaded extraction artifact for {os.path.basename(file_path)}")
+        return extraction
+    
+    pieces = []
+    clauses = []
+    for record in extraction_store.saving(content_hash, _iter_records(file_path)):
+        if "clause" in record:
+            clauses.append(record["clause"])
+        elif include_text:
+            pieces.append(record["text"])
+    return Extraction("".join(pieces) if include_text else None, clauses)
+
+
+def _iter_records(file_path: str) -> Iterator[Dict[str, str]]:
+    """Yield artifact records, segmenting page by page as the text is extracted."""
+    segmenter = ClauseSegmenter()
+    for piece in DocumentExtractor.iter_text(file_path):
+        yield {"text": piece}
+        for clause in segmenter.feed(piece):
+            yield {"clause": clause}
+    for clause in segmenter.close():
+        yield {"clause": clause}
+
+
+def extract_clauses(file_path: str, content_hash: Optional[str] = None) -> List[str]:
+    """
+    Return a document's validated clauses, reusing a stored artifact when present.
+    
+    Importable without the ML stack, so it can run in extraction worker processes.
+    """
+    return DocumentExtractor.validate_clauses(extract_document(file_path, content_hash).clauses)
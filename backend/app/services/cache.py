@@ -0,0 +1,226 @@
+"""Content-addressed cache for document analysis results."""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(content_hash: str, ml_mode: str, model_version: str) -> str:
+    """Build a cache key from document hash, analysis mode and model version."""
+    raw = f"{content_hash}:{ml_mode}:{model_version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache for AnalysisService.analyze_document results.
+    
+    The first tier is a bounded in-memory LRU. The second tier stores one
+    JSON file per key on disk so results survive restarts and are shared
+    between workers. Keys include the model version, so results from an
+    older model or rule set are never returned.
+    """
+    
+    def __init__(self, max_entries: int = 128, cache_dir: str | None = None, max_disk_entries: int = 1000):
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory: OrderedDict[str, Dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._disk_writes = 0
+        
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                logger.warning(f"Could not create analysis cache directory: {e}")
+                self.cache_dir = None
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store_memory(key, result)
+        return result
+    
+    def set(self, key: str, result: Dict) -> None:
+        """Store a result in both tiers."""
+        with self._lock:
+            self._store_memory(key, result)
+        self._write_disk(key, result)
+    
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._memory)}
+    
+    def _store_memory(self, key: str, result: Dict) -> None:
+        """Insert into the LRU tier, evicting the oldest entry if full. Caller holds the lock."""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+    
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        """Load a result from the disk tier."""
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+    
+    def _write_disk(self, key: str, result: Dict) -> None:
+        """Write a result to the disk tier atomically."""
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+            self._disk_writes += 1
+            # Pruning scans the directory, so only do it periodically
+            if self._disk_writes % 50 == 0:
+                self._prune_disk()
+        except Exception as e:
+            logger.warning(f"Could not write analysis cache entry: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+    
+    def _prune_disk(self) -> None:
+        """Remove the least recently written files beyond max_disk_entries."""
+        entries = list(self.cache_dir.glob("*.json"))
+        if len(entries) <= self.max_disk_entries:
+            return
+        
+        def mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+        
+        entries.sort(key=mtime)
+        for path in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class ClauseResultCache:
+    """
+    Bounded LRU memo of per-clause risk results.
+    
+    Entries are keyed on the analyzer fingerprint plus the clause text the
+    analyzer actually scores, and hold only the fields that depend on that
+    text (label, score, explanation, mitigation). The caller fills in
+    clause_text and clause_index for the current document.
+    """
+    
+    FIELDS = ("risk_label", "risk_score", "explanation", "suggested_mitigation")
+    
+    def __init__(self, max_entries: int = 20000):
+        """Initialize the memo store."""
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(fingerprint: str, text: str) -> str:
+        """Build a memo key for text scored by the analyzer with this fingerprint."""
+        return hashlib.sha256(f"{fingerprint}\0{text}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str, clause_text: str, clause_index: int) -> Optional[Dict]:
+        """Return a result dict for the clause, or None on a miss."""
+        with self._lock:
+            values = self._entries.get(key)
+            if values is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        result = {"clause_text": clause_text, "clause_index": clause_index}
+        result.update(zip(self.FIELDS, values))
+        return result
+    
+    def set(self, key: str, result: Dict) -> None:
+        """Memoize the text-dependent fields of a clause result."""
+        if self.max_entries <= 0:
+            return
+        values = tuple(result[field] for field in self.FIELDS)
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every memoized clause."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+clause_cache = ClauseResultCache(max_entries=settings.clause_cache_size)
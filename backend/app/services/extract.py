@@ -1,14 +1,192 @@
 """Document extraction service."""
+import codecs
+import math
+import multiprocessing
 import os
 import re
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
 import fitz  # PyMuPDF
 from docx import Document
 from pathlib import Path
 import logging
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Characters read from a text file per piece
+TXT_CHUNK_SIZE = 1024 * 1024
+
+# ARTICLE headings (major sections); each section is segmented on its own
+_ARTICLE_PATTERN = re.compile(r'(?i)(ARTICLE[—\-\s]+\d+)')
+# End of text that could still grow into an ARTICLE heading
+_ARTICLE_PREFIX_AT_END = re.compile(r'(?i)A(?:R(?:T(?:I(?:C(?:L(?:E[—\-\s]*)?)?)?)?)?)?\Z')
+# Runs of 3+ line breaks, normalized to one blank line
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+# Clause numbering markers, matched where a run of whitespace ends
+_DECIMAL_MARKER = re.compile(r'\d+\.\d+\s+')  # 1.0, 1.1, 2.0
+_NUMBERED_MARKER = re.compile(r'\d+[\.\)]\s+(?!\d)')  # 1., 2., 1)
+_LETTERED_MARKER = re.compile(r'[a-z][\.\)]\s+', re.IGNORECASE)  # a), b), a., b.
+# Whitespace from a newline up to the next text; a marker right after it starts a line
+_LINE_BREAK_RUN = re.compile(r'\n\s*+')
+_LEADING_SPACE = re.compile(r'[^\S\n]*')
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n+')
+_PARAGRAPH_CLAUSE_START = re.compile(
+    r'ARTICLE[—\-\s]+\d+'
+    r'|\d+\.\d+\s+'
+    r'|\d+[\.\)]\s+'
+    r'|[a-z][\.\)]\s+'
+    r'|WHEREAS\s+'
+    r'|THEREFORE\s+'
+    r'|NOW\s+THEREFORE\s+'
+    r'|IN\s+CONSIDERATION\s+'
+    r'|THE\s+PARTIES\s+AGREE\s+'
+    r'|Article\s+\d+'
+    r'|Section\s+\d+'
+    r'|Clause\s+\d+',
+    re.IGNORECASE,
+)
+_CLAUSE_KEYWORDS = re.compile(
+    r'\b(shall|must|will|agrees?|warrants?|represents?|agreement|contract|tenant|landlord|party|parties|service|provider|institute)\b',
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r'([.!?]+\s+)')
+_WHITESPACE_RUN = re.compile(r'\s+')
+_SPACES = re.compile(r'[ \t]+')
+_NEWLINES = re.compile(r'\n+')
+
+
+class _Marker(NamedTuple):
+    """A numbering marker at the start of a line (or of the text)."""
+    run_start: int  # Where the whitespace before the marker starts being a line break
+    start: int
+    end: int  # End of the marker, including the whitespace after it
+    first_newline: int  # Positions of the first and last newline before the marker, or -1
+    last_newline: int
+
+
+class _MarkerIndex:
+    """
+    Every decimal, numbered and lettered marker in a piece of a section, found in one pass.
+    
+    Markers are only looked for where a line starts, so the scan is linear in
+    the text. line_starts then picks the markers a line-anchored regex search
+    (r'(?:^|\\n)\\s*(marker)') would match, without rescanning.
+    """
+    
+    def __init__(self, text: str, first_line: bool = True):
+        """Index the markers in text; first_line is whether text starts a line (the section)."""
+        self.decimal = []
+        self.numbered = []
+        self.lettered = []
+        
+        # The first line, unless the text starts with blank lines (found below)
+        leading = _LEADING_SPACE.match(text).end()
+        if first_line and not text.startswith("\n", leading):
+            self._add(text, 0, leading, -1, -1)
+        for run in _LINE_BREAK_RUN.finditer(text):
+            run_start, start = run.start(), run.end()
+            self._add(text, run_start, start, run_start, text.rfind("\n", run_start, start))
+    
+    def _add(self, text: str, run_start: int, start: int, first_newline: int, last_newline: int) -> None:
+        """Record the marker, if any, at text[start]."""
+        if start >= len(text):
+            return
+        if text[start].isdecimal():
+            candidates = ((_DECIMAL_MARKER, self.decimal), (_NUMBERED_MARKER, self.numbered))
+        else:
+            candidates = ((_LETTERED_MARKER, self.lettered),)
+        for pattern, markers in candidates:
+            match = pattern.match(text, start)
+            if match:
+                markers.append(_Marker(run_start, start, match.end(), first_newline, last_newline))
+    
+    @staticmethod
+    def line_starts(markers: List[_Marker], end: int = 0) -> List[Tuple[int, _Marker]]:
+        """
+        The markers starting a line, as (clause start, marker) pairs.
+        
+        A marker counts when a newline (or the start of the text) precedes it
+        with only whitespace in between, not counting whitespace already taken
+        by the previous marker (or by a marker ending at end).
+        """
+        matches = []
+        for marker in markers:
+            if marker.start < end:
+                continue
+            start = max(end, marker.run_start)
+            if start == 0 or marker.last_newline >= start - 1:
+                matches.append((start, marker))
+                end = marker.end
+        return matches
+
+
+def _shift_marker(marker: _Marker, offset: int) -> _Marker:
+    """The marker with its positions moved by offset."""
+    return _Marker(
+        marker.run_start + offset,
+        marker.start + offset,
+        marker.end + offset,
+        marker.first_newline + offset if marker.first_newline != -1 else -1,
+        marker.last_newline + offset if marker.last_newline != -1 else -1,
+    )
+
+
+def _lettered_splits(lettered: List[_Marker], start: int, end: int) -> List[int]:
+    """Where to split text[start:end] at lettered markers that follow a newline and indentation."""
+    splits = []
+    for marker in lettered:
+        if marker.start <= start:
+            continue
+        if marker.start + 2 >= end:
+            break
+        if marker.first_newline != -1 and marker.first_newline < marker.start - 1:
+            splits.append(marker.first_newline)
+    return splits
+
+
+# Process pool for page-parallel PDF extraction, started on first use
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _pdf_page_pool() -> ProcessPoolExecutor:
+    """Return the shared PDF extraction pool, starting it if needed."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Spawned, not forked: forking a process with model or server threads is unsafe
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=settings.pdf_extract_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def _page_texts(doc, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of an open PDF; unreadable pages give ""."""
+    texts = []
+    for page_num in range(start, stop):
+        try:
+            texts.append(doc[page_num].get_text())
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+            texts.append("")
+    return texts
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of a PDF. Runs in a pool worker with its own document handle."""
+    with fitz.open(file_path) as doc:
+        return _page_texts(doc, start, stop)
+
+
+class SegmentationError(ValueError):
+    """Raised when a document yields no usable clauses."""
+
 
 class DocumentExtractor:
     """Extract text from various document formats."""
@@ -16,98 +194,206 @@ class DocumentExtractor:
     @staticmethod
     def extract_text(file_path: str) -> str:
         """Extract text from document based on extension."""
+        return "".join(DocumentExtractor.iter_text(file_path))
+    
+    @staticmethod
+    def iter_text(file_path: str) -> Iterator[str]:
+        """
+        Extract text from document based on extension, yielding it a piece at a time.
+        
+        Pieces are pages (PDF), paragraphs and table rows (DOCX) or chunks (TXT),
+        with their separators included, so they concatenate to extract_text.
+        """
         ext = Path(file_path).suffix.lower()
         
         if ext == ".pdf":
-            return DocumentExtractor._extract_pdf(file_path)
+            return DocumentExtractor._iter_pdf(file_path)
         elif ext in [".docx", ".doc"]:
-            return DocumentExtractor._extract_docx(file_path)
+            return DocumentExtractor._iter_docx(file_path)
         elif ext == ".txt":
-            return DocumentExtractor._extract_txt(file_path)
+            return DocumentExtractor._iter_txt(file_path)
         else:
             raise ValueError(f"Unsupported file format: {ext}")
     
     @staticmethod
-    def _extract_pdf(file_path: str) -> str:
-        """Extract text from PDF using PyMuPDF."""
+    def extract_clauses(file_path: str) -> List[str]:
+        """Extract text from a document and return its validated clauses."""
+        # Extract and segment, page by page
+        clauses = list(DocumentExtractor.iter_clauses(DocumentExtractor.iter_text(file_path)))
+        return DocumentExtractor.validate_clauses(clauses)
+    
+    @staticmethod
+    def validate_clauses(clauses: List[str]) -> List[str]:
+        """
+        Drop clauses too short to analyze and truncate very long ones.
+        
+        Raises SegmentationError if no usable clauses remain.
+        """
+        # Validate clauses
+        if not clauses:
+            logger.warning("No clauses found after segmentation in analyze endpoint")
+            raise SegmentationError(
+                "Could not segment document into clauses. Please ensure the document contains numbered clauses (1., 2., etc.) or clear paragraph breaks."
+            )
+        
+        # Validate clause quality
+        valid_clauses = []
+        for idx, clause in enumerate(clauses):
+            clause = clause.strip()
+            if len(clause) < 10:
+                logger.warning(f"Skipping clause {idx+1} in analysis: too short ({len(clause)} chars)")
+                continue
+            if len(clause) > 10000:
+                logger.warning(f"Clause {idx+1} is very long ({len(clause)} chars), truncating to 10000 chars")
+                clause = clause[:10000] + "..."
+            valid_clauses.append(clause)
+        
+        if not valid_clauses:
+            raise SegmentationError(
+                "No valid clauses found after segmentation. Please check your document format."
+            )
+        
+        return valid_clauses
+    
+    @staticmethod
+    def _iter_pdf(file_path: str) -> Iterator[str]:
+        """
+        Extract text from PDF using PyMuPDF, one page at a time.
+        
+        Large PDFs are split into page ranges extracted in parallel worker
+        processes (see pdf_extract_workers) and yielded in page order.
+        """
         try:
-            doc = fitz.open(file_path)
-            text_parts = []
-            for page_num, page in enumerate(doc):
-                try:
-                    page_text = page.get_text()
+            extracted = 0
+            with fitz.open(file_path) as doc:
+                for page_text in DocumentExtractor._iter_pdf_pages(doc, file_path):
                     if page_text.strip():
-                        text_parts.append(page_text)
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                    continue
-            doc.close()
+                        # Pages are separated by a newline
+                        yield page_text if not extracted else "\n" + page_text
+                        extracted += len(page_text) + (1 if extracted else 0)
             
-            if not text_parts:
+            if not extracted:
                 raise ValueError("No text could be extracted from PDF. The file may be image-based or corrupted.")
             
-            extracted_text = "\n".join(text_parts)
-            logger.info(f"Successfully extracted {len(extracted_text)} characters from PDF")
-            return extracted_text
+            logger.info(f"Successfully extracted {extracted} characters from PDF")
         except Exception as e:
             logger.error(f"Error extracting PDF: {e}")
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
     
     @staticmethod
-    def _extract_docx(file_path: str) -> str:
-        """Extract text from DOCX."""
+    def _iter_pdf_pages(doc, file_path: str) -> Iterator[str]:
+        """Yield the text of each page of an open PDF, in order."""
+        page_count = doc.page_count
+        if not DocumentExtractor._parallel_pdf(page_count):
+            for page_num in range(page_count):
+                yield from _page_texts(doc, page_num, page_num + 1)
+            return
+        
+        # Several ranges per worker so a few slow pages don't hold up the rest
+        chunk = max(8, math.ceil(page_count / (settings.pdf_extract_workers * 4)))
+        ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+        try:
+            pool = _pdf_page_pool()
+            futures = [pool.submit(_extract_pdf_pages, file_path, start, stop) for start, stop in ranges]
+        except Exception as e:
+            logger.warning(f"Parallel PDF extraction failed, extracting sequentially: {e}")
+            futures = []
+        
+        for i, (start, stop) in enumerate(ranges):
+            page_texts = None
+            if futures:
+                try:
+                    page_texts = futures[i].result()
+                except Exception as e:
+                    logger.warning(f"Parallel PDF extraction failed, extracting sequentially: {e}")
+                    for future in futures:
+                        future.cancel()
+                    futures = []
+            if page_texts is None:
+                page_texts = _page_texts(doc, start, stop)
+            yield from page_texts
+    
+    @staticmethod
+    def _parallel_pdf(page_count: int) -> bool:
+        """Whether a PDF with page_count pages is worth extracting in parallel."""
+        if settings.pdf_extract_workers < 2 or page_count < settings.pdf_parallel_min_pages:
+            return False
+        # Already in a worker process (e.g. batch extraction), which is parallel itself
+        return multiprocessing.parent_process() is None
+    
+    @staticmethod
+    def _iter_docx(file_path: str) -> Iterator[str]:
+        """Extract text from DOCX, one paragraph or table row at a time."""
         try:
             doc = Document(file_path)
-            paragraphs = []
+            extracted = 0
             
-            # Extract from paragraphs
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    paragraphs.append(para.text)
+            def pieces():
+                # Extract from paragraphs
+                for para in doc.paragraphs:
+                    if para.text.strip():
+                        yield para.text
+                
+                # Also extract from tables if present
+                for table in doc.tables:
+                    for row in table.rows:
+                        row_text = " ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
+                        if row_text:
+                            yield row_text
             
-            # Also extract from tables if present
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = " ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
-                    if row_text:
-                        paragraphs.append(row_text)
+            for piece in pieces():
+                # Paragraphs are separated by a newline
+                yield piece if not extracted else "\n" + piece
+                extracted += len(piece) + (1 if extracted else 0)
             
-            if not paragraphs:
+            if not extracted:
                 raise ValueError("No text could be extracted from DOCX. The file may be empty or corrupted.")
             
-            extracted_text = "\n".join(paragraphs)
-            logger.info(f"Successfully extracted {len(extracted_text)} characters from DOCX")
-            return extracted_text
+            logger.info(f"Successfully extracted {extracted} characters from DOCX")
         except Exception as e:
             logger.error(f"Error extracting DOCX: {e}")
             raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
     
     @staticmethod
-    def _extract_txt(file_path: str) -> str:
-        """Extract text from TXT with multiple encoding support."""
+    def _iter_txt(file_path: str) -> Iterator[str]:
+        """Extract text from TXT with multiple encoding support, in chunks."""
+        encoding = DocumentExtractor._detect_txt_encoding(file_path)
+        errors = "strict"
+        if encoding is None:
+            # If all encodings fail, read with error handling
+            logger.warning("Reading TXT file with error replacement (some characters may be lost)")
+            encoding, errors = "utf-8", "replace"
+        
+        try:
+            with open(file_path, "r", encoding=encoding, errors=errors) as f:
+                while chunk := f.read(TXT_CHUNK_SIZE):
+                    yield chunk
+        except Exception as e:
+            logger.error(f"Error extracting TXT: {e}")
+            raise ValueError(f"Unable to read text file: {str(e)}")
+    
+    @staticmethod
+    def _detect_txt_encoding(file_path: str) -> Optional[str]:
+        """Return the first encoding that decodes the whole file, or None."""
         encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
         
         for encoding in encodings:
             try:
-                with open(file_path, "r", encoding=encoding) as f:
-                    text = f.read()
-                    logger.info(f"Successfully read TXT file with {encoding} encoding")
-                    return text
+                # Decode incrementally so the file is never held in memory
+                decoder = codecs.getincrementaldecoder(encoding)()
+                with open(file_path, "rb") as f:
+                    while chunk := f.read(TXT_CHUNK_SIZE):
+                        decoder.decode(chunk)
+                decoder.decode(b"", final=True)
+                logger.info(f"Successfully read TXT file with {encoding} encoding")
+                return encoding
             except UnicodeDecodeError:
                 continue
             except Exception as e:
                 logger.error(f"Error extracting TXT with {encoding}: {e}")
                 if encoding == encodings[-1]:  # Last encoding failed
                     raise
-        
-        # If all encodings fail, try with error handling
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                logger.warning("Reading TXT file with error replacement (some characters may be lost)")
-                return f.read()
-        except Exception as e:
-            logger.error(f"Error extracting TXT: {e}")
-            raise ValueError(f"Unable to read text file: {str(e)}")
+        return None
     
     @staticmethod
     def segment_clauses(text: str) -> List[str]:
@@ -117,235 +403,43 @@ class DocumentExtractor:
         Handles:
         - Articles (ARTICLE—1, ARTICLE 1, Article 1, etc.)
         - Decimal numbered clauses (1.0, 1.1, 1.2, 2.0, etc.)
-        - Numbered clauses (1., 2., 10., 1), etc.)
+        - Numbered clauses (1., 2., 10., 1), etc.), up to a section's first decimal one
         - Lettered sub-clauses (a), b), a., b., etc.)
         - Multi-line clauses properly
         """
         if not text or not text.strip():
             return []
         
-        # Normalize text: preserve newlines but normalize multiple spaces
-        # Replace multiple newlines with single newline, but keep single newlines
-        text = re.sub(r'\r\n', '\n', text)  # Normalize line endings
-        text = re.sub(r'\r', '\n', text)
-        text = re.sub(r'\n{3,}', '\n\n', text)  # Max 2 consecutive newlines
-        
-        clauses = []
-        
-        # METHOD 1: Split by ARTICLE markers (major sections)
-        # Pattern matches: "ARTICLE—1", "ARTICLE 1", "Article 1", "ARTICLE-1", etc.
-        article_pattern = r'(?i)(ARTICLE[—\-\s]+\d+)'
-        article_matches = list(re.finditer(article_pattern, text))
-        
-        if len(article_matches) > 0:
-            # We found articles, process each section
-            last_end = 0
-            
-            for i, match in enumerate(article_matches):
-                start_pos = match.start()
-                article_text = match.group(0)
-                
-                # Process text before this article (if any)
-                if start_pos > last_end:
-                    prefix_text = text[last_end:start_pos].strip()
-                    if prefix_text:
-                        section_clauses = DocumentExtractor._segment_section(prefix_text)
-                        clauses.extend(section_clauses)
-                
-                # Get content from this article to next article (or end)
-                if i + 1 < len(article_matches):
-                    end_pos = article_matches[i + 1].start()
-                    article_content = text[match.end():end_pos]
-                else:
-                    article_content = text[match.end():]
-                
-                # Combine article header with its content
-                full_section = article_text + article_content
-                section_clauses = DocumentExtractor._segment_section(full_section)
-                clauses.extend(section_clauses)
-                
-                last_end = match.end() + len(article_content)
-            
-            # Handle any remaining text after last article
-            if last_end < len(text):
-                remaining_text = text[last_end:].strip()
-                if remaining_text:
-                    section_clauses = DocumentExtractor._segment_section(remaining_text)
-                    clauses.extend(section_clauses)
-        else:
-            # No articles found, process entire text as one section
-            clauses = DocumentExtractor._segment_section(text)
-        
-        # Post-process: Clean and validate clauses
-        cleaned_clauses = []
-        for clause in clauses:
-            # Normalize whitespace (multiple spaces/tabs to single space)
-            clause = re.sub(r'[ \t]+', ' ', clause.strip())
-            # Remove excessive newlines within clause
-            clause = re.sub(r'\n+', ' ', clause)
-            
-            # Filter by length
-            if len(clause) >= 15:  # Minimum clause length
-                # Truncate if too long (but log warning)
-                if len(clause) > 10000:
-                    logger.warning(f"Clause truncated from {len(clause)} to 10000 chars")
-                    clause = clause[:10000] + "..."
-                cleaned_clauses.append(clause)
-        
-        if cleaned_clauses:
-            logger.info(f"Segmented text into {len(cleaned_clauses)} clauses")
-            return cleaned_clauses
-        
-        # FALLBACK: If no clauses found, try paragraph-based splitting
-        logger.warning("Primary segmentation failed, using paragraph fallback")
-        return DocumentExtractor._fallback_segment(text)
+        return list(DocumentExtractor.iter_clauses([text]))
     
     @staticmethod
-    def _segment_section(section_text: str) -> List[str]:
-        """
-        Segment a section (article or entire document) into clauses.
-        Handles decimal numbering (1.0, 1.1), regular numbering (1., 2.), etc.
+    def iter_clauses(pieces: Iterable[str]) -> Iterator[str]:
         """
-        clauses = []
-        
-        # METHOD 1A: Split by decimal numbered clauses (1.0, 1.1, 2.0, etc.)
-        # Pattern: number.number followed by space, at start of line or after newline
-        # Use finditer to get all matches with positions
-        decimal_pattern = r'(?:^|\n)\s*(\d+\.\d+\s+)'
-        matches = list(re.finditer(decimal_pattern, section_text, re.MULTILINE))
-        
-        if len(matches) > 0:
-            # Found decimal numbered clauses
-            last_end = 0
-            
-            for i, match in enumerate(matches):
-                start_pos = match.start()
-                clause_num = match.group(1)
-                
-                # Get content from last match end (or start) to current match start
-                if start_pos > last_end:
-                    # There's content before this clause
-                    prefix = section_text[last_end:start_pos].strip()
-                    if prefix and len(prefix) > 15:
-                        clauses.append(prefix)
-                
-                # Get content from current match to next match (or end)
-                if i + 1 < len(matches):
-                    end_pos = matches[i + 1].start()
-                    clause_content = section_text[match.end():end_pos].strip()
-                else:
-                    clause_content = section_text[match.end():].strip()
-                
-                # Combine clause number with content
-                full_clause = clause_num + clause_content
-                
-                # Check if this clause contains nested decimal sub-clauses on new lines
-                # If so, split them
-                if re.search(r'\n\s+\d+\.\d+\s+', clause_content):
-                    # Contains nested decimal clauses, split them
-                    nested_splits = re.split(r'(?=\n\s+\d+\.\d+\s+)', clause_content)
-                    for nested_part in nested_splits:
-                        nested_part = nested_part.strip()
-                        if nested_part:
-                            if re.match(r'\d+\.\d+\s+', nested_part):
-                                # This nested part starts with its own decimal number
-                                clauses.append(nested_part)
-                            else:
-                                # This is continuation of main clause
-                                clauses.append(clause_num + nested_part)
-                else:
-                    # Single clause without nested decimals
-                    clauses.append(full_clause)
-                
-                # Update last_end to the end of current clause content
-                if i + 1 < len(matches):
-                    last_end = matches[i + 1].start()
-                else:
-                    last_end = len(section_text)
-            
-            # Handle any remaining text after last match
-            if last_end < len(section_text):
-                remaining = section_text[last_end:].strip()
-                if remaining and len(remaining) > 15:
-                    clauses.append(remaining)
-        else:
-            # No decimal numbering found, try regular numbered clauses
-            clauses = DocumentExtractor._segment_by_numbered_clauses(section_text)
+        Segment text arriving in pieces (e.g. from iter_text), yielding clauses as they complete.
         
-        return clauses
+        Gives the same clauses as segment_clauses on the concatenated text.
+        """
+        segmenter = ClauseSegmenter()
+        for piece in pieces:
+            yield from segmenter.feed(piece)
+        yield from segmenter.close()
     
     @staticmethod
-    def _segment_by_numbered_clauses(text: str) -> List[str]:
-        """
-        Segment text by regular numbered clauses (1., 2., 1), etc.)
-        """
-        clauses = []
-        
-        # Pattern: number followed by . or ) and space, at start of line or after newline
-        # Exclude decimal numbers (already handled) - use negative lookahead
-        numbered_pattern = r'(?:^|\n)\s*(\d+[\.\)]\s+)(?!\d)'
-        matches = list(re.finditer(numbered_pattern, text, re.MULTILINE))
-        
-        if len(matches) > 0:
-            last_end = 0
-            
-            for i, match in enumerate(matches):
-                start_pos = match.start()
-                clause_num = match.group(1)
-                
-                # Process text before this clause (if any)
-                if start_pos > last_end:
-                    prefix = text[last_end:start_pos].strip()
-                    if prefix and len(prefix) > 15:
-                        clauses.append(prefix)
-                
-                # Get content from current match to next match (or end)
-                if i + 1 < len(matches):
-                    end_pos = matches[i + 1].start()
-                    clause_content = text[match.end():end_pos].strip()
-                else:
-                    clause_content = text[match.end():].strip()
-                
-                # Combine clause number with content
-                full_clause = clause_num + clause_content
-                
-                # Check for lettered sub-clauses (a), b), etc.) within
-                # Only split if clause is very long (>2000 chars)
-                if len(clause_content) > 2000 and re.search(r'\n\s+[a-z][\.\)]\s+', clause_content, re.IGNORECASE):
-                    # Try to split by lettered sub-clauses
-                    lettered_splits = re.split(r'(?=\n\s+[a-z][\.\)]\s+)', clause_content, flags=re.IGNORECASE)
-                    if len(lettered_splits) > 1:
-                        for lettered_part in lettered_splits:
-                            lettered_part = lettered_part.strip()
-                            if lettered_part:
-                                if re.match(r'[a-z][\.\)]\s+', lettered_part, re.IGNORECASE):
-                                    # Lettered sub-clause, keep with main clause number prefix
-                                    clauses.append(clause_num + lettered_part)
-                                else:
-                                    # Continuation text
-                                    clauses.append(clause_num + lettered_part)
-                    else:
-                        clauses.append(full_clause)
-                else:
-                    # Single clause without splitting
-                    clauses.append(full_clause)
-                
-                # Update last_end
-                if i + 1 < len(matches):
-                    last_end = matches[i + 1].start()
-                else:
-                    last_end = len(text)
-            
-            # Handle any remaining text after last match
-            if last_end < len(text):
-                remaining = text[last_end:].strip()
-                if remaining and len(remaining) > 15:
-                    clauses.append(remaining)
-        else:
-            # No numbered clauses, try paragraph-based
-            clauses = DocumentExtractor._segment_by_paragraphs(text)
+    def _clean_clause(clause: str) -> Optional[str]:
+        """Normalize a segmented clause's whitespace; None if it is too short to keep."""
+        # Normalize whitespace (multiple spaces/tabs to single space)
+        clause = _SPACES.sub(' ', clause.strip())
+        # Remove excessive newlines within clause
+        clause = _NEWLINES.sub(' ', clause)
         
-        return clauses
+        # Filter by length
+        if len(clause) < 15:  # Minimum clause length
+            return None
+        # Truncate if too long (but log warning)
+        if len(clause) > 10000:
+            logger.warning(f"Clause truncated from {len(clause)} to 10000 chars")
+            clause = clause[:10000] + "..."
+        return clause
     
     @staticmethod
     def _segment_by_paragraphs(text: str) -> List[str]:
@@ -355,40 +449,20 @@ class DocumentExtractor:
         clauses = []
         
         # Split by double newlines (paragraph breaks)
-        paragraphs = re.split(r'\n\s*\n+', text)
-        
-        clause_markers = [
-            r'^ARTICLE[—\-\s]+\d+',
-            r'^\d+\.\d+\s+',
-            r'^\d+[\.\)]\s+',
-            r'^[a-z][\.\)]\s+',
-            r'^WHEREAS\s+',
-            r'^THEREFORE\s+',
-            r'^NOW\s+THEREFORE\s+',
-            r'^IN\s+CONSIDERATION\s+',
-            r'^THE\s+PARTIES\s+AGREE\s+',
-            r'^Article\s+\d+',
-            r'^Section\s+\d+',
-            r'^Clause\s+\d+',
-        ]
-        
-        for para in paragraphs:
+        for para in _PARAGRAPH_BREAK.split(text):
             para = para.strip()
             if not para:
                 continue
             
             # Normalize whitespace
-            para = re.sub(r'\s+', ' ', para)
+            para = _WHITESPACE_RUN.sub(' ', para)
             
             # Check if paragraph starts with clause marker
-            is_clause_start = any(re.match(marker, para, re.IGNORECASE) for marker in clause_markers)
+            is_clause_start = _PARAGRAPH_CLAUSE_START.match(para) is not None
             
             if is_clause_start or len(para) > 50:
                 # Check for clause indicators
-                if is_clause_start or re.search(
-                    r'\b(shall|must|will|agrees?|warrants?|represents?|agreement|contract|tenant|landlord|party|parties|service|provider|institute)\b',
-                    para, re.IGNORECASE
-                ):
+                if is_clause_start or _CLAUSE_KEYWORDS.search(para):
                     clauses.append(para)
         
         return clauses
@@ -399,10 +473,10 @@ class DocumentExtractor:
         Final fallback: split by sentences if no other method worked.
         """
         # Normalize text
-        normalized_text = re.sub(r'\s+', ' ', text.strip())
+        normalized_text = _WHITESPACE_RUN.sub(' ', text.strip())
         
         # Split by sentence endings
-        sentences = re.split(r'([.!?]+\s+)', normalized_text)
+        sentences = _SENTENCE_END.split(normalized_text)
         
         clauses = []
         current_clause = ""
@@ -425,3 +499,260 @@ class DocumentExtractor:
         
         return clauses
 
+
+class ClauseSegmenter:
+    """
+    Incremental form of DocumentExtractor.segment_clauses.
+    
+    Feed document text in pieces; each call returns the clauses completed so
+    far. A numbered or decimal clause is returned as soon as the marker of
+    the next one (or the next ARTICLE heading) arrives, so only the open
+    clause is kept in memory. Numbered markers (1., 2)) split a section until
+    its first decimal marker (1.1); from then on only decimal markers do.
+    Text before a section's first marker is kept until one arrives, and a
+    section without any is split into paragraphs when it ends.
+    """
+    
+    def __init__(self):
+        """Initialize an empty segmenter."""
+        self._held = ""  # Trailing line breaks of the last piece, not yet normalized
+        self._tail = ""  # End of the open section that may begin an ARTICLE heading
+        self._in_article = False  # Whether the open section starts with an ARTICLE heading
+        self._has_text = False
+        self._count = 0
+        # Text that gave no clauses, kept for the fallback until a clause is found
+        self._unsegmented = []
+        self._start_section()
+    
+    def feed(self, piece: str) -> List[str]:
+        """Add the next piece of text; return the clauses it completed."""
+        return self._scan(self._normalize(piece))
+    
+    def close(self) -> List[str]:
+        """Finish the text; return the remaining clauses."""
+        clauses = self._scan(self._normalize("", final=True), final=True)
+        if not self._has_text:
+            return []
+        
+        if self._count:
+            logger.info(f"Segmented text into {self._count} clauses")
+            return clauses
+        
+        # FALLBACK: If no clauses found, try paragraph-based splitting
+        logger.warning("Primary segmentation failed, using paragraph fallback")
+        return DocumentExtractor._fallback_segment("".join(self._unsegmented))
+    
+    def _start_section(self) -> None:
+        """Start an empty section."""
+        self._buffer = ""  # Text still to be scanned for markers
+        self._parts = []  # Text of the open clause (or of the section before its first marker) before _buffer
+        self._parts_length = 0
+        self._first_line = True  # Whether _buffer starts the section, so its first line can hold a marker
+        self._open = None  # Marker length and kind (numbered or decimal) of the open clause, from its marker
+        self._open_end = 0  # End of the open clause's marker, relative to _buffer
+        self._lettered = []  # Lettered markers in the open clause before _buffer, relative to its marker
+        self._decimal = False  # Whether a decimal marker has been seen in this section
+    
+    def _scan(self, text: str, final: bool = False) -> List[str]:
+        """Add normalized text to the open section, closing a section at each ARTICLE heading."""
+        buffer = self._tail + text
+        self._tail = ""
+        clauses = []
+        
+        start = 0
+        scan_end = 0
+        for match in _ARTICLE_PATTERN.finditer(buffer):
+            if match.end() == len(buffer) and not final:
+                # The heading may continue in the next piece
+                scan_end = None
+                self._tail = buffer[match.start():]
+                buffer = buffer[:match.start()]
+                break
+            # A new article starts here, closing the open section
+            clauses.extend(self._extend(buffer[start:match.start()], final=True, strip=not self._in_article))
+            self._in_article = True
+            start = match.start()
+            scan_end = match.end()
+        
+        if scan_end is not None and not final:
+            partial = _ARTICLE_PREFIX_AT_END.search(buffer, scan_end)
+            tail_start = partial.start() if partial else len(buffer)
+            self._tail = buffer[tail_start:]
+            buffer = buffer[:tail_start]
+        clauses.extend(self._extend(buffer[start:], final=final))
+        return clauses
+    
+    def _normalize(self, piece: str, final: bool = False) -> str:
+        """
+        Normalize line breaks like segment_clauses does on the whole text.
+        
+        Trailing line breaks are held back until the next piece, so runs of
+        breaks split across pieces are normalized as one.
+        """
+        text = self._held + piece
+        self._held = ""
+        if not final:
+            kept = text.rstrip('\r\n')
+            self._held = text[len(kept):]
+            text = kept
+        
+        # Preserve newlines but normalize multiple newlines (max 2 consecutive)
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        text = _BLANK_LINES.sub('\n\n', text)
+        
+        if not self._has_text and text.strip():
+            self._has_text = True
+        return text
+    
+    def _extend(self, text: str, final: bool = False, strip: bool = False) -> List[str]:
+        """
+        Add text to the open section; return the clauses whose end is now known.
+        
+        A clause ends where the next marker starting a line begins. A marker
+        running up to the end of the text may still change, so it waits for
+        more text, unless final: then the section ends here and is closed.
+        With strip (the text before the first ARTICLE heading), trailing
+        whitespace is not part of the section, so a marker at its very end
+        does not count.
+        """
+        buffer = self._buffer + text
+        index = _MarkerIndex(buffer, self._first_line)
+        first_decimal = len(buffer)
+        if self._decimal:
+            candidates = index.decimal
+        else:
+            decimal = index.line_starts(index.decimal)
+            first_decimal = decimal[0][1].start if decimal else len(buffer)
+            candidates = sorted(
+                [marker for marker in index.numbered if marker.start < first_decimal] + index.decimal,
+                key=lambda marker: marker.start,
+            )
+        boundaries = index.line_starts(candidates, self._open_end)
+        if boundaries and (strip or not final) and boundaries[-1][1].end >= len(buffer):
+            boundaries.pop()
+        
+        clauses = []
+        decimal_starts = {marker.start for marker in index.decimal}
+        start = -self._parts_length  # Where the open clause (or the section) starts, relative to buffer
+        for clause_start, marker in boundaries:
+            clauses.extend(self._cut_open(buffer, start, marker.start, clause_start, index))
+            is_decimal = marker.start in decimal_starts
+            self._decimal = self._decimal or is_decimal
+            self._open = (marker.end - marker.start, not is_decimal)
+            self._open_end = marker.end
+            start = marker.start
+        
+        if final:
+            if self._open is not None:
+                clauses.extend(self._cut_open(buffer, start, len(buffer), len(buffer), index))
+            else:
+                # No numbering markers at all: split into paragraphs
+                section = "".join(self._parts) + buffer
+                clauses.extend(DocumentExtractor._segment_by_paragraphs(section))
+                self._consume(section)
+            self._start_section()
+            return self._counted(clauses)
+        
+        # Keep the open clause from its marker, and rescan only the end of the text
+        shift = max(start, 0)
+        rescan = max(self._rescan_from(buffer, index) - shift, 0)
+        # A decimal marker ends numbered splitting even inside an open clause
+        self._decimal = self._decimal or first_decimal < shift + rescan
+        self._lettered.extend(
+            _shift_marker(marker, self._parts_length - shift)
+            for marker in index.lettered
+            if marker.start >= shift and marker.run_start - shift < rescan
+        )
+        if rescan:
+            self._parts.append(buffer[shift:shift + rescan])
+            self._parts_length += rescan
+        self._open_end -= shift + rescan
+        self._first_line = self._first_line and not shift + rescan
+        self._buffer = buffer[shift + rescan:]
+        return self._counted(clauses)
+    
+    def _cut_open(self, buffer: str, start: int, end: int, content_end: int, index: _MarkerIndex) -> List[str]:
+        """
+        Segment the open clause (or the text before the section's first marker), then drop its text.
+        
+        It runs from start (negative while it begins in _parts) to end in
+        buffer, and its content up to content_end.
+        """
+        text = "".join(self._parts) + buffer[:end] if self._parts else buffer[start:end]
+        lettered = self._lettered + [
+            _shift_marker(marker, -start) for marker in index.lettered if start < marker.start < end
+        ]
+        clauses = self._cut(text, content_end - start, lettered)
+        self._consume(text)
+        self._parts = []
+        self._parts_length = 0
+        self._lettered = []
+        return clauses
+    
+    def _rescan_from(self, buffer: str, index: _MarkerIndex) -> int:
+        """
+        Where the next scan of buffer (with more text appended) must start.
+        
+        That is the start of the last run of line breaks, whose marker may
+        still change, or of a marker running up to the end of buffer.
+        """
+        last_newline = buffer.rfind("\n")
+        if last_newline == -1:
+            rescan = 0 if self._first_line else len(buffer)
+        else:
+            rescan = last_newline
+            while rescan > 0 and buffer[rescan - 1].isspace():
+                rescan -= 1
+            rescan = buffer.find("\n", rescan)
+        for markers in (index.decimal, index.numbered, index.lettered):
+            if markers and markers[-1].end >= len(buffer):
+                rescan = min(rescan, markers[-1].run_start)
+        return rescan
+    
+    def _cut(self, text: str, content_end: int, lettered: List[_Marker]) -> List[str]:
+        """
+        The clauses of the open clause's text, from its marker to content_end.
+        
+        Before the section's first marker, text is kept as one clause if long
+        enough. Numbered clauses over 2000 characters are also split where a
+        lettered sub-clause starts a line, each part keeping the clause number.
+        """
+        if self._open is None:
+            prefix = text[:content_end].strip()
+            return [prefix] if prefix and len(prefix) > 15 else []
+        
+        marker_length, numbered = self._open
+        clause_num = text[:marker_length]
+        raw_content = text[marker_length:content_end]
+        clause_content = raw_content.strip()
+        if not numbered or len(clause_content) <= 2000:
+            return [clause_num + clause_content]
+        
+        content_start = marker_length + len(raw_content) - len(raw_content.lstrip())
+        split_points = _lettered_splits(lettered, content_start, content_start + len(clause_content))
+        if not split_points:
+            return [clause_num + clause_content]
+        bounds = [content_start] + split_points + [content_start + len(clause_content)]
+        parts = []
+        for part_start, part_end in zip(bounds, bounds[1:]):
+            part = text[part_start:part_end].strip()
+            if part:
+                parts.append(clause_num + part)
+        return parts
+    
+    def _counted(self, clauses: List[str]) -> List[str]:
+        """Clean the segmented clauses and count the kept ones."""
+        cleaned = []
+        for clause in clauses:
+            clause = DocumentExtractor._clean_clause(clause)
+            if clause:
+                cleaned.append(clause)
+        if cleaned:
+            self._count += len(cleaned)
+            self._unsegmented = []
+        return cleaned
+    
+    def _consume(self, text: str) -> None:
+        """Drop segmented text, keeping it for the fallback while no clause has been found."""
+        if not self._count:
+            self._unsegmented.append(text)
@@ -0,0 +1,319 @@
+"""Background analysis jobs backed by the database."""
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.job import AnalysisBatch, AnalysisJob, AnalysisJobChunk
+from app.models.upload import Upload
+from app.services import pipeline
+from app.services.uploads import StoredUpload, mark_extraction
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    """
+    Run document analyses on a worker thread pool.
+    
+    The analysis_jobs table is the queue: a job row is written before the
+    job is handed to the pool, a worker claims it by moving it from queued
+    to running, and progress is written back as each chunk of clauses is
+    scored, with the chunk's clause results in a row of their own. Jobs left queued (or stuck running)
+    by a previous process are picked up again by recover().
+    """
+    
+    def __init__(self, max_workers: int = 2, chunk_size: int = 64, session_factory=SessionLocal):
+        """Initialize the job manager."""
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="analysis-job",
+            )
+        return self._executor
+    
+    def submit(
+        self,
+        db: Session,
+        file_id: str,
+        filename: str,
+        original_filename: str,
+        file_path: str,
+        session_id: Optional[str] = None,
+    ) -> AnalysisJob:
+        """Queue a stored file for analysis and return the job row."""
+        job = AnalysisJob(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            file_id=file_id,
+            filename=filename,
+            original_filename=original_filename,
+            file_path=file_path,
+            status="queued",
+            stage="queued",
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        self.executor.submit(self._run, job.id)
+        logger.info(f"Queued analysis job {job.id} for {filename}")
+        return job
+    
+    def submit_batch(
+        self,
+        db: Session,
+        uploads: List[StoredUpload],
+        session_id: Optional[str] = None,
+    ) -> AnalysisBatch:
+        """Queue several stored files as one batch and return the batch row."""
+        batch = AnalysisBatch(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            total_documents=len(uploads),
+        )
+        db.add(batch)
+        
+        job_ids = []
+        for upload in uploads:
+            job = AnalysisJob(
+                id=str(uuid.uuid4()),
+                session_id=session_id,
+                batch_id=batch.id,
+                file_id=upload.file_id,
+                filename=upload.filename,
+                original_filename=upload.original_filename,
+                file_path=upload.file_path,
+                status="queued",
+                stage="queued",
+            )
+            db.add(job)
+            job_ids.append(job.id)
+        db.commit()
+        db.refresh(batch)
+        
+        if job_ids:
+            self.executor.submit(self._run_batch, job_ids)
+        logger.info(f"Queued analysis batch {batch.id} with {len(job_ids)} documents")
+        return batch
+    
+    def recover(self) -> int:
+        """Re-queue jobs that were queued or abandoned mid-run by a previous process."""
+        db = self.session_factory()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds)
+            stale = or_(
+                AnalysisJob.status == "queued",
+                and_(AnalysisJob.status == "running", AnalysisJob.updated_at < cutoff),
+            )
+            job_ids = [row.id for row in db.query(AnalysisJob.id).filter(stale).all()]
+            if job_ids:
+                db.query(AnalysisJob).filter(AnalysisJob.id.in_(job_ids), stale).update(
+                    {"status": "queued", "stage": "queued"}, synchronize_session=False
+                )
+                db.commit()
+        finally:
+            db.close()
+        
+        for job_id in job_ids:
+            self.executor.submit(self._run, job_id)
+        if job_ids:
+            logger.info(f"Recovered {len(job_ids)} analysis jobs")
+        return len(job_ids)
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+    
+    def _claim(self, db: Session, job_id: str) -> Optional[AnalysisJob]:
+        """Atomically move a queued job to running; return None if another worker has it."""
+        claimed = db.query(AnalysisJob).filter(
+            AnalysisJob.id == job_id,
+            AnalysisJob.status == "queued",
+        ).update(
+            {"status": "running", "stage": "extract", "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+        db.commit()
+        if not claimed:
+            return None
+        return db.get(AnalysisJob, job_id)
+    
+    def _run(self, job_id: str) -> None:
+        """Worker entry point: extract, segment, classify and persist one document."""
+        db = self.session_factory()
+        try:
+            job = self._claim(db, job_id)
+            if job is None:
+                return
+            
+            # Results of an abandoned earlier run are scored again
+            self._delete_chunks(db, job_id)
+            
+            def on_progress(processed: int, total: int, chunk_results: List[Dict]) -> None:
+                if chunk_results:
+                    db.add(AnalysisJobChunk(
+                        job_id=job_id,
+                        first_clause=processed - len(chunk_results),
+                        clause_count=len(chunk_results),
+                        results=json.dumps(chunk_results),
+                    ))
+                job.stage = "classify"
+                job.total_clauses = total
+                job.processed_clauses = processed
+                job.updated_at = datetime.utcnow()
+                db.commit()
+            
+            try:
+                analysis_result = pipeline.analyze_file(
+                    job.file_path,
+                    on_progress=on_progress,
+                    chunk_size=self.chunk_size,
+                    content_hash=self._content_hash(db, job),
+                )
+                self._complete(db, job, analysis_result)
+            except Exception as e:
+                self._fail(db, job_id, e)
+        finally:
+            db.close()
+    
+    def _run_batch(self, job_ids: List[str]) -> None:
+        """
+        Worker entry point for a batch.
+        
+        Cached documents complete immediately. The rest are extracted in
+        parallel, and their clauses are pooled into shared inference batches
+        as each document's extraction finishes.
+        """
+        db = self.session_factory()
+        try:
+            jobs = {}
+            for job_id in job_ids:
+                job = self._claim(db, job_id)
+                if job is not None:
+                    jobs[job_id] = job
+            
+            service = pipeline.analysis_service
+            clause_pool = pipeline.ClausePool(service, settings.batch_inference_chunk_size)
+            cache_keys = {}
+            content_hashes = {}
+            by_path = {}
+            
+            try:
+                for job_id, job in jobs.items():
+                    content_hashes[job.file_path] = self._content_hash(db, job)
+                    cache_keys[job_id] = pipeline.result_cache_key(job.file_path, service, content_hashes[job.file_path])
+                    cached = pipeline.analysis_cache.get(cache_keys[job_id]) if cache_keys[job_id] else None
+                    if cached is not None:
+                        self._complete(db, job, cached)
+                    else:
+                        by_path[job.file_path] = job
+                
+                extracted = pipeline.extract_all(list(by_path), settings.batch_extract_workers, content_hashes)
+                for file_path, clauses, error in extracted:
+                    job = by_path[file_path]
+                    if error is not None:
+                        self._fail(db, job.id, error)
+                        continue
+                    
+                    job.stage = "classify"
+                    job.total_clauses = len(clauses)
+                    job.updated_at = datetime.utcnow()
+                    db.commit()
+                    self._complete_pooled(db, jobs, clause_pool, clause_pool.add(job.id, clauses), cache_keys)
+                
+                self._complete_pooled(db, jobs, clause_pool, clause_pool.flush(), cache_keys)
+            except Exception as e:
+                logger.error(f"Analysis batch failed: {e}", exc_info=True)
+                db.rollback()
+                for job_id in jobs:
+                    if db.get(AnalysisJob, job_id).status == "running":
+                        self._fail(db, job_id, e)
+        finally:
+            db.close()
+    
+    def _complete_pooled(
+        self,
+        db: Session,
+        jobs: Dict[str, AnalysisJob],
+        clause_pool: pipeline.ClausePool,
+        finished: List[tuple],
+        cache_keys: Dict[str, Optional[str]],
+    ) -> None:
+        """Persist documents finished by the clause pool and record progress of the rest."""
+        for job_id, analysis_result in finished:
+            if cache_keys.get(job_id):
+                pipeline.analysis_cache.set(cache_keys[job_id], analysis_result)
+            self._complete(db, jobs[job_id], analysis_result)
+        
+        for job_id in clause_pool.keys():
+            jobs[job_id].processed_clauses = clause_pool.progress(job_id)
+            jobs[job_id].updated_at = datetime.utcnow()
+        db.commit()
+    
+    def _complete(self, db: Session, job: AnalysisJob, analysis_result: Dict) -> None:
+        """Store a job's analysis and mark it completed."""
+        job.stage = "persist"
+        job.total_clauses = analysis_result["total_clauses"]
+        job.processed_clauses = analysis_result["total_clauses"]
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        
+        db_analysis = pipeline.save_analysis(
+            db,
+            analysis_result,
+            session_id=job.session_id,
+            filename=job.filename,
+            original_filename=job.original_filename,
+            file_path=job.file_path,
+        )
+        
+        job.status = "completed"
+        job.stage = "done"
+        job.analysis_id = db_analysis.id
+        job.updated_at = datetime.utcnow()
+        self._delete_chunks(db, job.id)  # Clauses now live in the clauses table
+        db.commit()
+        mark_extraction(db, job.file_id, "extracted")
+        logger.info(f"Analysis job {job.id} completed (analysis {db_analysis.id})")
+    
+    def _fail(self, db: Session, job_id: str, error: Exception) -> None:
+        """Mark a job failed."""
+        logger.error(f"Analysis job {job_id} failed: {error}", exc_info=error)
+        db.rollback()
+        job = db.get(AnalysisJob, job_id)
+        job.status = "failed"
+        job.error = str(error)
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        if isinstance(error, ValueError):  # Extraction and segmentation errors
+            mark_extraction(db, job.file_id, "failed")
+    
+    @staticmethod
+    def _delete_chunks(db: Session, job_id: str) -> None:
+        """Drop a job's partial clause results."""
+        db.query(AnalysisJobChunk).filter(AnalysisJobChunk.job_id == job_id).delete(synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    def _content_hash(db: Session, job: AnalysisJob) -> Optional[str]:
+        """Content hash recorded for the job's upload, if registered."""
+        upload = db.get(Upload, job.file_id)
+        return upload.content_hash if upload else None
+
+
+job_manager = JobManager(max_workers=settings.job_workers, chunk_size=settings.job_chunk_size)
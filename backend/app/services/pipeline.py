@@ -0,0 +1,261 @@
+"""Document analysis pipeline shared by the API routes and background jobs."""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.analysis import Analysis, Clause
+from app.services.analysis import AnalysisService, DocumentProgress, RiskSummary
+from app.services.cache import AnalysisCache, hash_file, make_cache_key
+from app.services.artifacts import extract_clauses, extractor_version
+
+logger = logging.getLogger(__name__)
+
+# Replaced by the settings API when the ML mode changes
+analysis_service = AnalysisService()
+
+analysis_cache = AnalysisCache(
+    max_entries=settings.analysis_cache_size,
+    cache_dir=os.path.join(settings.cache_dir, "analysis"),
+    max_disk_entries=settings.analysis_cache_disk_entries,
+)
+
+
+def result_cache_key(
+    file_path: str,
+    service: AnalysisService,
+    content_hash: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Return the analysis cache key for a file under service, or None if caching is off.
+    
+    Pass the content hash recorded at upload time to avoid re-reading the file.
+    """
+    if not settings.analysis_cache_enabled:
+        return None
+    version = f"{service.model_version}-extract-{extractor_version()}"
+    return make_cache_key(content_hash or hash_file(file_path), service.ml_mode, version)
+
+
+def iter_analysis(
+    file_path: str,
+    chunk_size: Optional[int] = None,
+    content_hash: Optional[str] = None,
+) -> Iterator[DocumentProgress]:
+    """
+    Run extraction, segmentation and risk analysis for a stored file, chunk by chunk.
+    
+    Yields DocumentProgress steps as in AnalysisService.iter_document; the last
+    step carries the full result. Results are served from the analysis cache
+    when the same content was already analyzed with the current mode and model.
+    """
+    # Use the service current at call time (the settings API may replace it)
+    service = analysis_service
+    
+    # Reuse a previous result for identical file content, mode and model
+    cache_key = result_cache_key(file_path, service, content_hash)
+    if cache_key:
+        analysis_result = analysis_cache.get(cache_key)
+        if analysis_result is not None:
+            logger.info(f"Analysis cache hit for {os.path.basename(file_path)}")
+            total = analysis_result["total_clauses"]
+            score = analysis_result["global_risk_score"]
+            yield DocumentProgress(total, total, analysis_result["clauses"], score)
+            yield DocumentProgress(total, total, [], score, analysis_result)
+            return
+    
+    clauses = extract_clauses(file_path, content_hash)
+    for progress in service.iter_document(clauses, chunk_size):
+        if progress.result is not None and cache_key:
+            analysis_cache.set(cache_key, progress.result)
+        yield progress
+
+
+def analyze_file(
+    file_path: str,
+    on_progress: Optional[Callable[[int, int, List[Dict]], None]] = None,
+    chunk_size: Optional[int] = None,
+    content_hash: Optional[str] = None,
+) -> Dict:
+    """
+    Run extraction, segmentation and risk analysis for a stored file.
+    
+    Args:
+        file_path: Path of the stored upload
+        on_progress: Optional callback(processed, total, chunk_results) called
+            after each chunk of clauses is analyzed
+        chunk_size: Clauses per chunk (default: the whole document)
+        content_hash: SHA-256 of the file, if already known
+    """
+    for progress in iter_analysis(file_path, chunk_size, content_hash):
+        if progress.result is not None:
+            return progress.result
+        if on_progress:
+            on_progress(progress.processed, progress.total, progress.clauses)
+
+
+def extract_all(
+    file_paths: List[str],
+    workers: int,
+    content_hashes: Optional[Dict[str, str]] = None,
+) -> Iterator[Tuple[str, Optional[List[str]], Optional[Exception]]]:
+    """
+    Extract and segment many files, yielding (file_path, clauses, error) as each finishes.
+    
+    Extraction is CPU-bound, so with workers > 0 and more than one file it is
+    fanned out across a process pool. Workers are spawned rather than forked,
+    so they start clean of the API's threads and never load the ML model.
+    Stored extraction artifacts are reused and written by the workers.
+    """
+    content_hashes = content_hashes or {}
+    if workers <= 0 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            try:
+                yield file_path, extract_clauses(file_path, content_hashes.get(file_path)), None
+            except Exception as e:
+                yield file_path, None, e
+        return
+    
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(file_paths)), mp_context=context) as pool:
+        futures = {
+            pool.submit(extract_clauses, path, content_hashes.get(path)): path
+            for path in file_paths
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
+class ClausePool:
+    """
+    Score clauses from many documents in shared inference batches.
+    
+    Documents are added as their clauses become available. Clauses are scored
+    whenever chunk_size of them are pending, regardless of which document
+    they came from, and a document's result is returned once all of its
+    clauses have been scored.
+    """
+    
+    def __init__(self, service: AnalysisService, chunk_size: int = 256):
+        """Initialize an empty pool."""
+        self.service = service
+        self.chunk_size = max(1, chunk_size)
+        self._pending: List[tuple] = []  # (key, clause position, clause text)
+        self._analyses: Dict[str, List[Optional[Dict]]] = {}
+        self._remaining: Dict[str, int] = {}
+    
+    def add(self, key: str, clauses: List[str]) -> List[tuple]:
+        """
+        Queue a document's clauses.
+        
+        Returns (key, analysis_result) for each document completed by the
+        batches this triggered.
+        """
+        self._analyses[key] = [None] * len(clauses)
+        self._remaining[key] = len(clauses)
+        self._pending.extend((key, idx, clause) for idx, clause in enumerate(clauses))
+        
+        finished = [] if clauses else [(key, self._finish(key))]
+        while len(self._pending) >= self.chunk_size:
+            finished.extend(self._score(self.chunk_size))
+        return finished
+    
+    def flush(self) -> List[tuple]:
+        """Score every pending clause and return the remaining documents' results."""
+        finished = []
+        while self._pending:
+            finished.extend(self._score(self.chunk_size))
+        return finished
+    
+    def progress(self, key: str) -> int:
+        """Number of a queued document's clauses scored so far."""
+        return len(self._analyses[key]) - self._remaining[key]
+    
+    def keys(self) -> List[str]:
+        """Documents still waiting for clauses to be scored."""
+        return list(self._analyses)
+    
+    def _score(self, count: int) -> List[tuple]:
+        batch = self._pending[:count]
+        del self._pending[:count]
+        
+        analyses = self.service.analyze_clauses([clause for _, _, clause in batch])
+        finished = []
+        for (key, idx, _), analysis in zip(batch, analyses):
+            analysis["clause_index"] = idx
+            self._analyses[key][idx] = analysis
+            self._remaining[key] -= 1
+            if self._remaining[key] == 0:
+                finished.append((key, self._finish(key)))
+        return finished
+    
+    def _finish(self, key: str) -> Dict:
+        clause_analyses = self._analyses.pop(key)
+        del self._remaining[key]
+        summary = RiskSummary()
+        summary.add(clause_analyses)
+        return summary.to_result(clause_analyses, total_clauses=len(clause_analyses))
+
+
+def insert_clauses(db: Session, analysis_id: int, clause_analyses: List[Dict]) -> List[int]:
+    """
+    Insert an analysis's clause rows in bulk and return their ids in input order.
+    
+    Uses a single Core INSERT executed as a batched multi-row statement
+    (insertmanyvalues) instead of one ORM object and INSERT per clause.
+    """
+    if not clause_analyses:
+        return []
+    rows = [
+        {
+            "analysis_id": analysis_id,
+            "clause_text": clause_data["clause_text"],
+            "clause_index": clause_data["clause_index"],
+            "risk_label": clause_data["risk_label"],
+            "risk_score": clause_data["risk_score"],
+            "explanation": clause_data["explanation"],
+            "suggested_mitigation": clause_data["suggested_mitigation"],
+        }
+        for clause_data in clause_analyses
+    ]
+    # RETURNING order isn't guaranteed for batched inserts, so map ids back by clause_index
+    statement = insert(Clause).returning(Clause.id, Clause.clause_index)
+    ids_by_index = {clause_index: clause_id for clause_id, clause_index in db.execute(statement, rows)}
+    return [ids_by_index[row["clause_index"]] for row in rows]
+
+
+def save_analysis(
+    db: Session,
+    analysis_result: Dict,
+    session_id: Optional[str],
+    filename: str,
+    original_filename: str,
+    file_path: str,
+) -> Analysis:
+    """Store an analysis result and its clauses in one transaction, and return the committed Analysis."""
+    db_analysis = Analysis(
+        session_id=session_id,  # Store session_id for user isolation
+        filename=filename,
+        original_filename=original_filename,
+        file_path=file_path,
+        global_risk_score=analysis_result["global_risk_score"],
+        total_clauses=analysis_result["total_clauses"],
+        high_risk_count=analysis_result["high_risk_count"],
+        medium_risk_count=analysis_result["medium_risk_count"],
+        low_risk_count=analysis_result["low_risk_count"],
+    )
+    db.add(db_analysis)
+    db.flush()
+    
+    # Store clauses
+    insert_clauses(db, db_analysis.id, analysis_result["clauses"])
+    
+    db.commit()
+    db.refresh(db_analysis)
+    return db_analysis
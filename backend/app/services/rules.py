@@ -0,0 +1,213 @@
+"""Precompiled rule engine for the rule-based risk analyzer."""
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Optional C implementation of Aho-Corasick
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+_LITERAL_CHARS = re.compile(r"[\w\-',/]")
+
+
+def _class_end(pattern: str, start: int) -> int:
+    """Index just past the character class that opens at pattern[start]."""
+    i = start + 1
+    if i < len(pattern) and pattern[i] == "^":
+        i += 1
+    if i < len(pattern) and pattern[i] == "]":
+        # A leading ] is a literal member of the class
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def required_literals(pattern: str) -> Set[str]:
+    """
+    Return literal substrings that every match of pattern must contain.
+    
+    Only top-level literal runs are used; text inside groups, character
+    classes, escapes, {m,n} quantifiers and characters made optional by a
+    quantifier are skipped. Patterns with a top-level alternation have no
+    required literals.
+    """
+    literals = set()
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if current:
+                literals.add(current)
+                current = ""
+            i += 2
+            continue
+        if char == "|" and depth == 0:
+            return set()
+        if char == "[":
+            # A class matches one of its characters, so it breaks the literal run
+            if current:
+                literals.add(current)
+                current = ""
+            i = _class_end(pattern, i)
+            continue
+        if char == "{" and depth == 0:
+            if current:
+                current = current[:-1]
+                if current:
+                    literals.add(current)
+                current = ""
+            end = pattern.find("}", i)
+            i = end + 1 if end != -1 else len(pattern)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and _LITERAL_CHARS.match(char):
+            current += char
+            i += 1
+            continue
+        elif char in "?*" and current:
+            # Quantifier applies to the previous character only
+            current = current[:-1]
+        if current:
+            literals.add(current)
+            current = ""
+        i += 1
+    if current:
+        literals.add(current)
+    return {literal.lower() for literal in literals if literal}
+
+
+class RuleMatches(NamedTuple):
+    """Rule hits for a single clause."""
+    high_count: int
+    medium_count: int
+    high_pattern_matches: int
+    medium_pattern_matches: int
+    is_boilerplate: bool
+
+
+class KeywordAutomaton:
+    """Find which of a fixed set of keywords occur in a text in one pass."""
+    
+    def __init__(self, keywords: List[str]):
+        """Build the automaton."""
+        self.keywords = list(dict.fromkeys(keywords))
+        self._automaton = None
+        if ahocorasick is not None and self.keywords:
+            self._automaton = ahocorasick.Automaton()
+            for idx, keyword in enumerate(self.keywords):
+                self._automaton.add_word(keyword, idx)
+            self._automaton.make_automaton()
+    
+    def find(self, text: str) -> Set[int]:
+        """Return indices (into self.keywords) of keywords present in text."""
+        if self._automaton is not None:
+            return {idx for _, idx in self._automaton.iter(text)}
+        return {idx for idx, keyword in enumerate(self.keywords) if keyword in text}
+
+
+class RuleEngine:
+    """
+    Keyword and pattern rules compiled once.
+    
+    A single keyword automaton pass over the clause finds both the risk
+    keywords and the literals each regex pattern requires. Patterns whose
+    literals are all present are then checked with their precompiled regex;
+    the rest cannot match and are skipped. Start-anchored boilerplate
+    patterns are combined into one alternation tried once at the start of
+    the clause, since only "any match" matters for them.
+    """
+    
+    def __init__(
+        self,
+        high_keywords: List[str],
+        medium_keywords: List[str],
+        high_patterns: List[str],
+        medium_patterns: List[str],
+        low_patterns: List[str],
+    ):
+        """Compile the rules."""
+        # Start-anchored boilerplate patterns only need one attempt at position 0
+        anchored_low = [p[1:] for p in low_patterns if p.startswith("^")]
+        unanchored_low = [p for p in low_patterns if not p.startswith("^")]
+        
+        high_prefilters = [required_literals(p) for p in high_patterns]
+        medium_prefilters = [required_literals(p) for p in medium_patterns]
+        low_prefilters = [required_literals(p) for p in unanchored_low]
+        
+        literals = set()
+        for prefilter in high_prefilters + medium_prefilters + low_prefilters:
+            literals |= prefilter
+        self.automaton = KeywordAutomaton(high_keywords + medium_keywords + sorted(literals))
+        index = {keyword: idx for idx, keyword in enumerate(self.automaton.keywords)}
+        
+        # Keyword lists may repeat entries; each repeat counts separately
+        self.high_keyword_weights = self._weights(high_keywords, index)
+        self.medium_keyword_weights = self._weights(medium_keywords, index)
+        
+        self.high_patterns = self._compile_patterns(high_patterns, high_prefilters, index)
+        self.medium_patterns = self._compile_patterns(medium_patterns, medium_prefilters, index)
+        self.low_patterns = self._compile_patterns(unanchored_low, low_prefilters, index)
+        self.anchored_low_pattern = re.compile(
+            "|".join(f"(?P<low_{i}>{p})" for i, p in enumerate(anchored_low)),
+            re.IGNORECASE,
+        ) if anchored_low else None
+    
+    @staticmethod
+    def _weights(keywords: List[str], index: Dict[str, int]) -> Dict[int, int]:
+        weights = {}
+        for keyword in keywords:
+            weights[index[keyword]] = weights.get(index[keyword], 0) + 1
+        return weights
+    
+    @staticmethod
+    def _compile_patterns(patterns: List[str], prefilters: List[Set[str]], index: Dict[str, int]):
+        return [
+            (re.compile(pattern, re.IGNORECASE), frozenset(index[literal] for literal in prefilter))
+            for pattern, prefilter in zip(patterns, prefilters)
+        ]
+    
+    @staticmethod
+    def _count_patterns(patterns, found: Set[int], text: str) -> int:
+        return sum(
+            1 for regex, needed in patterns
+            if needed <= found and regex.search(text)
+        )
+    
+    def scan(self, clause_lower: str, clause_clean: Optional[str] = None) -> RuleMatches:
+        """
+        Evaluate every rule against a clause.
+        
+        Args:
+            clause_lower: Lowercased clause text (keywords are matched here)
+            clause_clean: Lowercased clause with whitespace collapsed (patterns are matched here)
+        """
+        if clause_clean is None:
+            clause_clean = re.sub(r'\s+', ' ', clause_lower).strip()
+        
+        found = self.automaton.find(clause_lower)
+        high_count = sum(weight for idx, weight in self.high_keyword_weights.items() if idx in found)
+        medium_count = sum(weight for idx, weight in self.medium_keyword_weights.items() if idx in found)
+        
+        return RuleMatches(
+            high_count=high_count,
+            medium_count=medium_count,
+            high_pattern_matches=self._count_patterns(self.high_patterns, found, clause_clean),
+            medium_pattern_matches=self._count_patterns(self.medium_patterns, found, clause_clean),
+            is_boilerplate=self._is_boilerplate(found, clause_clean),
+        )
+    
+    def _is_boilerplate(self, found: Set[int], text: str) -> bool:
+        """Check whether any LOW RISK boilerplate pattern matches."""
+        if self.anchored_low_pattern and self.anchored_low_pattern.match(text):
+            return True
+        return any(needed <= found and regex.search(text) for regex, needed in self.low_patterns)
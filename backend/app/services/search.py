@@ -0,0 +1,258 @@
+"""Full-text clause search."""
+import html
+import logging
+import re
+from typing import Dict, List, Optional
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.analysis import Analysis, Clause
+
+logger = logging.getLogger(__name__)
+
+# Highlight markers wrapped around matched terms in snippets
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Private-use characters the database wraps matches in; the snippet is
+# HTML-escaped before they are replaced by the highlight markers
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+# Characters of clause text shown around the first match by the LIKE fallback
+_LIKE_SNIPPET_CHARS = 160
+
+_SQLITE_INDEX_DDL = [
+    # External-content FTS5 table: the index only, clause text stays in clauses
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS clauses_fts USING fts5(
+        clause_text, explanation, suggested_mitigation,
+        content='clauses', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clauses_fts_insert AFTER INSERT ON clauses BEGIN
+        INSERT INTO clauses_fts(rowid, clause_text, explanation, suggested_mitigation)
+        VALUES (new.id, new.clause_text, new.explanation, new.suggested_mitigation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clauses_fts_delete AFTER DELETE ON clauses BEGIN
+        INSERT INTO clauses_fts(clauses_fts, rowid, clause_text, explanation, suggested_mitigation)
+        VALUES ('delete', old.id, old.clause_text, old.explanation, old.suggested_mitigation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clauses_fts_update AFTER UPDATE ON clauses BEGIN
+        INSERT INTO clauses_fts(clauses_fts, rowid, clause_text, explanation, suggested_mitigation)
+        VALUES ('delete', old.id, old.clause_text, old.explanation, old.suggested_mitigation);
+        INSERT INTO clauses_fts(rowid, clause_text, explanation, suggested_mitigation)
+        VALUES (new.id, new.clause_text, new.explanation, new.suggested_mitigation);
+    END
+    """,
+]
+
+_POSTGRES_INDEX_DDL = [
+    # Generated column, so the vector is maintained on every insert and update
+    """
+    ALTER TABLE clauses ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(clause_text, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(explanation, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(suggested_mitigation, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_clauses_search_vector ON clauses USING GIN (search_vector)",
+]
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Create the clause full-text index if it does not exist yet.
+    
+    SQLite uses an FTS5 table kept in sync by triggers; PostgreSQL uses a
+    generated tsvector column with a GIN index. Safe to call on every startup.
+    """
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                created = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clauses_fts'"
+                )).first() is None
+                for statement in _SQLITE_INDEX_DDL:
+                    conn.execute(text(statement))
+                if created:
+                    # Index clauses stored before the index existed
+                    conn.execute(text("INSERT INTO clauses_fts(clauses_fts) VALUES ('rebuild')"))
+                    logger.info("Created clause full-text index (FTS5)")
+            elif dialect == "postgresql":
+                for statement in _POSTGRES_INDEX_DDL:
+                    conn.execute(text(statement))
+            else:
+                logger.info(f"No full-text index for {dialect}; clause search will use LIKE")
+    except DBAPIError as e:
+        logger.warning(f"Could not create clause full-text index, clause search will use LIKE: {e}")
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def _render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escape a snippet from the database and turn its match sentinels into highlight markers."""
+    if snippet is None:
+        return None
+    return (
+        html.escape(snippet)
+        .replace(_MATCH_START, HIGHLIGHT_START)
+        .replace(_MATCH_END, HIGHLIGHT_END)
+    )
+
+
+def _like_snippet(clause_text: str, terms: List[str]) -> Optional[str]:
+    """Escaped excerpt of clause_text around the first term, with every term occurrence highlighted."""
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(clause_text)
+    if first is None:
+        return None
+    start = max(0, first.start() - _LIKE_SNIPPET_CHARS // 2)
+    end = min(len(clause_text), start + _LIKE_SNIPPET_CHARS)
+    parts = ["..." if start else ""]
+    position = start
+    for match in pattern.finditer(clause_text, start, end):
+        parts.append(html.escape(clause_text[position:match.start()]))
+        parts.append(HIGHLIGHT_START + html.escape(match.group()) + HIGHLIGHT_END)
+        position = match.end()
+    parts.append(html.escape(clause_text[position:end]))
+    parts.append("..." if end < len(clause_text) else "")
+    return "".join(parts)
+
+
+def _scope(session_id: Optional[str], analysis_id: Optional[int]):
+    """SQL filter and params restricting results to a session (and analysis)."""
+    if session_id:
+        where = "a.session_id = :session_id"
+    else:
+        # If no session_id, only search in analyses without session_id
+        where = "a.session_id IS NULL"
+    params = {"session_id": session_id}
+    if analysis_id:
+        where += " AND c.analysis_id = :analysis_id"
+        params["analysis_id"] = analysis_id
+    return where, params
+
+
+_RESULT_COLUMNS = """
+    c.id AS clause_id, c.analysis_id, a.original_filename AS analysis_filename,
+    c.clause_text, c.clause_index, c.risk_label, c.risk_score,
+    c.explanation, c.suggested_mitigation
+"""
+
+
+def _with_rendered_snippet(row) -> Dict:
+    """Result dict for a full-text search row, with its snippet rendered."""
+    result = dict(row._mapping)
+    result["snippet"] = _render_snippet(result["snippet"])
+    return result
+
+
+async def _search_sqlite(db: AsyncSession, terms: List[str], session_id, analysis_id, limit) -> List[Dict]:
+    # Quote each term (so FTS5 syntax in user input is literal) and prefix-match it
+    match = " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+    where, params = _scope(session_id, analysis_id)
+    sql = f"""
+        SELECT {_RESULT_COLUMNS},
+            snippet(clauses_fts, -1, :hl_start, :hl_end, '...', 24) AS snippet
+        FROM clauses_fts
+        JOIN clauses c ON c.id = clauses_fts.rowid
+        JOIN analyses a ON a.id = c.analysis_id
+        WHERE clauses_fts MATCH :match AND {where}
+        ORDER BY bm25(clauses_fts, 10.0, 2.0, 2.0)
+        LIMIT :limit
+    """
+    params.update(match=match, limit=limit, hl_start=_MATCH_START, hl_end=_MATCH_END)
+    return [_with_rendered_snippet(row) for row in await db.execute(text(sql), params)]
+
+
+async def _search_postgres(db: AsyncSession, terms: List[str], session_id, analysis_id, limit) -> List[Dict]:
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    where, params = _scope(session_id, analysis_id)
+    sql = f"""
+        SELECT {_RESULT_COLUMNS},
+            ts_headline('english', c.clause_text, q,
+                'StartSel=' || :hl_start || ', StopSel=' || :hl_end || ', MaxWords=35, MinWords=15') AS snippet
+        FROM clauses c
+        JOIN analyses a ON a.id = c.analysis_id,
+            to_tsquery('english', :tsquery) q
+        WHERE c.search_vector @@ q AND {where}
+        ORDER BY ts_rank(c.search_vector, q) DESC
+        LIMIT :limit
+    """
+    params.update(tsquery=tsquery, limit=limit, hl_start=_MATCH_START, hl_end=_MATCH_END)
+    return [_with_rendered_snippet(row) for row in await db.execute(text(sql), params)]
+
+
+async def _search_like(db: AsyncSession, terms: List[str], session_id, analysis_id, limit) -> List[Dict]:
+    """Unindexed search, used when no full-text index is available; every term must occur as a substring."""
+    clause_query = select(
+        Clause.id.label("clause_id"),
+        Clause.analysis_id,
+        Analysis.original_filename.label("analysis_filename"),
+        Clause.clause_text,
+        Clause.clause_index,
+        Clause.risk_label,
+        Clause.risk_score,
+        Clause.explanation,
+        Clause.suggested_mitigation,
+    ).join(Analysis, Analysis.id == Clause.analysis_id)
+    
+    if session_id:
+        clause_query = clause_query.where(Analysis.session_id == session_id)
+    else:
+        clause_query = clause_query.where(Analysis.session_id == None)
+    if analysis_id:
+        clause_query = clause_query.where(Clause.analysis_id == analysis_id)
+    
+    for term in terms:
+        search_term = f"%{term}%"
+        clause_query = clause_query.where(
+            or_(
+                Clause.clause_text.ilike(search_term),
+                Clause.explanation.ilike(search_term),
+                Clause.suggested_mitigation.ilike(search_term)
+            )
+        )
+    rows = await db.execute(clause_query.limit(limit))
+    return [{**row._asdict(), "snippet": _like_snippet(row.clause_text, terms)} for row in rows]
+
+
+async def search_clauses(
+    db: AsyncSession,
+    query: str,
+    session_id: Optional[str] = None,
+    analysis_id: Optional[int] = None,
+    limit: int = 50,
+) -> List[Dict]:
+    """
+    Search clause text, explanations and mitigations, best matches first.
+    
+    Each term is prefix-matched and all terms must match (the LIKE fallback
+    matches each term as a substring). Results come from a single query
+    joined to their analysis and include a snippet: clause text that is
+    HTML-escaped, with matched terms wrapped in <mark> tags.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    
+    dialect = db.get_bind().dialect.name
+    try:
+        if dialect == "sqlite":
+            return await _search_sqlite(db, terms, session_id, analysis_id, limit)
+        if dialect == "postgresql":
+            return await _search_postgres(db, terms, session_id, analysis_id, limit)
+    except DBAPIError as e:
+        # Index missing (e.g. FTS5 unavailable); fall back to LIKE
+        logger.warning(f"Full-text clause search failed, using LIKE: {e}")
+        await db.rollback()
+    return await _search_like(db, terms, session_id, analysis_id, limit)
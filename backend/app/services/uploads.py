@@ -0,0 +1,181 @@
+"""Upload storage."""
+import hashlib
+import logging
+import mimetypes
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple, Optional
+import aiofiles
+from fastapi import UploadFile
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.job import AnalysisJob
+from app.models.upload import Upload
+from app.services.artifacts import extraction_store
+from app.services.cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request per write
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadRejected(ValueError):
+    """Raised when an upload fails type or size validation."""
+
+
+class StoredUpload(NamedTuple):
+    """A file saved to the uploads directory."""
+    file_id: str
+    filename: str  # Stored name, "{file_id}_{original_filename}"
+    original_filename: str
+    file_path: str
+    size: int
+    content_hash: str  # SHA-256 hex digest of the content
+    mime_type: Optional[str]
+
+
+def validate_extension(filename: str) -> None:
+    """Raise UploadRejected if the file type is not allowed."""
+    file_ext = Path(filename).suffix.lower().lstrip(".")
+    if file_ext not in settings.allowed_extensions_list:
+        raise UploadRejected(f"File type .{file_ext} not allowed. Allowed: {settings.allowed_extensions}")
+
+
+async def store_upload(file: UploadFile) -> StoredUpload:
+    """
+    Stream an upload to the uploads directory.
+    
+    The file is written in chunks to a temporary name and moved into place
+    once complete, so the size limit is enforced without holding the whole
+    upload in memory and a partial file is never visible under its final name.
+    The content is hashed as it is copied.
+    """
+    validate_extension(file.filename)
+    
+    file_id = str(uuid.uuid4())
+    safe_filename = f"{file_id}_{file.filename}"
+    file_path = os.path.join(settings.uploads_dir, safe_filename)
+    tmp_path = os.path.join(settings.uploads_dir, f"{file_id}.part")
+    
+    os.makedirs(settings.uploads_dir, exist_ok=True)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.max_upload_size_bytes:
+                    raise UploadRejected(f"File size exceeds maximum of {settings.max_upload_size_mb}MB")
+                digest.update(chunk)
+                await out.write(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    logger.info(f"File uploaded: {safe_filename} ({size} bytes)")
+    mime_type = file.content_type or mimetypes.guess_type(file.filename)[0]
+    return StoredUpload(file_id, safe_filename, file.filename, file_path, size, digest.hexdigest(), mime_type)
+
+
+def register_upload(db: Session, stored: StoredUpload, session_id: Optional[str] = None) -> Upload:
+    """Record a stored upload in the registry."""
+    upload = Upload(
+        id=stored.file_id,
+        session_id=session_id,
+        filename=stored.filename,
+        original_filename=stored.original_filename,
+        file_path=stored.file_path,
+        size=stored.size,
+        content_hash=stored.content_hash,
+        mime_type=stored.mime_type,
+    )
+    db.add(upload)
+    db.commit()
+    return upload
+
+
+def find_upload(db: Session, file_id: str) -> Optional[Upload]:
+    """
+    Return the registered upload for file_id, or None.
+    
+    Files stored before the registry existed are found by name once and
+    registered, so later lookups are a primary key read.
+    """
+    upload = db.get(Upload, file_id)
+    if upload is not None:
+        return upload
+    
+    # file_id is interpolated into a glob below, so only accept real UUIDs
+    try:
+        uuid.UUID(file_id)
+    except ValueError:
+        return None
+    
+    matching_files = list(Path(settings.uploads_dir).glob(f"{file_id}_*"))
+    if not matching_files:
+        return None
+    
+    path = matching_files[0]
+    original_filename = path.name.replace(f"{file_id}_", "", 1)
+    stored = StoredUpload(
+        file_id,
+        path.name,
+        original_filename,
+        str(path),
+        path.stat().st_size,
+        hash_file(str(path)),
+        mimetypes.guess_type(original_filename)[0],
+    )
+    logger.info(f"Registered legacy upload {path.name}")
+    return register_upload(db, stored)
+
+
+def mark_extraction(db: Session, file_id: str, extraction_status: str) -> None:
+    """Record whether a registered upload could be extracted ("extracted" or "failed")."""
+    db.query(Upload).filter(Upload.id == file_id).update(
+        {"extraction_status": extraction_status}, synchronize_session=False
+    )
+    db.commit()
+
+
+def collect_expired_uploads(db: Session, retention_days: int) -> int:
+    """
+    Delete uploads older than retention_days, and their files.
+    
+    Uploads with a queued or running analysis job are kept. Extraction
+    artifacts of removed files are deleted unless another upload has the same
+    content. Stored analyses are not affected. Returns the number of uploads
+    removed.
+    """
+    if retention_days <= 0:
+        return 0
+    
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    active = db.query(AnalysisJob.file_id).filter(AnalysisJob.status.in_(["queued", "running"]))
+    expired = db.query(Upload).filter(Upload.created_at < cutoff, ~Upload.id.in_(active)).all()
+    
+    removed_hashes = set()
+    for upload in expired:
+        try:
+            if os.path.exists(upload.file_path):
+                os.remove(upload.file_path)
+        except OSError as e:
+            logger.warning(f"Could not delete expired upload {upload.file_path}: {e}")
+            continue
+        removed_hashes.add(upload.content_hash)
+        db.delete(upload)
+    db.commit()
+    
+    if removed_hashes:
+        kept = {row[0] for row in db.query(Upload.content_hash).filter(Upload.content_hash.in_(removed_hashes))}
+        for content_hash in removed_hashes - kept:
+            extraction_store.delete(content_hash)
+    
+    if expired:
+        logger.info(f"Removed {len(expired)} expired uploads")
+    return len(expired)
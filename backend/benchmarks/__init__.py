@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for extraction, segmentation, risk analysis and the API.
+
+Run from the backend directory:
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --baseline baseline.json
+"""
@@ -0,0 +1,136 @@
+"""Run the benchmarks: python -m benchmarks --help."""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+from benchmarks.cases import FORMAT_KINDS, KINDS, SkipCase, case_ids, open_case
+from benchmarks.corpus import FORMATS, SIZES, prepare_documents
+from benchmarks.harness import (
+    DEFAULT_THRESHOLD,
+    compare,
+    format_report,
+    load_results,
+    measure,
+    peak_rss_mb,
+    save_results,
+)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def isolated_environment(workdir: Path) -> Dict[str, str]:
+    """
+    Environment for case processes.
+    
+    A scratch database, uploads and cache directory under workdir, and no
+    result, artifact or clause caching, so every run does the full work.
+    """
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{workdir / 'benchmark.db'}",
+        "UPLOADS_DIR": str(workdir / "uploads"),
+        "CACHE_DIR": str(workdir / "cache"),
+        "ANALYSIS_CACHE_ENABLED": "false",
+        "EXTRACTION_ARTIFACTS_ENABLED": "false",
+        "CLAUSE_CACHE_SIZE": "0",
+        "LOG_LEVEL": "WARNING",
+    })
+    return env
+
+
+def run_case(case_id: str, workdir: Path, repeat: int, warmup: int) -> Dict:
+    """Run one case in a fresh interpreter, so its imports and peak RSS are its own."""
+    command = [
+        sys.executable, "-m", "benchmarks",
+        "--worker", case_id,
+        "--workdir", str(workdir),
+        "--repeat", str(repeat),
+        "--warmup", str(warmup),
+    ]
+    completed = subprocess.run(
+        command, cwd=BACKEND_DIR, env=isolated_environment(workdir), capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return {"failed": error[-1] if error else f"exit code {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_worker(case_id: str, workdir: Path, repeat: int, warmup: int) -> None:
+    """Measure one case in this process and print its result as JSON."""
+    try:
+        with open_case(case_id, workdir) as workload:
+            result = measure(workload, repeat=repeat, warmup=warmup)
+        result["peak_rss_mb"] = peak_rss_mb()
+    except SkipCase as e:
+        result = {"skipped": str(e)}
+    print(json.dumps(result))
+
+
+def _choices(value: str, allowed) -> list:
+    """Parse a comma-separated option, rejecting values not in allowed."""
+    chosen = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in chosen if item not in allowed]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown {', '.join(unknown)} (choose from {', '.join(allowed)})")
+    return chosen
+
+
+def main():
+    """Run the selected cases, print a report and save or compare results."""
+    parser = argparse.ArgumentParser(description="Benchmark extraction, segmentation, analysis and the API")
+    parser.add_argument("--cases", type=lambda v: _choices(v, KINDS), default=list(KINDS),
+                        help=f"Comma-separated case kinds ({', '.join(KINDS)})")
+    parser.add_argument("--sizes", type=lambda v: _choices(v, SIZES), default=list(SIZES),
+                        help=f"Comma-separated contract sizes ({', '.join(SIZES)})")
+    parser.add_argument("--formats", type=lambda v: _choices(v, FORMATS), default=list(FORMATS),
+                        help=f"Comma-separated formats for extract and api cases ({', '.join(FORMATS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case")
+    parser.add_argument("--output", type=Path, help="Save results to this JSON baseline file")
+    parser.add_argument("--baseline", type=Path, help="Compare results with this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change flagged as a regression")
+    parser.add_argument("--workdir", type=Path, help="Keep documents and scratch data here (default: a temp dir)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args.worker, args.workdir, args.repeat, args.warmup)
+        return
+    
+    baseline = load_results(args.baseline) if args.baseline else None
+    with tempfile.TemporaryDirectory(prefix="benchmarks-") as tmp:
+        workdir = (args.workdir or Path(tmp)).resolve()
+        formats = set(args.formats) if any(kind in FORMAT_KINDS for kind in args.cases) else set()
+        if any(kind not in FORMAT_KINDS for kind in args.cases):
+            formats.add("txt")
+        prepare_documents(workdir, args.sizes, sorted(formats))
+        (workdir / "benchmark.db").unlink(missing_ok=True)
+        
+        results = {}
+        for case_id in case_ids(args.cases, args.sizes, args.formats):
+            print(f"Running {case_id}...", file=sys.stderr, flush=True)
+            results[case_id] = run_case(case_id, workdir, args.repeat, args.warmup)
+    
+    print(format_report(results, baseline))
+    if args.output:
+        save_results(args.output, results, repeat=args.repeat, warmup=args.warmup)
+        print(f"\nResults saved to {args.output}")
+    
+    failed = [case_id for case_id, result in results.items() if result.get("failed")]
+    regressions = compare(baseline, results, args.threshold) if baseline else []
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline} (threshold {args.threshold:.0%}):")
+        for r in regressions:
+            print(f"  {r.case} {r.metric}: {r.baseline:g} -> {r.current:g} ({r.change:+.1%} worse)")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
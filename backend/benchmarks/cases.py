@@ -0,0 +1,138 @@
+"""Benchmark cases: the operation each one times, on which synthetic contract."""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import ContextManager, Iterable, List
+from benchmarks.corpus import document_path
+from benchmarks.harness import Workload
+
+# Case kinds; extract and api run once per document format, the others on the TXT contract
+KINDS = ("extract", "segment", "rules", "ml", "api")
+FORMAT_KINDS = ("extract", "api")
+
+
+class SkipCase(Exception):
+    """Raised when a case cannot run in this environment (e.g. no trained model)."""
+
+
+def case_ids(kinds: Iterable[str], sizes: Iterable[str], formats: Iterable[str]) -> List[str]:
+    """Case ids ("kind/size" or "kind/format/size") for every combination requested."""
+    ids = []
+    for kind in kinds:
+        for size in sizes:
+            if kind in FORMAT_KINDS:
+                ids.extend(f"{kind}/{fmt}/{size}" for fmt in formats)
+            else:
+                ids.append(f"{kind}/{size}")
+    return ids
+
+
+def _contract_clauses(workdir: Path, size: str) -> List[str]:
+    """Clauses of the TXT contract of a size, as the analyzers receive them."""
+    from app.services.extract import DocumentExtractor
+    
+    text = document_path(workdir, size, "txt").read_text(encoding="utf-8")
+    return DocumentExtractor.segment_clauses(text)
+
+
+@contextmanager
+def _extract(workdir: Path, size: str, fmt: str):
+    """DocumentExtractor.extract_text on the contract file."""
+    from app.services.extract import DocumentExtractor
+    
+    path = document_path(workdir, size, fmt)
+    yield Workload(lambda: DocumentExtractor.extract_text(str(path)), path.stat().st_size / 1e6, "MB")
+
+
+@contextmanager
+def _segment(workdir: Path, size: str):
+    """DocumentExtractor.segment_clauses on the contract text."""
+    from app.services.extract import DocumentExtractor
+    
+    text = document_path(workdir, size, "txt").read_text(encoding="utf-8")
+    yield Workload(lambda: DocumentExtractor.segment_clauses(text), len(text.encode("utf-8")) / 1e6, "MB")
+
+
+@contextmanager
+def _rules(workdir: Path, size: str):
+    """RuleBasedAnalyzer.analyze_clauses on the contract clauses, with the clause memo cleared."""
+    from app.services.analysis import RuleBasedAnalyzer
+    from app.services.cache import clause_cache
+    
+    clauses = _contract_clauses(workdir, size)
+    analyzer = RuleBasedAnalyzer()
+    yield Workload(lambda: analyzer.analyze_clauses(clauses), len(clauses), "clauses", before=clause_cache.clear)
+
+
+@contextmanager
+def _ml(workdir: Path, size: str):
+    """RiskClassifier.analyze_clauses on the contract clauses, with the clause memo and token cache cleared."""
+    try:
+        from app.ml.infer import RiskClassifier
+    except ImportError as e:
+        raise SkipCase(f"ML dependencies not installed ({e})")
+    from app.services.cache import clause_cache
+    
+    classifier = RiskClassifier()
+    if not classifier.classifier:
+        raise SkipCase(f"no model at {classifier.model_path}")
+    clauses = _contract_clauses(workdir, size)
+    
+    def before():
+        # Every run tokenizes and scores the clauses from scratch
+        clause_cache.clear()
+        classifier.engine.token_cache.clear()
+    
+    yield Workload(
+        lambda: classifier.analyze_clauses(clauses),
+        len(clauses),
+        "clauses",
+        before=before,
+        info={"model": classifier.fingerprint, "backend": classifier.classifier.name},
+    )
+
+
+@contextmanager
+def _api(workdir: Path, size: str, fmt: str):
+    """POST /api/analyze end to end (extraction, analysis, storage) for an uploaded contract."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import pipeline
+    
+    path = document_path(workdir, size, fmt)
+    with TestClient(app) as client:
+        with open(path, "rb") as f:
+            response = client.post("/api/upload", files={"file": (path.name, f)})
+        response.raise_for_status()
+        file_id = response.json()["file_id"]
+        
+        def analyze():
+            response = client.post("/api/analyze", params={"file_id": file_id})
+            response.raise_for_status()
+            return response
+        
+        total_clauses = analyze().json()["analysis"]["total_clauses"]
+        yield Workload(
+            analyze,
+            total_clauses,
+            "clauses",
+            info={"model_version": pipeline.analysis_service.model_version},
+        )
+
+
+_CASES = {
+    "extract": _extract,
+    "segment": _segment,
+    "rules": _rules,
+    "ml": _ml,
+    "api": _api,
+}
+
+
+def open_case(case_id: str, workdir: Path) -> ContextManager[Workload]:
+    """Set up the case with this id; the context yields its Workload."""
+    kind, *params = case_id.split("/")
+    if kind in FORMAT_KINDS:
+        fmt, size = params
+        return _CASES[kind](workdir, size, fmt)
+    (size,) = params
+    return _CASES[kind](workdir, size)
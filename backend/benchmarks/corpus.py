@@ -0,0 +1,104 @@
+"""Synthetic contracts built from the ml_data clause datasets."""
+import csv
+import random
+import textwrap
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+ML_DATA_DIR = Path(__file__).resolve().parents[2] / "ml_data"
+SAMPLE_CONTRACT = ML_DATA_DIR / "sample_contract.txt"
+
+# Clauses drawn from the datasets for each contract size
+SIZES = {"small": 25, "medium": 250, "large": 2500}
+FORMATS = ("txt", "docx", "pdf")
+
+# Clauses per ARTICLE section of a synthetic contract
+ARTICLE_CLAUSES = 12
+# PDF layout: characters per line and lines per page
+PDF_LINE_WIDTH = 95
+PDF_PAGE_LINES = 55
+
+
+def load_clauses(data_dir: Path = ML_DATA_DIR) -> List[str]:
+    """Return the distinct clause texts in every CSV in data_dir, in a fixed order."""
+    clauses = []
+    seen = set()
+    for path in sorted(data_dir.glob("*.csv")):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                clause = " ".join((row.get("clause_text") or "").split())
+                if len(clause) > 15 and clause not in seen:
+                    seen.add(clause)
+                    clauses.append(clause)
+    return clauses
+
+
+def build_contract(clauses: List[str], n_clauses: int, seed: int = 0) -> str:
+    """
+    Build a contract of n_clauses clauses drawn from clauses.
+    
+    The text opens with sample_contract.txt and continues with ARTICLE
+    sections, alternating decimal (1.1, 1.2) and numbered (1., 2)) clauses
+    so every segmentation path is exercised. The same seed gives the same text.
+    """
+    rng = random.Random(seed)
+    lines = [SAMPLE_CONTRACT.read_text(encoding="utf-8").strip(), ""]
+    
+    for article, start in enumerate(range(0, n_clauses, ARTICLE_CLAUSES), start=1):
+        lines.append(f"ARTICLE {article}")
+        for number in range(1, min(ARTICLE_CLAUSES, n_clauses - start) + 1):
+            clause = rng.choice(clauses)
+            if article % 2:
+                lines.append(f"{article}.{number} {clause}")
+            else:
+                lines.append(f"{number}{'.' if number % 3 else ')'} {clause}")
+        lines.append("")
+    
+    lines.append("IN WITNESS WHEREOF, the parties have executed this Agreement as of the date first written above.")
+    return "\n".join(lines)
+
+
+def write_document(text: str, path: Path) -> Path:
+    """Write text as a TXT, DOCX or PDF file, chosen by the extension of path."""
+    suffix = path.suffix.lower()
+    if suffix == ".txt":
+        path.write_text(text, encoding="utf-8")
+    elif suffix == ".docx":
+        from docx import Document
+        
+        doc = Document()
+        for line in text.split("\n"):
+            doc.add_paragraph(line)
+        doc.save(str(path))
+    elif suffix == ".pdf":
+        import fitz
+        
+        wrapped = []
+        for line in text.split("\n"):
+            wrapped.extend(textwrap.wrap(line, PDF_LINE_WIDTH) or [""])
+        doc = fitz.open()
+        for start in range(0, len(wrapped), PDF_PAGE_LINES):
+            page = doc.new_page()
+            page.insert_text((50, 60), "\n".join(wrapped[start:start + PDF_PAGE_LINES]), fontsize=9)
+        doc.save(str(path))
+        doc.close()
+    else:
+        raise ValueError(f"Unsupported document format: {suffix}")
+    return path
+
+
+def document_path(workdir: Path, size: str, fmt: str) -> Path:
+    """Where the synthetic contract of a size and format is stored in workdir."""
+    return workdir / "documents" / f"contract_{size}.{fmt}"
+
+
+def prepare_documents(workdir: Path, sizes: Iterable[str], formats: Iterable[str], clauses: Optional[List[str]] = None) -> None:
+    """Write the synthetic contract of each size in each format under workdir."""
+    clauses = clauses or load_clauses()
+    (workdir / "documents").mkdir(parents=True, exist_ok=True)
+    for size in sizes:
+        text = build_contract(clauses, SIZES[size])
+        for fmt in formats:
+            path = document_path(workdir, size, fmt)
+            if not path.exists():
+                write_document(text, path)
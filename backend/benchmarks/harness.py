@@ -0,0 +1,150 @@
+"""Timing, memory and baseline comparison for benchmarks."""
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Relative change flagged as a regression by default
+DEFAULT_THRESHOLD = 0.15
+# Slowdowns smaller than this are timer noise, never regressions
+MIN_DELTA_MS = 1.0
+
+
+class Workload(NamedTuple):
+    """One benchmarked operation: run() processes units of work."""
+    run: Callable[[], object]
+    units: float
+    unit: str  # Throughput is reported in this unit per second
+    before: Optional[Callable[[], None]] = None  # Untimed reset before each run
+    info: Optional[Dict] = None  # Extra fields recorded with the result
+
+
+class Regression(NamedTuple):
+    """A metric of a case that got worse than the baseline by more than the threshold."""
+    case: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # Relative change, positive when worse
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def measure(workload: Workload, repeat: int = 5, warmup: int = 1) -> Dict:
+    """
+    Time workload.run and return latency percentiles and throughput.
+    
+    Warmup runs (imports, caches, worker pools) are not timed.
+    """
+    for _ in range(warmup):
+        if workload.before:
+            workload.before()
+        workload.run()
+    
+    timings = []
+    for _ in range(repeat):
+        if workload.before:
+            workload.before()
+        start = time.perf_counter()
+        workload.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    p50, p95 = np.percentile(timings, [50, 95])
+    total_seconds = sum(timings) / 1000
+    result = {
+        "runs": repeat,
+        "units": workload.units,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "mean_ms": round(total_seconds * 1000 / repeat, 3),
+        "throughput": round(workload.units * repeat / total_seconds, 3) if total_seconds else None,
+        "throughput_unit": f"{workload.unit}/s",
+    }
+    result.update(workload.info or {})
+    return result
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float = DEFAULT_THRESHOLD) -> List[Regression]:
+    """
+    Return the metrics of current results that regressed against baseline.
+    
+    Latency and peak RSS regress when they grow by more than threshold,
+    throughput when it drops by more than threshold. Cases missing, skipped
+    or failed on either side are not compared.
+    """
+    regressions = []
+    for case, now in current.items():
+        before = baseline.get(case)
+        if not before or "p50_ms" not in before or "p50_ms" not in now:
+            continue
+        
+        for metric in ("p50_ms", "p95_ms"):
+            old, new = before.get(metric), now.get(metric)
+            if old and new and new - old > max(old * threshold, MIN_DELTA_MS):
+                regressions.append(Regression(case, metric, old, new, new / old - 1))
+        
+        old, new = before.get("throughput"), now.get("throughput")
+        slower_ms = now["mean_ms"] - before["mean_ms"]
+        if old and new and new < old * (1 - threshold) and slower_ms > MIN_DELTA_MS:
+            regressions.append(Regression(case, "throughput", old, new, 1 - new / old))
+        
+        old, new = before.get("peak_rss_mb"), now.get("peak_rss_mb")
+        if old and new and new > old * (1 + threshold):
+            regressions.append(Regression(case, "peak_rss_mb", old, new, new / old - 1))
+    return regressions
+
+
+def format_report(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> str:
+    """Render results as a table, with the p50 change against baseline if given."""
+    header = f"{'case':<22} {'p50 ms':>10} {'p95 ms':>10} {'throughput':>20} {'peak RSS':>10}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    lines = [header, "-" * len(header)]
+    for case, result in results.items():
+        if "p50_ms" not in result:
+            status = "skipped" if result.get("skipped") else "failed"
+            lines.append(f"{case:<22} {status}: {result.get(status)}")
+            continue
+        rss = f"{result['peak_rss_mb']:.0f} MiB" if result.get("peak_rss_mb") else "-"
+        throughput = f"{result['throughput']:.2f} {result['throughput_unit']}" if result.get("throughput") else "-"
+        line = f"{case:<22} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {throughput:>20} {rss:>10}"
+        old = (baseline or {}).get(case, {}).get("p50_ms")
+        if old:
+            line += f" {result['p50_ms'] / old - 1:>+11.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def save_results(path: Path, results: Dict[str, Dict], **meta) -> None:
+    """Write results to a JSON baseline file, with the environment they were measured in."""
+    payload = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **meta,
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def load_results(path: Path) -> Dict[str, Dict]:
+    """Read the results of a JSON baseline file written by save_results."""
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
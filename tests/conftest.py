@@ -1,9 +1,79 @@
 """Pytest configuration."""
+import os
 import pytest
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 
 # Add backend to path
 backend_path = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_path))
 
+# Keep uploads, cache artifacts and databases written by the tests out of the
+# working tree; settings are read when the app is first imported
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="contract-analyzer-tests-")
+os.environ["CONTRACT_ANALYZER_TEST_DIR"] = TEST_DATA_DIR
+os.environ["UPLOADS_DIR"] = os.path.join(TEST_DATA_DIR, "uploads")
+os.environ["CACHE_DIR"] = os.path.join(TEST_DATA_DIR, "cache")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DATA_DIR, 'contract_analyzer.db')}"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Remove the test data directory."""
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
+
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Count SQL statements run on an engine.
+    
+    Usage:
+        with count_queries(engine) as statements:
+            ...
+        assert len(statements) <= 3
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+    
+    @contextmanager
+    def counter(engine):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    
+    return counter
+
+
+@pytest.fixture
+def tiny_model(tmp_path):
+    """Save a small randomly initialized DistilBERT classifier with its tokenizer."""
+    torch = pytest.importorskip("torch")
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+    
+    words = (
+        "the supplier customer party shall may must deliver pay terminate indemnify hold harmless "
+        "agreement goods rent notice days thirty written any all claims without limitation"
+    ).split()
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+    tokenizer = DistilBertTokenizerFast(vocab_file=str(vocab_file))
+    
+    torch.manual_seed(0)
+    config = DistilBertConfig(
+        vocab_size=len(words) + 5, dim=32, hidden_dim=64, n_layers=2, n_heads=2,
+        num_labels=3, max_position_embeddings=128,
+    )
+    model_path = tmp_path / "risk_classifier"
+    DistilBertForSequenceClassification(config).save_pretrained(model_path)
+    tokenizer.save_pretrained(model_path)
+    return str(model_path)
@@ -1,24 +1,51 @@
 """Tests for API endpoints."""
 import pytest
 import os
+import hashlib
+import json
 import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.db import Base, get_db
+from app.db import Base, get_db, get_sync_db
+from app.core.config import settings
+from app.models.analysis import Analysis, Clause
+from app.models.job import AnalysisJob, AnalysisJobChunk
+from app.models.upload import Upload
+from app.services.artifacts import Extraction, extraction_store
+from app.services.extract import DocumentExtractor
+from app.services.jobs import job_manager
+from app.services.search import ensure_search_index
+from app.services.uploads import collect_expired_uploads
 
-# Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Create test database (in a temporary directory, outside the working tree)
+TEST_DB_PATH = os.path.join(os.environ["CONTRACT_ANALYZER_TEST_DIR"], "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 test_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+# TestClient may run each request on a new event loop, so don't pool async connections
+async_test_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_test_engine, autoflush=False, expire_on_commit=False)
 
 Base.metadata.create_all(bind=test_engine)
+ensure_search_index(test_engine)
 
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+def override_get_sync_db():
+    """Override sync database dependency for testing."""
     try:
         db = TestingSessionLocal()
         yield db
@@ -27,6 +54,8 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_sync_db] = override_get_sync_db
+job_manager.session_factory = TestingSessionLocal
 
 client = TestClient(app)
 
@@ -51,6 +80,8 @@ def test_health_check():
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
+    assert data["ready"] is True
+    assert data["model"]["state"] in ("not_loaded", "ready", "unavailable")
 
 
 def test_upload_file(test_file):
@@ -68,6 +99,28 @@ def test_upload_file(test_file):
     assert data["message"] == "File uploaded successfully"
 
 
+def test_upload_file_hash_and_size_limit(test_file, monkeypatch):
+    """Test upload reports the content hash and rejects oversized files."""
+    with open(test_file, 'rb') as f:
+        content = f.read()
+    
+    response = client.post(
+        "/api/upload",
+        files={"file": ("test.txt", content, "text/plain")}
+    )
+    assert response.status_code == 200
+    assert response.json()["content_hash"] == hashlib.sha256(content).hexdigest()
+    
+    monkeypatch.setattr(settings, "max_upload_size_mb", 0)
+    before = set(os.listdir(settings.uploads_dir))
+    response = client.post(
+        "/api/upload",
+        files={"file": ("test.txt", content, "text/plain")}
+    )
+    assert response.status_code == 400
+    assert set(os.listdir(settings.uploads_dir)) == before
+
+
 def test_upload_invalid_file_type():
     """Test upload with invalid file type."""
     with tempfile.NamedTemporaryFile(mode='w', suffix='.exe', delete=False) as f:
@@ -128,6 +181,24 @@ def test_analyze_document(test_file):
     assert "clauses" in data["analysis"]
 
 
+def test_analyze_same_content_twice(test_file):
+    """Re-analyzing identical content returns the same result."""
+    results = []
+    for _ in range(2):
+        with open(test_file, 'rb') as f:
+            upload_response = client.post(
+                "/api/upload",
+                files={"file": ("test.txt", f, "text/plain")}
+            )
+        file_id = upload_response.json()["file_id"]
+        response = client.post(f"/api/analyze?file_id={file_id}")
+        assert response.status_code == 200
+        results.append(response.json())
+    
+    assert results[0]["analysis_id"] != results[1]["analysis_id"]
+    assert results[0]["analysis"] == results[1]["analysis"]
+
+
 def test_get_history():
     """Test history endpoint."""
     response = client.get("/api/history")
@@ -156,3 +227,391 @@ def test_get_analysis_by_id(test_file):
     assert data["analysis_id"] == analysis_id
     assert "analysis" in data
 
+
+
+def _wait_for_job(job_id, timeout=30):
+    """Poll a background job until it finishes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = client.get(f"/api/jobs/{job_id}").json()
+        if data["status"] in ("completed", "failed"):
+            return data
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_analysis_job(test_file):
+    """Test queuing a background analysis job and polling it to completion."""
+    with open(test_file, 'rb') as f:
+        upload_response = client.post(
+            "/api/upload?analyze=true",
+            files={"file": ("test.txt", f, "text/plain")}
+        )
+    
+    assert upload_response.status_code == 200
+    job_id = upload_response.json()["job_id"]
+    assert job_id
+    
+    data = _wait_for_job(job_id)
+    assert data["status"] == "completed"
+    assert data["stage"] == "done"
+    assert data["processed_clauses"] == data["total_clauses"]
+    assert len(data["clauses"]) == data["total_clauses"]
+    
+    # Results are persisted like a synchronous analysis
+    response = client.get(f"/api/history/{data['analysis_id']}")
+    assert response.status_code == 200
+    assert response.json()["analysis"]["total_clauses"] == data["total_clauses"]
+    
+    # Jobs are isolated by session
+    response = client.get(f"/api/jobs/{job_id}", headers={"X-Session-ID": "other-session"})
+    assert response.status_code == 404
+
+
+def test_create_job_missing_file():
+    """Test queuing a job for an unknown file."""
+    response = client.post("/api/jobs?file_id=does-not-exist")
+    assert response.status_code == 404
+
+
+def test_running_job_returns_partial_results_from_chunks():
+    """Test a running job serves the clauses of its stored chunks from the requested offset."""
+    job_id = str(uuid.uuid4())
+    db = TestingSessionLocal()
+    db.add(AnalysisJob(
+        id=job_id, file_id="f", filename="f.txt", original_filename="f.txt", file_path="f.txt",
+        status="running", stage="classify", total_clauses=10, processed_clauses=5,
+    ))
+    for first, count in ((0, 3), (3, 2)):
+        results = [
+            {"clause_text": f"Clause {i}", "clause_index": i, "risk_label": "LOW", "risk_score": 10.0,
+             "explanation": "", "suggested_mitigation": ""}
+            for i in range(first, first + count)
+        ]
+        db.add(AnalysisJobChunk(job_id=job_id, first_clause=first, clause_count=count, results=json.dumps(results)))
+    db.commit()
+    db.close()
+    
+    data = client.get(f"/api/jobs/{job_id}").json()
+    assert [c["clause_index"] for c in data["clauses"]] == [0, 1, 2, 3, 4]
+    data = client.get(f"/api/jobs/{job_id}?offset=2").json()
+    assert [c["clause_index"] for c in data["clauses"]] == [2, 3, 4]
+    data = client.get(f"/api/jobs/{job_id}?offset=5").json()
+    assert data["clauses"] == []
+
+
+def test_analyze_document_stream(test_file):
+    """Test streaming analysis emits clause batches and a final summary."""
+    with open(test_file, 'rb') as f:
+        upload_response = client.post(
+            "/api/upload",
+            files={"file": ("test.txt", f, "text/plain")}
+        )
+    
+    file_id = upload_response.json()["file_id"]
+    
+    response = client.post(f"/api/analyze/stream?file_id={file_id}&format=ndjson")
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    
+    progress = [e for e in events if e["event"] == "progress"]
+    complete = events[-1]
+    assert complete["event"] == "complete"
+    assert progress and progress[-1]["processed"] == complete["total_clauses"]
+    assert sum(len(e["clauses"]) for e in progress) == complete["total_clauses"]
+    assert progress[-1]["global_risk_score"] == complete["global_risk_score"]
+    
+    # The streamed analysis is stored like a synchronous one
+    response = client.get(f"/api/history/{complete['analysis_id']}")
+    assert response.status_code == 200
+    assert response.json()["analysis"]["global_risk_score"] == complete["global_risk_score"]
+    
+    response = client.post(f"/api/analyze/stream?file_id={file_id}")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: complete" in response.text
+
+
+def test_batch_upload():
+    """Test batch upload queues valid files and reports per-document progress."""
+    files = []
+    for idx in range(2):
+        content = f"1. Party {idx} shall indemnify the other party.\n2. This agreement renews annually.".encode()
+        files.append(("files", (f"contract_{idx}.txt", content, "text/plain")))
+    files.append(("files", ("malware.exe", b"test", "application/x-msdownload")))
+    
+    response = client.post("/api/batch/upload", files=files)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["successful"] == 2
+    assert [r["status"] for r in data["results"]] == ["success", "success", "error"]
+    
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        batch = client.get(f"/api/batch/{data['batch_id']}").json()
+        if batch["status"] == "completed":
+            break
+        time.sleep(0.1)
+    
+    assert batch["status"] == "completed"
+    assert batch["completed_documents"] == 2
+    for document in batch["documents"]:
+        assert document["processed_clauses"] == document["total_clauses"] > 0
+        response = client.get(f"/api/history/{document['analysis_id']}")
+        assert response.status_code == 200
+
+
+def test_extract_registers_legacy_upload():
+    """Test files stored before the uploads registry are found and registered."""
+    file_id = str(uuid.uuid4())
+    path = os.path.join(settings.uploads_dir, f"{file_id}_legacy.txt")
+    with open(path, "w") as f:
+        f.write("1. The tenant shall pay rent monthly.\n2. The landlord shall maintain the premises.")
+    
+    response = client.post(f"/api/extract?file_id={file_id}")
+    assert response.status_code == 200
+    
+    db = TestingSessionLocal()
+    try:
+        upload = db.get(Upload, file_id)
+        assert upload.original_filename == "legacy.txt"
+        assert upload.extraction_status == "extracted"
+    finally:
+        db.close()
+    
+    # Lookups never glob arbitrary patterns
+    assert client.post("/api/extract?file_id=*").status_code == 404
+
+
+def test_collect_expired_uploads(tmp_path):
+    """Test the retention policy deletes old uploads, their files and their extraction artifacts."""
+    test_file = tmp_path / "contract.txt"
+    test_file.write_text(f"The party agrees to the terms of contract {uuid.uuid4()}.")
+    with open(test_file, 'rb') as f:
+        file_id = client.post(
+            "/api/upload",
+            files={"file": ("test.txt", f, "text/plain")}
+        ).json()["file_id"]
+    
+    db = TestingSessionLocal()
+    try:
+        upload = db.get(Upload, file_id)
+        upload.created_at = datetime.utcnow() - timedelta(days=30)
+        db.commit()
+        file_path = upload.file_path
+        
+        content_hash = upload.content_hash
+        extraction_store.set(content_hash, Extraction("text", ["clause"]))
+        
+        assert collect_expired_uploads(db, retention_days=7) >= 1
+        assert db.get(Upload, file_id) is None
+        assert not os.path.exists(file_path)
+        assert extraction_store.get(content_hash) is None
+    finally:
+        db.close()
+
+
+def test_analyze_reuses_extraction_artifact(test_file, monkeypatch):
+    """Test /api/analyze loads the artifact saved by /api/extract instead of re-parsing."""
+    with open(test_file, 'a') as f:
+        f.write(f"\nUnique marker {uuid.uuid4()} so no earlier artifact or analysis matches.")
+    with open(test_file, 'rb') as f:
+        file_id = client.post(
+            "/api/upload",
+            files={"file": ("test.txt", f, "text/plain")}
+        ).json()["file_id"]
+    
+    extract_response = client.post(f"/api/extract?file_id={file_id}")
+    assert extract_response.status_code == 200
+    
+    def fail(file_path):
+        raise AssertionError("document was parsed again")
+    
+    monkeypatch.setattr(DocumentExtractor, "iter_text", staticmethod(fail))
+    response = client.post(f"/api/analyze?file_id={file_id}")
+    assert response.status_code == 200
+    assert response.json()["analysis"]["total_clauses"] == extract_response.json()["clause_count"]
+
+
+def test_search_clauses():
+    """Test full-text clause search returns ranked, highlighted, session-scoped hits."""
+    session = {"X-Session-ID": f"search-{uuid.uuid4()}"}
+    content = (
+        "1. The supplier shall indemnify the customer against all third party claims.\n"
+        "2. Payment is due within thirty days of the invoice date.\n"
+        "3. Either party may terminate this agreement with written notice."
+    )
+    file_id = client.post(
+        "/api/upload",
+        files={"file": ("search.txt", content.encode(), "text/plain")},
+        headers=session,
+    ).json()["file_id"]
+    analysis_id = client.post(f"/api/analyze?file_id={file_id}", headers=session).json()["analysis_id"]
+    
+    response = client.get("/api/search/clauses?query=indemnif", headers=session)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 1
+    hit = data["results"][0]
+    assert hit["analysis_id"] == analysis_id
+    assert hit["analysis_filename"] == "search.txt"
+    assert "<mark>" in hit["snippet"]
+    
+    # All terms must match
+    response = client.get("/api/search/clauses?query=payment invoice", headers=session)
+    assert response.json()["count"] == 1
+    response = client.get("/api/search/clauses?query=payment indemnify", headers=session)
+    assert response.json()["count"] == 0
+    
+    # Other sessions cannot see these clauses
+    response = client.get("/api/search/clauses?query=indemnify", headers={"X-Session-ID": "someone-else"})
+    assert response.json()["count"] == 0
+
+
+def test_search_snippets_escape_clause_markup():
+    """Test markup in clause text is escaped in snippets; only the highlight tags are HTML."""
+    session = {"X-Session-ID": f"search-xss-{uuid.uuid4()}"}
+    content = "1. The supplier shall indemnify <script>alert('x')</script> the customer against all claims."
+    file_id = client.post(
+        "/api/upload",
+        files={"file": ("xss.txt", content.encode(), "text/plain")},
+        headers=session,
+    ).json()["file_id"]
+    client.post(f"/api/analyze?file_id={file_id}", headers=session)
+    
+    hit = client.get("/api/search/clauses?query=indemnify", headers=session).json()["results"][0]
+    assert "<script>" not in hit["snippet"]
+    assert "&lt;script&gt;" in hit["snippet"]
+    assert "<mark>indemnify</mark>" in hit["snippet"]
+
+
+def test_like_search_snippet_is_escaped():
+    """Test the LIKE fallback's snippet escapes clause text and highlights every term."""
+    from app.services.search import _like_snippet
+    
+    snippet = _like_snippet("Supplier <b>shall</b> pay & indemnify; payment is due.", ["pay", "indemn"])
+    assert snippet == (
+        "Supplier &lt;b&gt;shall&lt;/b&gt; <mark>pay</mark> &amp; <mark>indemn</mark>ify; "
+        "<mark>pay</mark>ment is due."
+    )
+    assert _like_snippet("No match here.", ["pay"]) is None
+
+
+def test_read_endpoints_use_constant_queries(count_queries):
+    """Bookmark, history and export reads don't issue a query per row."""
+    session = {"X-Session-ID": f"queries-{uuid.uuid4()}"}
+    content = "\n".join(f"{i}. The supplier shall deliver batch {i} within ten days." for i in range(1, 7))
+    file_id = client.post(
+        "/api/upload",
+        files={"file": ("queries.txt", content.encode(), "text/plain")},
+        headers=session,
+    ).json()["file_id"]
+    analysis_id = client.post(f"/api/analyze?file_id={file_id}", headers=session).json()["analysis_id"]
+    db = TestingSessionLocal()
+    try:
+        clause_ids = [c.id for c in db.query(Clause).filter(Clause.analysis_id == analysis_id)]
+    finally:
+        db.close()
+    
+    def bookmark(clause_id):
+        response = client.post(
+            "/api/bookmarks",
+            json={"clause_id": clause_id, "analysis_id": analysis_id},
+            headers=session,
+        )
+        assert response.status_code == 200
+    
+    bookmark(clause_ids[0])
+    with count_queries(async_test_engine.sync_engine) as few:
+        assert len(client.get("/api/bookmarks", headers=session).json()) == 1
+    for clause_id in clause_ids[1:]:
+        bookmark(clause_id)
+    with count_queries(async_test_engine.sync_engine) as many:
+        assert len(client.get("/api/bookmarks", headers=session).json()) == len(clause_ids)
+    assert len(many) == len(few) == 1
+    
+    for path in (f"/api/history/{analysis_id}", f"/api/export/{analysis_id}/json", f"/api/export/{analysis_id}/txt"):
+        with count_queries(async_test_engine.sync_engine) as statements:
+            assert client.get(path, headers=session).status_code == 200
+        assert len(statements) == 2, path
+
+
+def test_next_cursor_header_is_exposed_to_other_origins():
+    """Test browsers on the frontend origin may read the X-Next-Cursor pagination header."""
+    response = client.get("/api/history?limit=1", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 200
+    exposed = response.headers["Access-Control-Expose-Headers"].lower()
+    assert "x-next-cursor" in exposed
+
+
+def test_history_keyset_pagination():
+    """Test history pages follow X-Next-Cursor without gaps or repeats, ties included."""
+    session_id = f"pages-{uuid.uuid4()}"
+    created_at = datetime.utcnow()
+    db = TestingSessionLocal()
+    try:
+        # Two analyses per timestamp, so paging must break ties on id
+        analyses = [
+            Analysis(
+                session_id=session_id,
+                filename=f"doc{i}.txt",
+                original_filename=f"doc{i}.txt",
+                file_path=f"doc{i}.txt",
+                global_risk_score=10.0,
+                created_at=created_at - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ]
+        db.add_all(analyses)
+        db.commit()
+        expected = [a.id for a in sorted(analyses, key=lambda a: (a.created_at, a.id), reverse=True)]
+    finally:
+        db.close()
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/history", params=params, headers={"X-Session-ID": session_id})
+        assert response.status_code == 200
+        seen += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == expected
+    
+    response = client.get("/api/history?cursor=not-a-cursor", headers={"X-Session-ID": session_id})
+    assert response.status_code == 400
+
+
+def test_history_clause_paging_and_filter():
+    """Test /api/history/{id} pages clauses and filters them by risk label."""
+    session = {"X-Session-ID": f"clauses-{uuid.uuid4()}"}
+    content = "\n".join(f"{i}. The supplier shall deliver batch {i} within ten days." for i in range(1, 8))
+    file_id = client.post(
+        "/api/upload",
+        files={"file": ("paged.txt", content.encode(), "text/plain")},
+        headers=session,
+    ).json()["file_id"]
+    full = client.post(f"/api/analyze?file_id={file_id}", headers=session).json()
+    analysis_id = full["analysis_id"]
+    all_indexes = [c["clause_index"] for c in full["analysis"]["clauses"]]
+    
+    indexes = []
+    params = {"clause_limit": 3}
+    while True:
+        response = client.get(f"/api/history/{analysis_id}", params=params, headers=session)
+        assert response.status_code == 200
+        data = response.json()["analysis"]
+        assert data["total_clauses"] == len(all_indexes)
+        indexes += [c["clause_index"] for c in data["clauses"]]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["clause_after"] = response.headers["X-Next-Cursor"]
+    assert indexes == all_indexes
+    
+    label = full["analysis"]["clauses"][0]["risk_label"]
+    response = client.get(f"/api/history/{analysis_id}?risk_label={label}", headers=session)
+    clauses = response.json()["analysis"]["clauses"]
+    assert clauses and all(c["risk_label"] == label for c in clauses)
+    assert len(clauses) == sum(c["risk_label"] == label for c in full["analysis"]["clauses"])
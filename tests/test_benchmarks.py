@@ -0,0 +1,83 @@
+"""Tests for the benchmark harness."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+from benchmarks.corpus import build_contract, load_clauses
+from benchmarks.harness import Workload, compare, measure
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+
+def test_synthetic_contract_is_deterministic_and_segments():
+    """Test contracts are reproducible and split into at least their drawn clauses."""
+    from app.services.extract import DocumentExtractor
+    
+    clauses = load_clauses()
+    assert len(clauses) > 1000
+    text = build_contract(clauses, 30)
+    assert text == build_contract(clauses, 30)
+    assert "ARTICLE 3" in text
+    assert len(DocumentExtractor.segment_clauses(text)) >= 30
+
+
+def test_measure_reports_percentiles_and_throughput():
+    """Test measure times every run and resets state before each one."""
+    resets = []
+    result = measure(Workload(lambda: sum(range(1000)), 10, "items", before=lambda: resets.append(1)), repeat=4, warmup=1)
+    
+    assert len(resets) == 5
+    assert result["runs"] == 4
+    assert 0 < result["p50_ms"] <= result["p95_ms"]
+    assert result["throughput"] > 0
+    assert result["throughput_unit"] == "items/s"
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test slowdowns over the threshold are flagged, noise and improvements are not."""
+    def result(p50, throughput, rss=100.0):
+        return {"p50_ms": p50, "p95_ms": p50, "mean_ms": p50, "throughput": throughput, "peak_rss_mb": rss}
+    
+    baseline = {
+        "slower": result(100.0, 50.0),
+        "noise": result(0.5, 2000.0),
+        "faster": result(100.0, 50.0),
+        "memory": result(100.0, 50.0, rss=100.0),
+        "skipped": {"skipped": "no model"},
+    }
+    current = {
+        "slower": result(130.0, 38.0),
+        "noise": result(0.9, 1100.0),
+        "faster": result(60.0, 80.0),
+        "memory": result(100.0, 50.0, rss=150.0),
+        "skipped": result(1.0, 1.0),
+        "new": result(1.0, 1.0),
+    }
+    regressions = compare(baseline, current, threshold=0.15)
+    
+    assert {(r.case, r.metric) for r in regressions} == {
+        ("slower", "p50_ms"),
+        ("slower", "p95_ms"),
+        ("slower", "throughput"),
+        ("memory", "peak_rss_mb"),
+    }
+
+
+def test_cli_saves_and_compares_baseline(tmp_path):
+    """Test a benchmark run saves a JSON baseline that a later run compares against."""
+    output = tmp_path / "baseline.json"
+    command = [
+        sys.executable, "-m", "benchmarks",
+        "--cases", "segment", "--sizes", "small", "--repeat", "2",
+        "--workdir", str(tmp_path / "work"),
+    ]
+    completed = subprocess.run(command + ["--output", str(output)], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    
+    results = json.loads(output.read_text())["results"]
+    assert results["segment/small"]["throughput_unit"] == "MB/s"
+    assert results["segment/small"]["p50_ms"] > 0
+    
+    completed = subprocess.run(command + ["--baseline", str(output), "--threshold", "100"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    assert "p50 vs base" in completed.stdout
@@ -0,0 +1,142 @@
+"""Tests for the analysis result cache."""
+import inspect
+from app.services.analysis import RuleBasedAnalyzer
+from app.services.cache import AnalysisCache, ClauseResultCache, clause_cache, hash_file, make_cache_key
+
+
+def test_cache_key_changes_with_mode_and_model():
+    """Keys differ when the analysis mode or model version differs."""
+    base = make_cache_key("abc", "ml", "v1")
+    assert base == make_cache_key("abc", "ml", "v1")
+    assert base != make_cache_key("abc", "rules", "v1")
+    assert base != make_cache_key("abc", "ml", "v2")
+    assert base != make_cache_key("abd", "ml", "v1")
+
+
+def test_segmenter_change_changes_extractor_version(monkeypatch, tmp_path):
+    """Editing segmentation code outside DocumentExtractor invalidates artifacts and cached results."""
+    from app.core.config import settings
+    from app.services import artifacts, extract, pipeline
+    
+    monkeypatch.setattr(settings, "analysis_cache_enabled", True)
+    document = tmp_path / "contract.txt"
+    document.write_text("1. The supplier shall deliver the goods.")
+    version = artifacts.extractor_version()
+    key = pipeline.result_cache_key(str(document), pipeline.analysis_service)
+    
+    source = inspect.getsource(extract)
+    edited = source.replace("class ClauseSegmenter", "class ClauseSegmenter  # edited", 1)
+    assert edited != source
+    monkeypatch.setattr(artifacts.inspect, "getsource", lambda obj: edited if obj is extract else source)
+    monkeypatch.setattr(artifacts, "_EXTRACTOR_VERSION", None)
+    
+    assert artifacts.extractor_version() != version
+    assert pipeline.result_cache_key(str(document), pipeline.analysis_service) != key
+    assert artifacts.extraction_store._path("abc").name != f"abc-{version}.jsonl.gz"
+
+
+def test_rules_module_change_changes_model_version(monkeypatch):
+    """Editing the rule engine outside RuleBasedAnalyzer invalidates cached analyses and clause memos."""
+    from app.services import analysis, rules
+    
+    monkeypatch.setattr(analysis.AnalysisService, "classifier", None)
+    version = analysis.AnalysisService().model_version
+    
+    getsource = inspect.getsource
+    edited = getsource(rules).replace("def required_literals", "def required_literals  # edited", 1)
+    monkeypatch.setattr(analysis.inspect, "getsource", lambda obj: edited if obj is rules else getsource(obj))
+    monkeypatch.setattr(analysis, "_RULES_FINGERPRINT", None)
+    
+    assert analysis.AnalysisService().model_version != version
+    assert analysis.AnalysisService().model_version.startswith("rules-")
+
+
+def test_extraction_store_prunes_old_versions_and_oldest_artifacts(tmp_path):
+    """Test pruning drops other extractor versions, then the least recently written beyond the limit."""
+    import os
+    from app.services.artifacts import Extraction, ExtractionStore
+    
+    store = ExtractionStore(str(tmp_path), max_entries=2)
+    (tmp_path / "abc-0000000000000000.json.gz").write_bytes(b"stale")
+    for i, content_hash in enumerate(["a", "b", "c"]):
+        store.set(content_hash, Extraction("text", ["clause"]))
+        os.utime(store._path(content_hash), (1000 + i, 1000 + i))
+    
+    store.prune()
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([store._path("b").name, store._path("c").name])
+    
+    store.delete("b")
+    assert store.get("b") is None
+    assert store.get("c") == Extraction("text", ["clause"])
+
+
+def test_hash_file(tmp_path):
+    """Identical content hashes identically regardless of file name."""
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_bytes(b"same contract")
+    second.write_bytes(b"same contract")
+    assert hash_file(str(first)) == hash_file(str(second))
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """The in-memory tier is bounded and evicts the oldest entry."""
+    cache = AnalysisCache(max_entries=2)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    assert cache.get("a") == {"value": 1}
+    cache.set("c", {"value": 3})
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("c") == {"value": 3}
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    """Results written to disk are found by a fresh cache instance."""
+    AnalysisCache(max_entries=2, cache_dir=str(tmp_path)).set("key", {"global_risk_score": 42.0})
+    
+    cache = AnalysisCache(max_entries=2, cache_dir=str(tmp_path))
+    assert cache.get("key") == {"global_risk_score": 42.0}
+    
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_clause_cache_bounded_with_counters():
+    """The clause memo evicts old entries and counts hits and misses."""
+    memo = ClauseResultCache(max_entries=1)
+    result = {
+        "clause_text": "Either party may terminate.",
+        "clause_index": 3,
+        "risk_label": "MEDIUM",
+        "risk_score": 40.0,
+        "explanation": "moderate",
+        "suggested_mitigation": "review",
+    }
+    first = memo.make_key("model-a", "either party may terminate.")
+    memo.set(first, result)
+    
+    hit = memo.get(first, "Either party may terminate.", 7)
+    assert hit["clause_index"] == 7
+    assert hit["risk_label"] == "MEDIUM"
+    assert memo.get(memo.make_key("model-b", "either party may terminate."), "x", 0) is None
+    
+    memo.set(memo.make_key("model-a", "another clause"), result)
+    assert memo.get(first, "Either party may terminate.", 0) is None
+    assert memo.stats() == {"hits": 1, "misses": 2, "entries": 1}
+
+
+def test_rule_analyzer_reuses_memoized_clauses():
+    """Repeated clauses are served from the memo with their own index."""
+    clause_cache.clear()
+    clause = "The Tenant shall indemnify and hold harmless the Landlord, including claims arising from its own negligence."
+    analyzer = RuleBasedAnalyzer()
+    
+    first = analyzer.analyze_clauses([clause])
+    before = clause_cache.stats()["hits"]
+    second = analyzer.analyze_clauses(["Short preamble text here.", clause])
+    
+    assert clause_cache.stats()["hits"] == before + 1
+    assert second[1] == {**first[0], "clause_index": 1}
@@ -0,0 +1,109 @@
+"""Tests for risk score mapping and probability calibration."""
+import json
+import os
+import numpy as np
+import pytest
+from app.ml.calibration import (
+    CALIBRATION_FILE,
+    Calibration,
+    calibrate_model,
+    expected_calibration_error,
+    fit_isotonic,
+    fit_temperature,
+    load_calibration,
+    score_probabilities,
+)
+
+RISK_LABELS = np.array(["LOW", "MEDIUM", "HIGH"])
+
+
+def test_score_probabilities_bands():
+    """Each label scores in its band, with the uncertainty adjustments applied."""
+    probs = np.array([
+        [0.9, 0.05, 0.05],  # LOW: 0-30
+        [0.1, 0.8, 0.1],  # MEDIUM: 30-70
+        [0.05, 0.6, 0.35],  # MEDIUM with HIGH likely: +10
+        [0.0, 0.0, 1.0],  # HIGH: 70-100
+        [0.0, 0.4, 0.6],  # HIGH with MEDIUM likely: x0.9
+    ])
+    labels, confidences, scores = score_probabilities(probs, RISK_LABELS)
+    
+    assert labels.tolist() == ["LOW", "MEDIUM", "MEDIUM", "HIGH", "HIGH"]
+    np.testing.assert_allclose(confidences, [0.9, 0.8, 0.6, 1.0, 0.6])
+    np.testing.assert_allclose(scores, [27.0, 62.0, 64.0, 100.0, 79.2])
+
+
+def test_temperature_calibration_softens_overconfident_model():
+    """A fitted temperature above 1 lowers the confidence of an overconfident model, keeping its predictions."""
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 3, size=600)
+    # Right 70% of the time, but always 99% sure
+    predicted = np.where(rng.random(600) < 0.7, labels, (labels + 1) % 3)
+    probs = np.full((600, 3), 0.005)
+    probs[np.arange(600), predicted] = 0.99
+    
+    calibration = fit_temperature(probs, labels)
+    calibrated = calibration.apply(probs)
+    assert calibration.temperature > 1
+    assert (calibrated.argmax(axis=1) == predicted).all()
+    np.testing.assert_allclose(calibrated.sum(axis=1), 1.0)
+    np.testing.assert_allclose(calibrated.max(axis=1), 0.7, atol=0.02)
+    assert expected_calibration_error(calibrated, labels) < expected_calibration_error(probs, labels)
+
+
+def test_isotonic_calibration_round_trips(tmp_path):
+    """Isotonic curves map probabilities to observed frequencies and survive a save and load."""
+    rng = np.random.default_rng(1)
+    labels = rng.integers(0, 3, size=300)
+    probs = rng.dirichlet(np.ones(3), size=300)
+    probs[np.arange(300), labels] += 1.0
+    probs /= probs.sum(axis=1, keepdims=True)
+    
+    calibration = fit_isotonic(probs, labels)
+    (tmp_path / CALIBRATION_FILE).write_text(json.dumps(calibration.to_dict()))
+    loaded = load_calibration(str(tmp_path))
+    
+    assert loaded.method == "isotonic" and loaded.samples == 300
+    np.testing.assert_allclose(loaded.apply(probs), calibration.apply(probs))
+    np.testing.assert_allclose(loaded.apply(probs).sum(axis=1), 1.0)
+    assert load_calibration(str(tmp_path / "missing")) is None
+
+
+def test_classifier_applies_calibration_saved_with_model(tiny_model):
+    """Test RiskClassifier calibrates probabilities with the model's calibration.json."""
+    pytest.importorskip("torch")
+    from app.ml.infer import RiskClassifier
+    
+    uncalibrated = RiskClassifier(tiny_model, backend="torch")
+    with open(f"{tiny_model}/{CALIBRATION_FILE}", "w") as f:
+        json.dump(Calibration("temperature", temperature=0.01).to_dict(), f)
+    calibrated = RiskClassifier(tiny_model, backend="torch")
+    assert calibrated.calibration.temperature == 0.01
+    assert calibrated.fingerprint != uncalibrated.fingerprint
+    
+    probs = calibrated.engine.predict_proba(["The supplier shall deliver the goods within thirty days."])
+    raw_labels, raw_confidences, _ = uncalibrated._score_probabilities(probs)
+    labels, confidences, _ = calibrated._score_probabilities(probs)
+    assert labels.tolist() == raw_labels.tolist()
+    assert confidences[0] > raw_confidences[0] + 0.1
+
+
+def test_calibration_fits_on_validation_split_and_reports_test_metrics(tiny_model):
+    """Test calibrate_model fits on the saved validation split and measures the separate test split."""
+    pytest.importorskip("torch")
+    import pandas as pd
+    from app.ml.train import SPLITS_DIR
+    
+    split_dir = os.path.join(tiny_model, SPLITS_DIR)
+    os.makedirs(split_dir)
+    for name, days in (("validation", range(10, 14)), ("test", range(20, 22))):
+        pd.DataFrame([
+            {"clause_text": f"the supplier shall {verb} within {n} days", "label": label}
+            for verb, label in (("deliver", "LOW"), ("give notice", "MEDIUM"), ("indemnify", "HIGH"))
+            for n in days
+        ]).to_csv(os.path.join(split_dir, f"{name}.csv"), index=False)
+    
+    data = calibrate_model(tiny_model, method="temperature")
+    assert data["samples"] == 12
+    assert data["metrics"]["samples"] == 6
+    assert os.path.exists(os.path.join(tiny_model, CALIBRATION_FILE))
@@ -0,0 +1,27 @@
+"""Tests for database engine configuration."""
+from app.core.config import settings
+from app.db import async_database_url, engine_options
+
+
+def test_async_database_url():
+    """Test sync URLs are mapped to the async driver for the same database."""
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgresql+asyncpg://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_engine_options():
+    """Test pool settings and the statement timeout apply to server databases only."""
+    assert "pool_size" not in engine_options("sqlite:///./app.db")
+    
+    options = engine_options("postgresql://u:p@db/app")
+    assert options["pool_size"] == settings.db_pool_size
+    assert options["max_overflow"] == settings.db_max_overflow
+    assert options["pool_pre_ping"] == settings.db_pool_pre_ping
+    assert options["connect_args"] == {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    
+    async_options = engine_options("postgresql://u:p@db/app", is_async=True)
+    assert async_options["connect_args"] == {
+        "server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}
+    }
@@ -0,0 +1,135 @@
+"""Tests for document extraction."""
+import time
+import tracemalloc
+import fitz
+import pytest
+from app.core.config import settings
+from app.services import artifacts, extract
+from app.services.extract import ClauseSegmenter, DocumentExtractor
+
+
+@pytest.fixture
+def long_pdf(tmp_path):
+    """Create a 40-page PDF with one numbered clause per page."""
+    path = tmp_path / "long.pdf"
+    doc = fitz.open()
+    for i in range(1, 41):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"{i}. The supplier shall deliver batch {i} within ten days.")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_parallel_pdf_extraction_matches_sequential(long_pdf, monkeypatch, caplog):
+    """Test page-parallel PDF extraction reassembles pages in order."""
+    monkeypatch.setattr(settings, "pdf_extract_workers", 0)
+    sequential = DocumentExtractor.extract_text(long_pdf)
+    
+    monkeypatch.setattr(settings, "pdf_extract_workers", 2)
+    monkeypatch.setattr(settings, "pdf_parallel_min_pages", 10)
+    assert DocumentExtractor._parallel_pdf(40)
+    parallel = DocumentExtractor.extract_text(long_pdf)
+    
+    assert "Parallel PDF extraction failed" not in caplog.text
+    assert parallel == sequential
+    assert parallel.index("batch 9 ") < parallel.index("batch 10 ") < parallel.index("batch 40 ")
+
+
+SAMPLE_CONTRACT = (
+    "MASTER SERVICES AGREEMENT between the parties below.\r\n\r\n\r\n"
+    "ARTICLE 1 DEFINITIONS\n"
+    "1.1 Services means the services described in each statement of work.\n"
+    "1.2 Fees means the amounts payable by the customer under this agreement.\n"
+    "ARTICLE—2 PAYMENT\n"
+    "1. The customer shall pay all invoices within thirty days of receipt.\n"
+    "2) Late payments shall bear interest at one percent per month.\n\n\n\n"
+    "Article 12 TERMINATION\n"
+    "Either party may terminate this agreement on ninety days written notice.\n\n"
+    "The provider shall return all customer data within thirty days of termination.\n"
+    "ARTICLE 13"
+)
+
+
+def test_streamed_segmentation_matches_whole_text():
+    """Test clauses are the same however the text is split into pieces."""
+    expected = DocumentExtractor.segment_clauses(SAMPLE_CONTRACT)
+    assert len(expected) >= 6
+    # A heading at the very end starts its own (here too short) section
+    assert expected[-1].endswith("within thirty days of termination.")
+    
+    # Split everywhere, including inside ARTICLE headings and CRLF pairs
+    for size in (1, 2, 3, 7, 16, 50):
+        pieces = [SAMPLE_CONTRACT[i:i + size] for i in range(0, len(SAMPLE_CONTRACT), size)]
+        assert list(DocumentExtractor.iter_clauses(pieces)) == expected, size
+
+
+def test_segmenter_emits_sections_before_end():
+    """Test an article's clauses are returned once the next article starts."""
+    segmenter = ClauseSegmenter()
+    first = segmenter.feed("ARTICLE 1\n1.1 The supplier shall deliver the goods on time.\n")
+    assert first == []
+    second = segmenter.feed("ARTICLE 2\n2.1 The customer shall pay within thirty days.\n")
+    assert second == ["1.1 The supplier shall deliver the goods on time."]
+    assert segmenter.close() == ["2.1 The customer shall pay within thirty days."]
+
+
+def test_segmenter_emits_numbered_clauses_before_end():
+    """Test a numbered clause is returned once the next marker arrives, without any ARTICLE heading."""
+    segmenter = ClauseSegmenter()
+    assert segmenter.feed("1. The supplier shall deliver the goods on time.\n") == []
+    assert segmenter.feed("2. The customer shall pay") == ["1. The supplier shall deliver the goods on time."]
+    assert segmenter.close() == ["2. The customer shall pay"]
+
+
+def test_numbered_document_peak_memory(tmp_path, monkeypatch):
+    """Test a large numbered document without ARTICLE headings is segmented without holding its text."""
+    path = tmp_path / "numbered.txt"
+    with open(path, "w") as f:
+        for i in range(1, 20001):
+            f.write(f"{i}. The supplier shall deliver batch {i} of the goods within thirty days of the order.\n")
+    size = path.stat().st_size
+    monkeypatch.setattr(extract, "TXT_CHUNK_SIZE", 64 * 1024)
+    monkeypatch.setattr(artifacts, "extraction_store", artifacts.ExtractionStore(str(tmp_path / "artifacts")))
+    
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in DocumentExtractor.iter_clauses(DocumentExtractor.iter_text(str(path))))
+        streamed_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        extraction = artifacts.extract_document(str(path))
+        document_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    assert count == len(extraction.clauses) == 20000
+    assert extraction.text is None
+    # Only the open clause and the current chunk are held while streaming
+    assert streamed_peak < size / 2
+    # The clauses themselves are the only copy of the text kept
+    assert document_peak < 2.5 * size
+    assert artifacts.extract_document(str(path), include_text=True).text == path.read_text()
+
+
+def test_pdf_text_is_streamed_per_page(long_pdf):
+    """Test iter_text yields PDF pages one at a time."""
+    pieces = list(DocumentExtractor.iter_text(long_pdf))
+    assert len(pieces) == 40
+    assert "".join(pieces) == DocumentExtractor.extract_text(long_pdf)
+
+
+def test_segmentation_is_linear_in_blank_lines():
+    """Test a section of many whitespace-only lines is scanned once."""
+    text = "Introduction to the agreement between the parties.\n" + "\n \n" * 20000 + "1. The supplier shall deliver the goods."
+    start = time.perf_counter()
+    clauses = DocumentExtractor.segment_clauses(text)
+    assert time.perf_counter() - start < 2
+    assert clauses[-1] == "1. The supplier shall deliver the goods."
+
+
+def test_long_clause_is_split_on_lettered_items():
+    """Test a numbered clause over 2000 characters is split at its indented a), b) items."""
+    item = "the supplier shall keep the records required by this agreement " * 20
+    text = f"1. Obligations of the supplier.\n  a) {item}\n  b) {item}\n2. The customer shall pay the fees."
+    clauses = DocumentExtractor.segment_clauses(text)
+    assert [clause[:6] for clause in clauses] == ["1. Obl", "1. a) ", "1. b) ", "2. The"]
@@ -0,0 +1,244 @@
+"""Tests for batched ML inference."""
+import os
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from app.ml.engine import aggregate_windows, plan_batches
+
+
+def test_plan_batches_covers_every_item_once():
+    """Every item is assigned to exactly one batch."""
+    lengths = [5, 120, 7, 300, 64, 8, 512, 33]
+    batches = plan_batches(lengths, max_batch_size=3, max_batch_tokens=4096)
+    
+    flat = sorted(i for batch in batches for i in batch)
+    assert flat == list(range(len(lengths)))
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_plan_batches_groups_by_length():
+    """Similar lengths are batched together so padding stays small."""
+    lengths = [500, 10, 490, 12, 11, 505]
+    batches = plan_batches(lengths, max_batch_size=3, max_batch_tokens=4096)
+    
+    assert [sorted(b) for b in batches] == [[1, 3, 4], [0, 2, 5]]
+
+
+def test_plan_batches_respects_token_budget():
+    """A batch is closed before its padded size exceeds the token budget."""
+    lengths = [100] * 10
+    batches = plan_batches(lengths, max_batch_size=16, max_batch_tokens=350)
+    
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    for batch in batches:
+        assert max(lengths[i] for i in batch) * len(batch) <= 350
+
+
+def test_aggregate_windows():
+    """Windows of a text are combined by their riskiest window or by mean logits."""
+    logits = np.array([
+        [2.0, 0.0, 0.0],  # text 0
+        [3.0, 0.0, 0.0],  # text 1, window 0: low risk
+        [0.0, 0.0, 3.0],  # text 1, window 1: high risk
+        [0.0, 1.0, 0.0],  # text 2
+    ], dtype=np.float32)
+    text_index = np.array([0, 1, 1, 2])
+    
+    riskiest = aggregate_windows(logits, text_index, 3, "max_risk")
+    assert riskiest.shape == (3, 3)
+    assert riskiest.argmax(axis=1).tolist() == [0, 2, 1]
+    np.testing.assert_allclose(riskiest[1], aggregate_windows(logits[2:3], np.array([0]), 1)[0])
+    
+    mean = aggregate_windows(logits, text_index, 3, "mean")
+    np.testing.assert_allclose(mean[1], aggregate_windows(np.array([[1.5, 0.0, 1.5]]), np.array([0]), 1)[0], rtol=1e-5)
+    np.testing.assert_allclose(mean.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_onnx_backend_matches_torch(tiny_model, monkeypatch):
+    """Test the exported ONNX graph gives the same labels and scores as PyTorch."""
+    pytest.importorskip("onnxruntime")
+    from app.ml.export_onnx import export_onnx
+    from app.ml.infer import RiskClassifier
+    from app.services.cache import clause_cache
+    
+    export_onnx(tiny_model, optimize=True)
+    torch_classifier = RiskClassifier(tiny_model, backend="torch")
+    onnx_classifier = RiskClassifier(tiny_model, backend="onnx")
+    assert torch_classifier.classifier.name == "torch"
+    assert onnx_classifier.classifier.name == "onnx"
+    assert onnx_classifier.fingerprint != torch_classifier.fingerprint
+    
+    clauses = [
+        "The supplier shall deliver the goods within thirty days.",
+        "The customer shall indemnify and hold harmless the supplier from any and all claims without limitation.",
+        "Either party may terminate this agreement on written notice.",
+        "The tenant shall pay rent.",
+    ] * 3
+    torch_probs = torch_classifier.engine.predict_proba(clauses)
+    onnx_probs = onnx_classifier.engine.predict_proba(clauses)
+    np.testing.assert_allclose(onnx_probs, torch_probs, atol=1e-4)
+    
+    clause_cache.clear()
+    torch_results = torch_classifier.analyze_clauses(clauses)
+    onnx_results = onnx_classifier.analyze_clauses(clauses)
+    assert [r["risk_label"] for r in onnx_results] == [r["risk_label"] for r in torch_results]
+    for onnx_result, torch_result in zip(onnx_results, torch_results):
+        assert onnx_result.keys() == torch_result.keys()
+        assert abs(onnx_result["risk_score"] - torch_result["risk_score"]) <= 0.01
+
+
+def test_onnx_backend_falls_back_to_torch_without_export(tiny_model):
+    """Test selecting onnx before exporting loads the PyTorch model instead."""
+    from app.ml.infer import RiskClassifier
+    
+    classifier = RiskClassifier(tiny_model, backend="onnx")
+    assert classifier.classifier.name == "torch"
+
+
+@pytest.fixture
+def labelled_csv(tmp_path):
+    """Write a small labelled clause dataset with every label equally represented."""
+    import csv
+    
+    parties = ["supplier", "customer", "party"]
+    templates = {
+        "LOW": "the {party} may deliver the goods within {days} days",
+        "MEDIUM": "the {party} shall terminate this agreement on {days} days written notice",
+        "HIGH": "the {party} shall indemnify and hold harmless all claims without limitation for {days} days",
+    }
+    path = tmp_path / "clauses.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["clause_text", "label"])
+        for label, template in templates.items():
+            for party in parties:
+                for days in range(10, 20):
+                    writer.writerow([template.format(party=party, days=days), label])
+    return str(path)
+
+
+def test_held_out_splits_exclude_training_clauses():
+    """Test oversampled clauses repeated across splits are only kept in the training split."""
+    import pandas as pd
+    from app.ml.train import held_out_splits, split_data
+    
+    df = pd.DataFrame({
+        "clause_text": [f"clause {i % 30}" for i in range(90)],
+        "label": [["LOW", "MEDIUM", "HIGH"][i % 3] for i in range(90)],
+    })
+    train_df, validation_df, test_df = split_data(df)
+    splits = held_out_splits(train_df, validation_df, test_df)
+    
+    trained = set(train_df["clause_text"])
+    assert not trained & set(splits["validation"]["clause_text"])
+    assert not trained & set(splits["test"]["clause_text"])
+    assert not set(splits["validation"]["clause_text"]) & set(splits["test"]["clause_text"])
+    assert list(splits["test"].columns) == ["clause_text", "label"]
+
+
+def test_quantize_publishes_int8_model(tiny_model, labelled_csv):
+    """Test an int8 model within the F1 budget is published and served by the onnx-int8 backend."""
+    pytest.importorskip("onnxruntime")
+    from app.ml.backends import quantized_model_path
+    from app.ml.infer import RiskClassifier
+    from app.ml.quantize import quantize_model
+    from app.ml.train import RiskClassificationTrainer, split_data
+    
+    # Splits saved with the model at training time are evaluated on
+    trainer = RiskClassificationTrainer(model_name=tiny_model, output_dir=tiny_model)
+    trainer.save_splits(*split_data(trainer.load_data(labelled_csv)))
+    
+    report = quantize_model(tiny_model, max_f1_drop=1.0)
+    assert os.path.exists(quantized_model_path(tiny_model))
+    assert report["samples"] == 18
+    assert set(report["metrics"]) == {"fp32", "int8"}
+    
+    torch_classifier = RiskClassifier(tiny_model, backend="torch")
+    int8_classifier = RiskClassifier(tiny_model, backend="onnx-int8")
+    assert int8_classifier.classifier.name == "onnx-int8"
+    assert int8_classifier.fingerprint != torch_classifier.fingerprint
+    
+    clauses = ["The supplier shall deliver the goods within thirty days.", "The tenant shall pay rent."]
+    np.testing.assert_allclose(
+        int8_classifier.engine.predict_proba(clauses),
+        torch_classifier.engine.predict_proba(clauses),
+        atol=0.05,
+    )
+
+
+def test_quantize_refuses_model_over_f1_budget(tiny_model, labelled_csv):
+    """Test an int8 model that loses too much macro F1 is not published."""
+    pytest.importorskip("onnxruntime")
+    from app.ml.backends import quantized_model_path
+    from app.ml.infer import RiskClassifier
+    from app.ml.quantize import QuantizationRejected, quantize_model
+    
+    # No split saved with the model and no training CSV to rebuild it from
+    with pytest.raises(ValueError):
+        quantize_model(tiny_model, max_f1_drop=1.0)
+    assert not os.path.exists(quantized_model_path(tiny_model) + ".candidate")
+    
+    with pytest.raises(QuantizationRejected):
+        quantize_model(tiny_model, labelled_csv, max_f1_drop=-1.0)
+    assert not os.path.exists(quantized_model_path(tiny_model))
+    assert not os.path.exists(quantized_model_path(tiny_model) + ".candidate")
+    
+    # Without a published int8 graph, onnx-int8 serves the fp32 graph
+    assert RiskClassifier(tiny_model, backend="onnx-int8").classifier.name == "onnx"
+
+
+def test_long_clause_is_scored_in_overlapping_windows(tiny_model):
+    """Test a clause over the token limit is scored on all of its windows, batched with other clauses."""
+    from app.ml.engine import softmax
+    from app.ml.infer import RiskClassifier
+    
+    classifier = RiskClassifier(tiny_model, backend="torch")
+    engine = classifier.engine
+    assert engine.max_length == 128
+    
+    long_clause = " ".join(
+        ["the supplier shall deliver the goods within thirty days"] * 20
+        + ["the customer shall indemnify and hold harmless any and all claims without limitation"] * 10
+    )
+    short_clause = "The tenant shall pay rent."
+    windows, text_index = engine._tokenize([short_clause, long_clause])
+    assert text_index.tolist()[0] == 0 and len(windows) > 3
+    assert all(len(window) <= 128 for window in windows)
+    
+    probs = engine.predict_proba([short_clause, long_clause, short_clause])
+    np.testing.assert_allclose(probs[0], probs[2], atol=1e-6)
+    
+    # The long clause gets the probabilities of its riskiest window
+    long_windows = [window for window, text in zip(windows, text_index) if text == 1]
+    window_probs = np.vstack([
+        softmax(classifier.classifier.logits(np.array([window], dtype=np.int64), np.ones((1, len(window)), dtype=np.int64)))
+        for window in long_windows
+    ])
+    expected = window_probs[(window_probs @ classifier._risk_weights()).argmax()]
+    np.testing.assert_allclose(probs[1], expected, atol=1e-5)
+
+
+def test_token_cache_skips_tokenizing_known_clauses(tiny_model, monkeypatch):
+    """Test only clauses missing from the token cache are tokenized, in one call."""
+    from app.ml.infer import RiskClassifier
+    
+    engine = RiskClassifier(tiny_model, backend="torch").engine
+    assert engine.tokenizer.is_fast
+    calls = []
+    tokenizer = engine.tokenizer
+    
+    def counting_tokenizer(texts, **kwargs):
+        calls.append(list(texts))
+        return tokenizer(texts, **kwargs)
+    
+    counting_tokenizer.is_fast = True
+    counting_tokenizer.pad_token_id = tokenizer.pad_token_id
+    monkeypatch.setattr(engine, "tokenizer", counting_tokenizer)
+    
+    first = engine.predict_proba(["The supplier shall deliver the goods.", "The tenant shall pay rent."])
+    again = engine.predict_proba(["The tenant shall pay rent.", "Either party may terminate.", "The supplier shall deliver the goods."])
+    assert calls == [["The supplier shall deliver the goods.", "The tenant shall pay rent."], ["Either party may terminate."]]
+    np.testing.assert_allclose(again[[2, 0]], first, atol=1e-6)
+    assert engine.token_cache.stats() == {"hits": 2, "misses": 3, "entries": 3}
@@ -0,0 +1,63 @@
+"""Tests for the analysis pipeline."""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db import Base
+from app.models.analysis import Clause
+from app.services.analysis import AnalysisService
+from app.services.pipeline import ClausePool, insert_clauses, save_analysis
+
+
+def _rules_service():
+    service = AnalysisService()
+    service.ml_mode = "rules"
+    return service
+
+
+def test_clause_pool_matches_per_document_analysis():
+    """Clauses scored in shared batches give the same per-document results."""
+    service = _rules_service()
+    documents = {
+        "a": ["The supplier shall indemnify the buyer against all claims."] * 3,
+        "b": ["This agreement shall automatically renew each year.", "Either party may terminate with notice."],
+        "c": ["Payment is due within thirty days of invoice."] * 5,
+    }
+    
+    pool = ClausePool(service, chunk_size=4)
+    results = {}
+    for key, clauses in documents.items():
+        results.update(pool.add(key, clauses))
+    results.update(pool.flush())
+    
+    assert set(results) == set(documents)
+    for key, clauses in documents.items():
+        assert results[key] == service.analyze_document(clauses)
+
+
+def test_save_analysis_bulk_inserts_clauses(count_queries):
+    """Clause rows are written with a constant number of statements."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    
+    clauses = [f"Clause number {i} requires written notice before termination." for i in range(300)]
+    analysis_result = _rules_service().analyze_document(clauses)
+    try:
+        with count_queries(engine) as statements:
+            db_analysis = save_analysis(
+                db,
+                analysis_result,
+                session_id=None,
+                filename="bulk.txt",
+                original_filename="bulk.txt",
+                file_path="bulk.txt",
+            )
+        assert len(statements) <= 4
+        
+        stored = db.query(Clause).filter(Clause.analysis_id == db_analysis.id).order_by(Clause.id).all()
+        assert [c.clause_index for c in stored] == list(range(300))
+        assert [c.risk_label for c in stored] == [c["risk_label"] for c in analysis_result["clauses"]]
+        
+        ids = insert_clauses(db, db_analysis.id, analysis_result["clauses"][:3])
+        assert [db.get(Clause, i).clause_index for i in ids] == [0, 1, 2]
+    finally:
+        db.close()
@@ -0,0 +1,119 @@
+"""Tests for the shared model registry."""
+import threading
+import time
+import numpy as np
+from app.ml.registry import WARMUP_CLAUSES, ModelRegistry
+from app.services import analysis
+from app.services.analysis import AnalysisService
+
+
+class FakeEngine:
+    """Stands in for BatchInferenceEngine, recording what it scores."""
+    
+    def __init__(self):
+        self.batches = []
+    
+    def predict_proba(self, texts):
+        self.batches.append(list(texts))
+        return np.full((len(texts), 3), 1 / 3)
+
+
+class FakeClassifier:
+    """Stands in for RiskClassifier; has_model=False mimics missing model files."""
+    
+    loads = 0
+    
+    def __init__(self, has_model=True):
+        FakeClassifier.loads += 1
+        time.sleep(0.05)  # Loading takes a while, so concurrent first uses overlap
+        self.classifier = object() if has_model else None
+        self.model_path = "./models/fake"
+        self.fingerprint = "fake-model"
+        self.engine = FakeEngine()
+    
+    def analyze_clauses(self, clauses):
+        return [{"clause_index": i, "risk_label": "LOW"} for i in range(len(clauses))]
+
+
+def test_services_share_one_classifier_loaded_once(monkeypatch):
+    """Test concurrent first uses and every service get the same classifier, loaded once."""
+    FakeClassifier.loads = 0
+    registry = ModelRegistry(loader=FakeClassifier)
+    monkeypatch.setattr(analysis, "model_registry", registry)
+    monkeypatch.setattr(analysis.settings, "ml_mode", "ml")
+    assert registry.status()["state"] == "not_loaded"
+    
+    services = [AnalysisService() for _ in range(4)]
+    assert FakeClassifier.loads == 0
+    
+    seen = []
+    threads = [threading.Thread(target=lambda s=s: seen.append(s.classifier)) for s in services]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert FakeClassifier.loads == 1
+    assert len({id(classifier) for classifier in seen}) == 1
+    assert services[0].model_version.startswith("ml-fake-model-")
+    assert registry.status() == {"state": "ready", "warmed_up": False, "warming_up": False, "fingerprint": "fake-model", "error": None}
+
+
+def test_warm_up_scores_dummy_batch_once():
+    """Test warm-up loads the model and runs one dummy batch through the engine."""
+    registry = ModelRegistry(loader=FakeClassifier)
+    
+    assert registry.warm_up()
+    assert registry.warm_up()
+    assert registry.get_classifier().engine.batches == [WARMUP_CLAUSES]
+    assert registry.status()["warmed_up"]
+
+
+def test_background_warm_up_reports_not_ready_until_done(monkeypatch):
+    """Test /health is not ready while the startup warm-up runs, and ready once it finishes."""
+    from fastapi.testclient import TestClient
+    from app.api import routes
+    from app.main import app
+    
+    loading = threading.Event()
+    release = threading.Event()
+    
+    def slow_loader():
+        loading.set()
+        release.wait(5)
+        return FakeClassifier()
+    
+    registry = ModelRegistry(loader=slow_loader)
+    monkeypatch.setattr(routes, "model_registry", registry)
+    client = TestClient(app)
+    
+    thread = registry.start_warm_up()
+    assert loading.wait(5)
+    assert not client.get("/health").json()["ready"]
+    
+    release.set()
+    thread.join(5)
+    health = client.get("/health").json()
+    assert health["ready"]
+    assert health["model"]["warmed_up"] and not health["model"]["warming_up"]
+
+
+def test_missing_model_falls_back_to_rules_until_reset(monkeypatch):
+    """Test a failed load is not retried on every use, and reset allows a retry."""
+    FakeClassifier.loads = 0
+    registry = ModelRegistry(loader=lambda: FakeClassifier(has_model=False))
+    monkeypatch.setattr(analysis, "model_registry", registry)
+    monkeypatch.setattr(analysis.settings, "ml_mode", "ml")
+    
+    service = AnalysisService()
+    assert not registry.warm_up()
+    assert service.classifier is None
+    assert service.model_version.startswith("rules-")
+    assert service.analyze_clauses(["The tenant shall pay rent monthly."])[0]["risk_label"] in ("LOW", "MEDIUM", "HIGH")
+    assert FakeClassifier.loads == 1
+    assert registry.status()["state"] == "unavailable"
+    assert "./models/fake" in registry.status()["error"]
+    
+    registry.reset()
+    assert service.classifier is None
+    assert FakeClassifier.loads == 2
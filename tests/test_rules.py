@@ -0,0 +1,41 @@
+"""Tests for the precompiled rule engine."""
+from app.services.rules import RuleEngine, required_literals
+
+
+def test_required_literals_skip_optional_parts():
+    """Optional groups, escapes and quantified characters are not required."""
+    assert required_literals(r'enter.*premises.*without\s+(prior\s+)?notice') == {
+        "enter", "premises", "without", "notice",
+    }
+    assert required_literals(r'^definitions?\s*:') == {"definition"}
+    assert required_literals(r'foo|bar') == set()
+
+
+def test_required_literals_break_at_character_classes():
+    """Characters in a class or a {m,n} quantifier are not literal runs."""
+    assert required_literals(r'pay[abc]ment') == {"pay", "ment"}
+    assert required_literals(r'sub[^]\]x]let') == {"sub", "let"}
+    assert required_literals(r'notice\s+[0-9]{2,3}\s+days') == {"notice", "days"}
+    assert required_literals(r'fees{2}due') == {"fee", "due"}
+
+
+def test_scan_counts_match_naive_evaluation():
+    """The engine produces the same counts as checking each rule separately."""
+    engine = RuleEngine(
+        high_keywords=["penalty", "penalty clause", "indemnify", "penalty"],
+        medium_keywords=["termination", "notice period"],
+        high_patterns=[r'indemnify.*own\s+negligence', r'penalty.*uncapped'],
+        medium_patterns=[r'terminate.*liable\s+for\s+rent', r'no\s+subletting'],
+        low_patterns=[r'^whereas\s+', r'force\s+majeure'],
+    )
+    
+    matches = engine.scan("the penalty clause is uncapped and tenant shall indemnify for its own negligence.")
+    assert matches.high_count == 4
+    assert matches.medium_count == 0
+    assert matches.high_pattern_matches == 2
+    assert matches.medium_pattern_matches == 0
+    assert not matches.is_boilerplate
+    
+    assert engine.scan("whereas the parties agree").is_boilerplate
+    assert engine.scan("delays caused by  force   majeure events").is_boilerplate
+    assert not engine.scan("the parties agree, whereas").is_boilerplate